@@ -0,0 +1,107 @@
+"""
+Per-request overhead of the access-policy middleware.
+
+Compares the previous ``BaseHTTPMiddleware`` based implementation with the
+pure ASGI one by calling the ASGI application directly (no network, no server),
+so the difference is the cost of the middleware itself.
+
+Usage::
+
+    python benchmarks/access_policy_middleware.py [requests]
+"""
+import asyncio
+import sys
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+from arrowhead_client.provider.implementations.asgi_middleware import (
+    ArrowheadAccessPolicyMiddleware,
+    check_access_policy,
+)
+
+
+class BaseHTTPAccessPolicyMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, for comparison."""
+
+    def __init__(self, app, policy_map):
+        super().__init__(app)
+        self.policy_map = policy_map
+
+    async def dispatch(self, request, call_next):
+        path = request.scope['path'].strip('/')
+        if path not in self.policy_map:
+            return await call_next(request)
+
+        error = check_access_policy(self.policy_map[path])
+        if error is not None:
+            return error
+
+        return await call_next(request)
+
+
+class Rule:
+    access_policy = None
+
+    def is_authorized(self, consumer_cert, auth_str):
+        return True
+
+
+async def endpoint(request):
+    return Response(b'ok')
+
+
+def make_app(middleware):
+    app = Starlette(routes=[Route('/service', endpoint)])
+    if middleware is not None:
+        app.add_middleware(middleware, policy_map={'service': Rule()})
+    return app
+
+
+async def measure(app, requests):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': '/service', 'raw_path': b'/service', 'root_path': '',
+        'query_string': b'', 'headers': [], 'server': ('127.0.0.1', 80), 'client': ('127.0.0.1', 1234),
+    }
+
+    def make_channel():
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        done = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Like a server: the client "disconnects" once the response is sent
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                done.set()
+
+        return receive, send
+
+    # The middleware stack is built on the first call
+    await app(dict(scope), *make_channel())
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), *make_channel())
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests):
+    baseline = await measure(make_app(None), requests)
+    print(f'{"no middleware":<20} {baseline:8.1f} us/request')
+
+    for name, middleware in (('BaseHTTPMiddleware', BaseHTTPAccessPolicyMiddleware), ('pure ASGI', ArrowheadAccessPolicyMiddleware)):
+        latency = await measure(make_app(middleware), requests)
+        print(f'{name:<20} {latency:8.1f} us/request (overhead {latency - baseline:6.1f} us)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,228 @@
+"""
+Throughput of the async consumers calling one provider concurrently over TLS.
+
+The provider is a local TLS stand-in server in a separate process that offers
+HTTP/2 and HTTP/1.1 in the handshake (ALPN) and answers every request after a
+fixed delay, standing in for the work of a real provider. Each consumer is
+loaded by concurrent tasks calling ``consume_service`` one after the other;
+the number of TLS connections the server had to accept is reported too.
+``AiohttpConsumer`` opens a connection per concurrent request, while
+``HttpxConsumer`` multiplexes the requests over HTTP/2 streams.
+
+The certificate of the stand-in server is generated on the fly.
+
+Usage::
+
+    python benchmarks/consumer_http2.py [concurrency] [seconds] [delay_ms]
+"""
+import asyncio
+import datetime
+import ipaddress
+import multiprocessing
+import socket
+import ssl
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import h2.config
+import h2.connection
+import h2.events
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from arrowhead_client.consumer import AiohttpConsumer
+from arrowhead_client.consumer.implementations.httpx_consumer import HttpxConsumer
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+BODY = b'{"msg": "hello"}'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_certificate(directory):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'provider')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+
+    keyfile, certfile = Path(directory) / 'provider.key', Path(directory) / 'provider.pem'
+    keyfile.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    certfile.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    return str(keyfile), str(certfile)
+
+
+# ---------------------------------------------------------------- stand-in server
+
+
+async def serve_h2(reader, writer, delay):
+    conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+    conn.initiate_connection()
+    writer.write(conn.data_to_send())
+    tasks = set()
+
+    async def respond(stream_id):
+        await asyncio.sleep(delay)
+        conn.send_headers(stream_id, [
+            (':status', '200'),
+            ('content-type', 'application/json'),
+            ('content-length', str(len(BODY))),
+        ])
+        conn.send_data(stream_id, BODY, end_stream=True)
+        writer.write(conn.data_to_send())
+
+    while data := await reader.read(65536):
+        for event in conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                task = asyncio.create_task(respond(event.stream_id))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        writer.write(conn.data_to_send())
+
+
+async def serve_http1(reader, writer, delay):
+    response = (
+        b'HTTP/1.1 200 OK\r\n'
+        b'Content-Type: application/json\r\n'
+        b'Content-Length: %d\r\n'
+        b'\r\n%s' % (len(BODY), BODY)
+    )
+
+    while True:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        length = 0
+        for line in head.split(b'\r\n'):
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        await asyncio.sleep(delay)
+        writer.write(response)
+
+
+def serve(port, keyfile, certfile, delay, connections):
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile)
+    context.set_alpn_protocols(['h2', 'http/1.1'])
+
+    async def handle(reader, writer):
+        with connections.get_lock():
+            connections.value += 1
+        protocol = writer.get_extra_info('ssl_object').selected_alpn_protocol()
+        try:
+            if protocol == 'h2':
+                await serve_h2(reader, writer, delay)
+            else:
+                await serve_http1(reader, writer, delay)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, '127.0.0.1', port, ssl=context, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+# ------------------------------------------------------------------------ client
+
+
+async def load(consumer, port, concurrency, seconds):
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    rule = OrchestrationRule(
+        Service('echo', 'echo', ServiceInterface('HTTP', 'SECURE', 'JSON')),
+        ArrowheadSystem.make('provider', '127.0.0.1', port, ''),
+        'POST',
+        authorization_token='token',
+    )
+
+    async def worker(deadline):
+        done = 0
+        while time.monotonic() < deadline:
+            response = await consumer.consume_service(rule, json={'msg': 'hello'})
+            assert response.status_code == 200, response.status_code
+            done += 1
+        return done
+
+    await consumer.async_startup()
+    try:
+        deadline = time.monotonic() + seconds
+        results = await asyncio.gather(*(worker(deadline) for _ in range(concurrency)))
+    finally:
+        await consumer.async_shutdown()
+    return sum(results) / seconds
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    delay = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.01
+
+    consumers = {
+        'AiohttpConsumer': lambda keyfile, certfile: AiohttpConsumer(keyfile, certfile, certfile),
+        'HttpxConsumer (HTTP/1.1)': lambda keyfile, certfile: HttpxConsumer(keyfile, certfile, certfile, http2=False),
+        'HttpxConsumer (HTTP/2)': lambda keyfile, certfile: HttpxConsumer(keyfile, certfile, certfile),
+    }
+
+    print(f'{concurrency} concurrent requests, {seconds:.0f} s per run, {delay * 1000:.0f} ms provider delay')
+
+    with tempfile.TemporaryDirectory() as directory:
+        keyfile, certfile = make_certificate(directory)
+        context = multiprocessing.get_context('spawn')
+
+        for name, make_consumer in consumers.items():
+            port = free_port()
+            connections = context.Value('i', 0)
+            server = context.Process(
+                target=serve, args=(port, keyfile, certfile, delay, connections), daemon=True,
+            )
+            server.start()
+            try:
+                throughput = asyncio.run(load(make_consumer(keyfile, certfile), port, concurrency, seconds))
+            finally:
+                server.terminate()
+                server.join()
+
+            print(f'{name:<26} {throughput:10.0f} req/s {connections.value:6d} connections')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Throughput of the async provider with the different server options.
+
+Every combination of event loop and HTTP parser that is installed is served by
+a ``StarletteProvider`` in a separate process, then loaded by keep-alive
+connections sending requests one after the other. The client is a minimal raw
+HTTP/1.1 client, so its own overhead stays low compared to the server.
+
+Usage::
+
+    python benchmarks/server_throughput.py [connections] [seconds]
+"""
+import asyncio
+import importlib.util
+import itertools
+import multiprocessing
+import socket
+import sys
+import time
+
+from arrowhead_client.client.implementations import AsyncClient
+
+LOOPS = ['asyncio', 'uvloop']
+PARSERS = ['h11', 'httptools']
+
+REQUEST = (
+    b'POST /echo HTTP/1.1\r\n'
+    b'Host: 127.0.0.1\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Content-Length: 16\r\n'
+    b'\r\n'
+    b'{"msg": "hello"}'
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def serve(port, options):
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    client = AsyncClient.create(
+        'benchmark', '127.0.0.1', port,
+        provider_options=options,
+    )
+
+    @client.provided_service(
+        service_definition='echo',
+        service_uri='echo',
+        protocol='HTTP',
+        method='POST',
+        payload_format='JSON',
+        access_policy='NOT_SECURE',
+    )
+    async def echo(req):
+        return req.read_json()['msg']
+
+    client._initialize_provided_services()
+    client.provider.server_options['log_level'] = 'critical'
+    client.provider.server_options['access_log'] = False
+    client.provider.run_forever('127.0.0.1', port, '', '')
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    await reader.readexactly(length)
+    return head[9:12]
+
+
+async def connection(port, deadline):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    done = 0
+    try:
+        while time.monotonic() < deadline:
+            writer.write(REQUEST)
+            status = await read_response(reader)
+            assert status == b'200', status
+            done += 1
+    finally:
+        writer.close()
+    return done
+
+
+async def load(port, connections, seconds):
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    deadline = time.monotonic() + seconds
+    results = await asyncio.gather(*(connection(port, deadline) for _ in range(connections)))
+    return sum(results) / seconds
+
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    installed = {name for name in LOOPS + PARSERS if name in ('asyncio', 'h11') or importlib.util.find_spec(name)}
+    print(f'{connections} connections, {seconds:.0f} s per run')
+
+    for loop, http in itertools.product(LOOPS, PARSERS):
+        if loop not in installed or http not in installed:
+            print(f'{loop:>8} + {http:<10} not installed')
+            continue
+
+        port = free_port()
+        server = multiprocessing.get_context('spawn').Process(
+            target=serve, args=(port, {'loop': loop, 'http': http}), daemon=True,
+        )
+        server.start()
+        try:
+            throughput = asyncio.run(load(port, connections, seconds))
+        finally:
+            server.terminate()
+            server.join()
+
+        print(f'{loop:>8} + {http:<10} {throughput:10.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
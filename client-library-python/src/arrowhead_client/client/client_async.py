@@ -27,8 +27,12 @@ class ArrowheadClientAsync(ArrowheadClient):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.provider.add_startup_routine(self.client_setup)
-        self.provider.add_shutdown_routine(self.client_cleanup)
+        # Consumers are set up in every server process, the Arrowhead setup (public key,
+        # event subscriptions) runs once per client even with multiple workers.
+        self.provider.add_startup_routine(self.setup)
+        self.provider.add_shutdown_routine(self.shutdown)
+        self.provider.add_startup_routine(self.client_setup, once=True)
+        self.provider.add_shutdown_routine(self.client_cleanup, once=True)
 
     async def consume_service(
         self,
@@ -88,6 +92,10 @@ class ArrowheadClientAsync(ArrowheadClient):
         for consumer in self.consumers.values():
             await consumer.async_startup()
 
+    async def shutdown(self):
+        for consumer in self.consumers.values():
+            await consumer.async_shutdown()
+
     async def add_orchestration_rule(  # type: ignore
         self,
         service_definition: str,
@@ -225,7 +233,13 @@ class ArrowheadClientAsync(ArrowheadClient):
         for event_type, rule in self.event_subscription_rules.items():
             await self._unsubscribe_event(rule)
 
-    def run_forever(self):
+    def run_forever(self, workers: int = 1):
+        """
+        Starts the provider and runs until interrupted.
+
+        Args:
+            workers: Number of server processes sharing the system port.
+        """
         super().setup()
 
         self._initialize_provided_services()
@@ -237,6 +251,7 @@ class ArrowheadClientAsync(ArrowheadClient):
             # TODO: keyfile and certfile should be given in provider.__init__
             keyfile=self.keyfile,
             certfile=self.certfile,
+            **({'workers': workers} if workers > 1 else {}),
         )
 
     async def client_setup(self):
@@ -250,13 +265,20 @@ class ArrowheadClientAsync(ArrowheadClient):
             )
         # await self._register_all_services()
         await self._subscribe_all_events()
+        if getattr(self.provider, 'workers', 1) > 1:
+            # Run by the supervisor process, whose event loop ends before the workers start
+            await self.shutdown()
 
     async def client_cleanup(self):
         print("Shutting down Arrowhead Client")
+        supervisor = getattr(self.provider, 'workers', 1) > 1
+        if supervisor:
+            # Run by the supervisor process, its consumers have been shut down after the setup
+            await self.setup()
         # await self._unregister_all_services()
         await self._unsubscribe_all_events()
-        for consumer in self.consumers.values():
-            await consumer.async_shutdown()
+        if supervisor:
+            await self.shutdown()
         self._logger.info("Server shut down")
 
     async def __aenter__(self):
@@ -266,5 +288,4 @@ class ArrowheadClientAsync(ArrowheadClient):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        for consumer in self.consumers.values():
-            await consumer.async_shutdown()
+        await self.shutdown()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from functools import partial
+import inspect
 from typing import Any, Callable, Type, Sequence, ClassVar, get_type_hints, TypeVar, Coroutine, Mapping
 
 from arrowhead_client.response import Response
@@ -34,6 +35,38 @@ from arrowhead_client import constants
 from arrowhead_client.types import Metadata, M
 
 
+def _consumer_options(consumers: Sequence[type[BaseConsumer]], options: dict | None) -> list[dict]:
+    """
+    Splits the consumer options between the consumers, every consumer gets the options its
+    constructor accepts.
+
+    Args:
+        consumers: Consumer classes.
+        options: Keyword arguments of the consumers.
+
+    Returns:
+        The keyword arguments of each consumer.
+
+    Raises:
+        TypeError: An option isn't accepted by any of the consumers.
+    """
+    options = options or {}
+    split = []
+    for consumer in consumers:
+        parameters = inspect.signature(consumer).parameters
+        if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+            split.append(dict(options))
+        else:
+            split.append({key: value for key, value in options.items() if key in parameters})
+
+    unknown = set(options) - {key for consumer_options in split for key in consumer_options}
+    if unknown:
+        names = ", ".join(consumer.__name__ for consumer in consumers)
+        raise TypeError(f"Consumer options {sorted(unknown)} aren't accepted by any of the consumers ({names})")
+
+    return split
+
+
 class ServiceDescriptorBase:
     def __init__(self, func: Callable[[Any, Request], Any]):
         ...
@@ -226,6 +259,7 @@ class ArrowheadClient(ABC):
         # It's currently not even being used so it could likely be removed.
         # Maybe it should be it's own method?
         self.add_provided_service = self.provider.add_provided_service
+        self._provided_services_initialized = False
 
     __arrowhead_services__: ClassVar[tuple[str, ...]] = ()
     __arrowhead_subscribed_events__: ClassVar[tuple[str, ...]] = ()
@@ -304,22 +338,42 @@ class ArrowheadClient(ABC):
                 data_model = get_args(
                         get_type_hints(func)["req"]
                 )[0]
-            except IndexError:
-                self.data_model = None
-
-            self.registration_rules.store(
-                RegistrationRule(
-                    provided_service,
-                    self.system,
-                    method,
-                    func,
-                    data_model=data_model,
-                )
+            except (IndexError, KeyError):
+                data_model = None
+
+            rule = RegistrationRule(
+                provided_service,
+                self.system,
+                method,
+                func,
+                data_model=data_model,
             )
+            self.registration_rules.store(rule)
+            # Services defined after startup are provided right away
+            if self._provided_services_initialized:
+                self._initialize_provided_service(rule)
             return func
 
         return wrapped_func
 
+    def remove_provided_service(self, service_definition: str) -> RegistrationRule:
+        """
+        Removes a provided service, also from the provider if it is already running.
+        The service is not unregistered from the Service registry.
+
+        Args:
+            service_definition: Service definition of the provided service.
+        Returns:
+            The registration rule of the removed service.
+        Raises:
+            KeyError: If no service is provided with the given service definition.
+        """
+        rule = self.registration_rules.remove(service_definition)
+        if self._provided_services_initialized:
+            self.provider.remove_provided_service(rule)
+
+        return rule
+
     def subscribed_event(
         self,
         event_type: str,
@@ -437,6 +491,8 @@ class ArrowheadClient(ABC):
         certfile: str = "",
         cafile: str = "",
         log_mode: str = "debug",
+        provider_options: dict = None,
+        consumer_options: dict = None,
         **kwargs,
     ) -> _T:
         """
@@ -456,6 +512,9 @@ class ArrowheadClient(ABC):
             keyfile: Path to a PEM keyfile. If you use pkcs#12 keystores, you need to convert them to PEM format first.
             certfile: Path to a PEM certfile. If you use pkcs#12 keystores, you need to convert them to PEM format first.
             cafile: Path to a PEM certificate authority file. If you use pkcs#12 keystores, you need to convert them to PEM format first.
+            provider_options: Keyword arguments passed to the provider, e.g. :code:`{'dispatch': True, 'loop': 'uvloop'}`. Optional.
+            consumer_options: Keyword arguments passed to the consumers, e.g. :code:`{'limit': 200, 'limit_per_host': 20}`.
+                Every consumer gets the options its constructor accepts, so options of different consumer types can be mixed. Optional.
         Returns:
             A new ArrowheadClient instance.
 
@@ -483,10 +542,13 @@ class ArrowheadClient(ABC):
         new_instance = cls(
             system=system,
             consumers=tuple(
-                consumer(keyfile, certfile, cafile)
-                for consumer in cls.__arrowhead_consumers__
+                consumer(keyfile, certfile, cafile, **options)
+                for consumer, options in zip(
+                    cls.__arrowhead_consumers__,
+                    _consumer_options(cls.__arrowhead_consumers__, consumer_options),
+                )
             ),
-            provider=cls.__arrowhead_provider__(cafile),
+            provider=cls.__arrowhead_provider__(cafile, **(provider_options or {})),
             logger=logger,
             config=config,
             keyfile=keyfile,
@@ -585,13 +647,17 @@ class ArrowheadClient(ABC):
 
     def _initialize_provided_services(self) -> None:
         for rule in self.registration_rules:
-            rule.access_policy = get_access_policy(
-                policy_name=rule.provided_service.access_policy,
-                provided_service=rule.provided_service,
-                privatekey=self.keyfile,
-                authorization_key=self.auth_authentication_info,
-            )
-            self.provider.add_provided_service(rule)
+            self._initialize_provided_service(rule)
+        self._provided_services_initialized = True
+
+    def _initialize_provided_service(self, rule: RegistrationRule) -> None:
+        rule.access_policy = get_access_policy(
+            policy_name=rule.provided_service.access_policy,
+            provided_service=rule.provided_service,
+            privatekey=self.keyfile,
+            authorization_key=self.auth_authentication_info,
+        )
+        self.provider.add_provided_service(rule)
 
     def _initialize_event_subscription(self) -> None:
         for event_type, rule in self.event_subscription_rules.items():
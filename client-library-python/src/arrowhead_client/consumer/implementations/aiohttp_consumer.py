@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import ssl
+from dataclasses import dataclass, asdict
+from types import SimpleNamespace
 
 import aiohttp
 
@@ -13,9 +16,47 @@ from arrowhead_client.types import M
 from arrowhead_client.errors import ServiceConnectionError
 
 
+@dataclass
+class PoolMetrics:
+    """
+    Connection pool counters of a consumer.
+
+    A growing ``queued`` count and ``queue_time`` mean the requests are waiting for a free
+    connection of the pool rather than for the providers, i.e. the limits are too low.
+
+    Attributes:
+        created: Connections opened.
+        reused: Requests sent on an already open connection.
+        queued: Requests that had to wait for a free connection.
+        waiting: Requests waiting for a free connection right now.
+        queue_time: Total time spent waiting for a free connection, in seconds.
+        max_queue_time: Longest wait for a free connection, in seconds.
+        in_use: Connections serving a request right now (until its response has arrived).
+    """
+    created: int = 0
+    reused: int = 0
+    queued: int = 0
+    waiting: int = 0
+    queue_time: float = 0.0
+    max_queue_time: float = 0.0
+    in_use: int = 0
+
+
 class AiohttpConsumer(BaseConsumer, protocol={Protocol.HTTP, Protocol.WS}):
     """
     Asynchronous consumer based on AioHttp.
+
+    Every request goes through one connection pool, the TLS context is bound to its connector.
+
+    Args:
+        keyfile: Certificate keyfile.
+        certfile: Certificate certfile.
+        cafile: Certificate authority file.
+        limit: Maximum number of open connections, 0 means no limit.
+        limit_per_host: Maximum number of open connections to the same endpoint, 0 means no limit.
+        keepalive_timeout: Seconds an idle connection is kept open for reuse.
+        ttl_dns_cache: Seconds resolved addresses are cached for, None caches them forever.
+        force_close: Close every connection after its request instead of reusing it.
     """
 
     http_session: aiohttp.ClientSession
@@ -25,6 +66,11 @@ class AiohttpConsumer(BaseConsumer, protocol={Protocol.HTTP, Protocol.WS}):
         keyfile: str,
         certfile: str,
         cafile: str,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15.0,
+        ttl_dns_cache: int | None = 10,
+        force_close: bool = False,
     ):
         super().__init__(keyfile, certfile, cafile)
         if keyfile and certfile and cafile:
@@ -32,13 +78,98 @@ class AiohttpConsumer(BaseConsumer, protocol={Protocol.HTTP, Protocol.WS}):
             self.ssl_context.load_cert_chain(certfile, keyfile)
         else:
             self.ssl_context = ssl.create_default_context()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.force_close = force_close
+        self.metrics = PoolMetrics()
+        self._loop: asyncio.AbstractEventLoop | None = None
 
     async def async_startup(self):
-        # Initialize http_session if it isn't initialized
-        try:
-            self.http_session
-        except AttributeError:
-            self.http_session = aiohttp.ClientSession()
+        # Initialize http_session if it isn't initialized or can't be used from this event loop,
+        # e.g. in a server worker forked after the session had been used by the supervisor.
+        session = getattr(self, "http_session", None)
+        loop = asyncio.get_running_loop()
+        if session is None or session.closed or self._loop is not loop:
+            if session is not None and not session.closed:
+                # The session of the previous event loop would leak its connector otherwise
+                try:
+                    await session.close()
+                except RuntimeError:
+                    session.detach()
+            connector = aiohttp.TCPConnector(
+                ssl=self.ssl_context,
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                # aiohttp refuses a keep-alive timeout together with force_close
+                keepalive_timeout=None if self.force_close else self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+                force_close=self.force_close,
+            )
+            self.metrics = PoolMetrics()
+            self.http_session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._trace_config()],
+            )
+            self._loop = loop
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        metrics = self.metrics
+        loop = asyncio.get_running_loop()
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_queued_start(session, context: SimpleNamespace, params):
+            context.queued_at = loop.time()
+            metrics.queued += 1
+            metrics.waiting += 1
+
+        async def on_queued_end(session, context: SimpleNamespace, params):
+            waited = loop.time() - context.queued_at
+            metrics.waiting -= 1
+            metrics.queue_time += waited
+            metrics.max_queue_time = max(metrics.max_queue_time, waited)
+
+        def acquired(context: SimpleNamespace):
+            # A redirected request acquires a connection per hop, it's counted once
+            if not getattr(context, "in_use", False):
+                context.in_use = True
+                metrics.in_use += 1
+
+        async def on_create_end(session, context: SimpleNamespace, params):
+            metrics.created += 1
+            acquired(context)
+
+        async def on_reuseconn(session, context: SimpleNamespace, params):
+            metrics.reused += 1
+            acquired(context)
+
+        async def on_request_done(session, context: SimpleNamespace, params):
+            if getattr(context, "in_use", False):
+                context.in_use = False
+                metrics.in_use -= 1
+
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuseconn)
+        trace_config.on_request_end.append(on_request_done)
+        trace_config.on_request_exception.append(on_request_done)
+
+        return trace_config
+
+    def pool_metrics(self) -> dict:
+        """
+        Returns the connection pool counters, the limits and the current usage of the pool.
+
+        Returns:
+            A dictionary of the :code:`PoolMetrics` fields, :code:`limit` and :code:`limit_per_host`.
+        """
+        return {
+            **asdict(self.metrics),
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+        }
 
     async def async_shutdown(self):
         await self.http_session.close()
@@ -49,17 +180,18 @@ class AiohttpConsumer(BaseConsumer, protocol={Protocol.HTTP, Protocol.WS}):
         data_model: type[M] | None = None,
         **kwargs,
     ) -> Response[M]:
-        headers = kwargs.get("headers", {})
+        headers = kwargs.pop("headers", {})
         if rule.secure:
             auth_header = {"Authorization": f"Bearer {rule.authorization_token}"}
             headers = {**headers, **auth_header}
+        # ID of the resource, e.g. the removed service of a management endpoint
+        rmid = f'/{kwargs.pop("rmid")}' if "rmid" in kwargs else ""
 
         try:
             async with self.http_session.request(
                 rule.method,
-                f"{http(rule.secure)}{rule.endpoint}",
+                f"{http(rule.secure)}{rule.endpoint}{rmid}",
                 headers=headers,
-                ssl=self.ssl_context,
                 **kwargs,
             ) as resp:
                 status_code = resp.status
@@ -86,7 +218,6 @@ class AiohttpConsumer(BaseConsumer, protocol={Protocol.HTTP, Protocol.WS}):
 
         connection = await self.http_session.ws_connect(
             f"{ws(rule.secure)}{rule.endpoint}",
-            ssl=self.ssl_context,
             headers=headers,
             **kwargs,
         )
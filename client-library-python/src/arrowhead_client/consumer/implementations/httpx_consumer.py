@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+
+import httpx
+
+from arrowhead_client.consumer.base import BaseConsumer
+from arrowhead_client.consumer.implementations.aiohttp_consumer import http
+from arrowhead_client.response import Response
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.constants import Protocol
+from arrowhead_client.types import M
+from arrowhead_client.errors import ServiceConnectionError
+
+
+class HttpxConsumer(BaseConsumer, protocol={Protocol.HTTP}):
+    """
+    Asynchronous consumer based on httpx, with HTTP/2 enabled.
+
+    Concurrent requests to the same provider, or to the orchestrator, are multiplexed
+    over one TLS connection instead of opening a connection each. Providers that don't
+    offer HTTP/2 in the TLS handshake, and every insecure provider, are consumed with HTTP/1.1.
+
+    HTTP/2 needs the ``h2`` package, install the library with the ``http2`` extra.
+    The consumer doesn't support WebSockets, list it after :code:`AiohttpConsumer` to keep them,
+    the HTTP services are then consumed by the consumer listed last:
+
+    Example::
+
+        from arrowhead_client.client import ArrowheadClientAsync
+        from arrowhead_client.consumer import AiohttpConsumer
+        from arrowhead_client.consumer.implementations.httpx_consumer import HttpxConsumer
+        from arrowhead_client.provider.implementations.starlette_provider import StarletteProvider
+
+        class Http2Client(ArrowheadClientAsync):
+            __arrowhead_consumers__ = (AiohttpConsumer, HttpxConsumer)
+            __arrowhead_provider__ = StarletteProvider
+
+    Args:
+        keyfile: Certificate keyfile.
+        certfile: Certificate certfile.
+        cafile: Certificate authority file.
+        http2: Offer HTTP/2 to the providers.
+        max_connections: Maximum number of open connections, None means no limit.
+        max_keepalive_connections: Maximum number of idle connections kept open for reuse.
+        keepalive_expiry: Seconds an idle connection is kept open for reuse.
+    """
+
+    http_client: httpx.AsyncClient
+
+    def __init__(
+        self,
+        keyfile: str,
+        certfile: str,
+        cafile: str,
+        http2: bool = True,
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 100,
+        keepalive_expiry: float | None = 15.0,
+    ):
+        super().__init__(keyfile, certfile, cafile)
+        if keyfile and certfile and cafile:
+            self.ssl_context = ssl.create_default_context(cafile=cafile)
+            self.ssl_context.load_cert_chain(certfile, keyfile)
+        else:
+            self.ssl_context = ssl.create_default_context()
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def async_startup(self):
+        # Connections of the pool belong to the event loop that opened them, e.g. a server worker
+        # forked after the client had been used by the supervisor needs a new one.
+        client = getattr(self, "http_client", None)
+        loop = asyncio.get_running_loop()
+        if client is None or client.is_closed or self._loop is not loop:
+            self.http_client = httpx.AsyncClient(
+                verify=self.ssl_context,
+                http2=self.http2,
+                limits=self.limits,
+            )
+            self._loop = loop
+
+    async def async_shutdown(self):
+        await self.http_client.aclose()
+
+    async def consume_service(  # type: ignore
+        self,
+        rule: OrchestrationRule,
+        data_model: type[M] | None = None,
+        **kwargs,
+    ) -> Response[M]:
+        headers = kwargs.pop("headers", {})
+        # httpx rejects the header without a token (trailing whitespace)
+        if rule.secure and rule.authorization_token:
+            auth_header = {"Authorization": f"Bearer {rule.authorization_token}"}
+            headers = {**headers, **auth_header}
+        # ID of the resource, e.g. the removed service of a management endpoint
+        rmid = f'/{kwargs.pop("rmid")}' if "rmid" in kwargs else ""
+
+        try:
+            resp = await self.http_client.request(
+                rule.method,
+                f"{http(rule.secure)}{rule.endpoint}{rmid}",
+                headers=headers,
+                **kwargs,
+            )
+        except Exception as e:
+            raise ServiceConnectionError(rule.service_definition, rule.system_name, rule.endpoint) from e
+
+        return Response(
+            resp.content,
+            rule.payload_type,
+            resp.status_code,
+            data_model=data_model or rule.data_model,
+        )
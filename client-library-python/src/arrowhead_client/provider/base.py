@@ -20,6 +20,16 @@ class BaseProvider(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
             rule: Provision rule.
         """
 
+    def remove_provided_service(self, rule: RegistrationRule, ) -> None:
+        """
+        Removes a provided service previously added with :py:meth:`add_provided_service`.
+        Providers that support it can also remove services while running.
+
+        Args:
+            rule: Provision rule.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def run_forever(
             self,
@@ -30,6 +40,7 @@ class BaseProvider(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
     ) -> None:
         """
         Starts the provider and runs until interrupted.
+        Providers that support it accept a ``workers`` keyword argument to run multiple server processes.
 
         Args:
             address: system ip address.
@@ -39,20 +50,33 @@ class BaseProvider(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
             cafile: certificate authority file
         """
 
-    def add_startup_routine(self, func: Callable):
+    def add_startup_routine(self, func: Callable, once: bool = False):
         """
         Schedules ``func`` to be called during startup.
 
         Args:
             func: Function executed during startup, must not take any arguments.
+            once: If set, ``func`` is called once per provider, otherwise once per server process.
         """
         raise NotImplementedError
 
-    def add_shutdown_routine(self, func: Callable):
+    def add_shutdown_routine(self, func: Callable, once: bool = False):
         """
         Schedules ``func`` to be called during shutdown.
 
         Args:
             func: Function executed during shutdown, must not take any arguments.
+            once: If set, ``func`` is called once per provider, otherwise once per server process.
+        """
+        raise NotImplementedError
+
+    def add_drain_routine(self, func: Callable, once: bool = False):
+        """
+        Schedules ``func`` to be called when the provider is asked to stop, before it stops
+        accepting requests, e.g. to unregister the services and let the running requests finish.
+
+        Args:
+            func: Function executed during draining, must not take any arguments.
+            once: If set, ``func`` is called once per provider, otherwise once per server process.
         """
         raise NotImplementedError
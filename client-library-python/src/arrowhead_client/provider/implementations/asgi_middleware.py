@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+import json
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import TokenAccessPolicy
+from arrowhead_client import constants
+
+
+def check_access_policy(rule: RegistrationRule) -> Response | None:
+    """
+    Checks the request against the access policy of the rule.
+
+    Args:
+        rule: Registration rule of the requested service.
+
+    Returns:
+        The error response if the request is not allowed, otherwise None.
+    """
+    # TODO: Replace these with actual request values when asgi implements client-certs or when you try running a reverse proxy
+    consumer_cert = "consumer_cert"
+    auth_str = "auth_str"
+
+    if isinstance(rule.access_policy, TokenAccessPolicy):
+        return Response(
+            content=json.dumps(
+                {constants.Misc.ERROR_MESSAGE: "Token access policy not supported"}
+            ),
+            status_code=501,
+        )
+    if not rule.is_authorized(consumer_cert, auth_str):
+        return Response(
+            content=f'{{"{constants.Misc.ERROR_MESSAGE}": "WIP"}}', status_code=403
+        )
+
+    return None
+
+
+class ArrowheadAccessPolicyMiddleware:
+    """
+    ASGI middleware checking the access policy of the requested service.
+
+    Unlike ``BaseHTTPMiddleware`` it doesn't wrap the request in extra tasks and
+    memory streams: the policy is looked up directly from the scope, rejected
+    requests are answered right away and every other message, including
+    streaming response bodies, passes through untouched.
+
+    Args:
+        app: The wrapped ASGI application.
+        policy_map: Registration rules by service uri.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policy_map: Mapping[str, RegistrationRule],
+    ):
+        self.app = app
+        self.policy_map = policy_map
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            rule = self.policy_map.get(scope["path"].strip("/"))
+            error = check_access_policy(rule) if rule is not None else None
+            if error is not None:
+                await error(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -1,43 +1,15 @@
-from typing import Mapping, Dict, Callable
-import json
+from typing import Dict, Callable
 
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 import uvicorn  # type: ignore
 
 from arrowhead_client.provider.base import BaseProvider
+from arrowhead_client.provider.implementations.asgi_middleware import ArrowheadAccessPolicyMiddleware
 from arrowhead_client.rules import RegistrationRule
-from arrowhead_client.security.access_policy import TokenAccessPolicy
 from arrowhead_client import constants
 
 
-class ArrowheadAccessPolicyMiddleware(BaseHTTPMiddleware):
-    def __init__(
-            self,
-            app,
-            policy_map: Mapping[str, RegistrationRule],
-    ):
-        super().__init__(app)
-        self.policy_map = policy_map
-
-    async def dispatch(self, request: Request, call_next):
-        path = request.scope['path'].strip('/')
-        if path not in self.policy_map:
-            return await call_next(request)
-        # TODO: Replace these with actual request values when uvicorn implements client-certs or when you try running a reverse proxy
-        consumer_cert = 'consumer_cert'
-        auth_str = 'auth_str'
-
-        if isinstance(self.policy_map[path].access_policy, TokenAccessPolicy):
-            return Response(content=json.dumps({constants.Misc.ERROR_MESSAGE: 'Token access policy not supported'}),
-                            status_code=501)
-        if not self.policy_map[path].is_authorized(consumer_cert, auth_str):
-            return Response(content=f'{{"{constants.Misc.ERROR_MESSAGE}": "WIP"}}', status_code=403)
-
-        return await call_next(request)
-
-
 class FastapiProvider(BaseProvider, protocol=constants.Protocol.HTTP):
     def __init__(
             self,
@@ -83,8 +55,22 @@ class FastapiProvider(BaseProvider, protocol=constants.Protocol.HTTP):
                 ssl_ca_certs=self.cafile,
         )
 
-    def add_startup_routine(self, func: Callable):
+    def add_startup_routine(self, func: Callable, once: bool = False):
+        """
+        Adds a routine run at startup.
+
+        Args:
+            func: The routine.
+            once: Ignored, there's always a single server process (no multi-worker mode).
+        """
         self.app.add_event_handler('startup', func)
 
-    def add_shutdown_routine(self, func: Callable):
+    def add_shutdown_routine(self, func: Callable, once: bool = False):
+        """
+        Adds a routine run at shutdown.
+
+        Args:
+            func: The routine.
+            once: Ignored, there's always a single server process (no multi-worker mode).
+        """
         self.app.add_event_handler('shutdown', func)
@@ -1,71 +1,168 @@
 from __future__ import annotations
 
 from typing import Any
-from collections.abc import Mapping, Callable
+from collections.abc import Callable, Iterable
 from functools import partial
-import json
+import asyncio
+import inspect
+import logging
+import os
+import signal
+import socket
 import ssl
+import traceback
+from collections.abc import Iterator
 
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import Response
-from starlette.routing import BaseRoute, Route, WebSocketRoute
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import BaseRoute, Mount, Route, WebSocketRoute
+from starlette.types import Receive, Scope, Send
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 import uvicorn  # type: ignore
 
 from arrowhead_client.provider.base import BaseProvider
+from arrowhead_client.provider.implementations.asgi_middleware import (
+    ArrowheadAccessPolicyMiddleware,
+    check_access_policy,
+)
 from arrowhead_client.rules import RegistrationRule
 from arrowhead_client.request import Request as ArRequest
-from arrowhead_client.security.access_policy import TokenAccessPolicy
 from arrowhead_client import constants
 
 
-class ArrowheadAccessPolicyMiddleware(BaseHTTPMiddleware):
-    def __init__(
-        self,
-        app,
-        policy_map: Mapping[str, RegistrationRule],
-    ):
-        super().__init__(app)
-        self.policy_map = policy_map
-
-    async def dispatch(self, request: Request, call_next):
-        path = request.scope["path"].strip("/")
-        if path not in self.policy_map:
-            return await call_next(request)
-        # TODO: Replace these with actual request values when asgi implements client-certs or when you try running a reverse proxy
-        consumer_cert = "consumer_cert"
-        auth_str = "auth_str"
-
-        if isinstance(self.policy_map[path].access_policy, TokenAccessPolicy):
-            return Response(
-                content=json.dumps(
-                    {constants.Misc.ERROR_MESSAGE: "Token access policy not supported"}
-                ),
-                status_code=501,
-            )
-        if not self.policy_map[path].is_authorized(consumer_cert, auth_str):
-            return Response(
-                content=f'{{"{constants.Misc.ERROR_MESSAGE}": "WIP"}}', status_code=403
-            )
+logger = logging.getLogger(__name__)
+
+
+async def _run_routines(routines: Iterable[Callable]) -> None:
+    for routine in routines:
+        result = routine()
+        if inspect.isawaitable(result):
+            await result
+
+
+async def _drain(routines: Iterable[Callable]) -> None:
+    try:
+        await _run_routines(routines)
+    except Exception:
+        logger.exception("Drain routine has failed, shutting down anyway")
+
+
+def _reap_children() -> Iterator[tuple[int, int]]:
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        yield pid, status
+
+
+class _DrainingServer(uvicorn.Server):
+    """
+    Uvicorn server running the drain routines when it's asked to stop, while it still
+    accepts connections, then shutting down as usual. A repeated interrupt skips the rest
+    of the drain.
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_routines: list[Callable]):
+        super().__init__(config)
+        self.drain_routines = drain_routines
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        if self.drain_routines and not self.force_exit:
+            logger.info("Draining before shutdown")
+            drain = asyncio.ensure_future(_drain(self.drain_routines))
+            while not drain.done() and not self.force_exit:
+                await asyncio.wait({drain}, timeout=0.1)
+            drain.cancel()
+
+        await super().shutdown(sockets)
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
 
-        return await call_next(request)
+
+class _NoResponse(Response):
+    """Sends nothing, for requests whose client has disconnected."""
+
+    def __init__(self):
+        super().__init__()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        pass
 
 
 class StarletteProvider(BaseProvider, protocol=constants.Protocol.HTTP):
+    """
+    Provider serving the services with Starlette and uvicorn.
+
+    Args:
+        cafile: Path to a PEM certificate authority file.
+        app_name: Name of the application.
+        dispatch: If set, HTTP services are served by a single catch-all endpoint that
+            resolves the service, the method and the access policy with one dict lookup,
+            instead of one route per service matched one by one. Recommended when
+            providing many (thousands of) services.
+        loop: Event loop implementation, ``'auto'`` (uvloop if installed), ``'asyncio'`` or ``'uvloop'``.
+        http: HTTP parser, ``'auto'`` (httptools if installed), ``'h11'`` or ``'httptools'``.
+        keep_alive_timeout: Seconds an idle keep-alive connection is kept open.
+        backlog: Maximum number of connections waiting to be accepted.
+        limit_concurrency: Maximum number of concurrent connections and tasks, further
+            requests are answered with 503. ``None`` means no limit.
+        h11_max_incomplete_event_size: Maximum size of the buffered, incomplete request
+            head with the h11 parser. ``None`` means the h11 default (16 KiB).
+        graceful_shutdown_timeout: Seconds the running requests are waited for after the
+            server has stopped accepting connections, then they are cancelled. ``None``
+            means they are waited for indefinitely.
+
+    Attributes:
+        workers: Number of server processes, set by :py:meth:`run_forever`.
+        worker_index: Index of the current server process (0 if there is only one).
+    """
     app: Starlette
 
     def __init__(
         self,
         cafile: str,
         app_name: str = "",
+        dispatch: bool = False,
+        loop: str = "auto",
+        http: str = "auto",
+        keep_alive_timeout: int = 5,
+        backlog: int = 2048,
+        limit_concurrency: int | None = None,
+        h11_max_incomplete_event_size: int | None = None,
+        graceful_shutdown_timeout: float | None = None,
     ):
         super().__init__(cafile)
+        self.dispatch = dispatch
+        self.server_options: dict[str, Any] = dict(
+            loop=loop,
+            http=http,
+            timeout_keep_alive=keep_alive_timeout,
+            backlog=backlog,
+            limit_concurrency=limit_concurrency,
+            h11_max_incomplete_event_size=h11_max_incomplete_event_size,
+            timeout_graceful_shutdown=graceful_shutdown_timeout,
+        )
         self.routes: list[BaseRoute] = []
         self.on_startup: list[Callable] = []
         self.on_shutdown: list[Callable] = []
+        self.on_startup_once: list[Callable] = []
+        self.on_shutdown_once: list[Callable] = []
+        self.on_drain: list[Callable] = []
+        self.on_drain_once: list[Callable] = []
+        self.workers = 1
+        self.worker_index = 0
         self.policy_map: dict[str, RegistrationRule] = {}
+        self._service_routes: dict[tuple[str, str], BaseRoute] = {}
+        self._dispatch_map: dict[str, dict[str, tuple[RegistrationRule, Callable]]] = {}
 
     def add_provided_service(
         self,
@@ -75,48 +172,162 @@ class StarletteProvider(BaseProvider, protocol=constants.Protocol.HTTP):
         
         async def func_wrapper(request: Request) -> Response:
             ar_request = ArRequest(
-                await request.body(), rule.payload_type, data_model=rule.data_model
+                await request.body(),
+                rule.payload_type,
+                query=dict(request.query_params),
+                data_model=rule.data_model,
             )
 
-            return Response(str(await rule.func(ar_request)))
+            # The service is cancelled if the client disconnects before it's done
+            service = asyncio.ensure_future(rule.func(ar_request))
+            disconnect = asyncio.ensure_future(_wait_for_disconnect(request))
+            try:
+                await asyncio.wait({service, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+                if not service.done() and disconnect.exception() is None:
+                    service.cancel()
+                    # Nobody is waiting for the response anymore
+                    return _NoResponse()
+                result = await service
+            except asyncio.CancelledError:
+                service.cancel()
+                raise
+            finally:
+                disconnect.cancel()
+
+            # Services may build the response themselves, e.g. to set the status code
+            if isinstance(result, Response):
+                return result
 
-        if rule.protocol == constants.Protocol.HTTP:
-            self.routes.append(
-                Route(
-                    path=f'/{rule.service_uri.lstrip("/")}',
-                    endpoint=func_wrapper,
-                    methods=[rule.method],
-                )
+            return Response(str(result))
+
+        if rule.protocol == constants.Protocol.HTTP and self.dispatch:
+            self._dispatch_map.setdefault(rule.service_uri.strip("/"), {})[rule.method.upper()] = (rule, func_wrapper)
+            return
+        elif rule.protocol == constants.Protocol.HTTP:
+            route: BaseRoute = Route(
+                path=f'/{rule.service_uri.lstrip("/")}',
+                endpoint=func_wrapper,
+                methods=[rule.method],
             )
         elif rule.protocol == constants.Protocol.WS:
-            self.routes.append(
-                WebSocketRoute(
-                    path=f"/{rule.service_uri}",
-                    endpoint=func_wrapper,
-                )
+            route = WebSocketRoute(
+                path=f"/{rule.service_uri}",
+                endpoint=func_wrapper,
             )
+        else:
+            return
 
-    def run_forever(
+        # The app shares self.routes, so services can be added while the server runs
+        previous = self._service_routes.get((rule.service_uri, rule.method))
+        if previous is not None:
+            # A redefined service replaces its route in place, the path is never left unserved
+            self.routes[self.routes.index(previous)] = route
+        elif self.dispatch:
+            # The catch-all dispatcher must stay the last route
+            self.routes.insert(0, route)
+        else:
+            self.routes.append(route)
+        self._service_routes[(rule.service_uri, rule.method)] = route
+
+    def remove_provided_service(
         self,
-        address: str,
-        port: int,
-        keyfile: str,
-        certfile: str,
+        rule: RegistrationRule,
     ):
+        route = self._service_routes.pop((rule.service_uri, rule.method), None)
+        if route is not None:
+            self.routes.remove(route)
+
+        path = rule.service_uri.strip("/")
+        methods = self._dispatch_map.get(path, {})
+        methods.pop(rule.method.upper(), None)
+        if not methods:
+            self._dispatch_map.pop(path, None)
+
+        if not any(uri == rule.service_uri for uri, _ in self._service_routes) and path not in self._dispatch_map:
+            self.policy_map.pop(rule.service_uri, None)
+
+    async def _dispatch_app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Catch-all ASGI endpoint of the dispatch mode.
+        """
+        request = Request(scope, receive, send)
+        response = await self._dispatch_request(request)
+        await response(scope, receive, send)
+
+    async def _dispatch_request(self, request: Request) -> Response:
+        methods = self._dispatch_map.get(request.url.path.strip("/"))
+        if methods is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        service = methods.get(request.method)
+        if service is None:
+            return PlainTextResponse(
+                "Method Not Allowed",
+                status_code=405,
+                headers={"Allow": ", ".join(methods)},
+            )
+
+        rule, endpoint = service
+        error = check_access_policy(rule)
+        if error is not None:
+            return error
+
+        return await endpoint(request)
+
+    def make_app(self) -> Starlette:
+        """
+        Creates the Starlette application serving the provided services.
+        """
         # TODO: Should http requests be redirected to https requests automatically in secure mode?
         # self.app.add_middleware(HTTPSRedirectMiddleware)
+        # With multiple workers the routines that run once are run by the supervisor process
+        once = self.workers <= 1
         self.app = Starlette(
                 routes=self.routes,
-                on_startup=self.on_startup,
-                on_shutdown=self.on_shutdown,
+                on_startup=(self.on_startup_once if once else []) + self.on_startup,
+                # The routines that run once still use the consumers closed by the per process ones
+                on_shutdown=(self.on_shutdown_once if once else []) + self.on_shutdown,
         )
+        # Starlette copies the route list, share it instead to allow runtime changes
+        self.app.router.routes = self.routes
+
+        if self.dispatch:
+            # Access policies are checked by the dispatcher itself
+            self.routes.append(Mount("", app=self._dispatch_app))
+            return self.app
+
         self.app.add_middleware(
             ArrowheadAccessPolicyMiddleware, policy_map=self.policy_map
         )
+
+        return self.app
+
+    def run_forever(
+        self,
+        address: str,
+        port: int,
+        keyfile: str,
+        certfile: str,
+        workers: int = 1,
+    ):
+        """
+        Starts the server and runs until interrupted.
+
+        With more than one worker, ``workers`` server processes are forked, each of them
+        listening on the same port (``SO_REUSEPORT``), so the kernel balances the connections
+        between them. The parent process supervises the workers (a crashed worker is replaced)
+        and runs the routines added with ``once=True`` before forking and after the workers
+        have stopped. Every service must be added before, since the workers are forked copies.
+
+        When the server is asked to stop (SIGINT or SIGTERM), the drain routines run first,
+        while it still accepts connections. Then it stops accepting, waits for the running
+        requests (see ``graceful_shutdown_timeout``) and runs the shutdown routines.
+        """
+        self.workers = max(workers, 1)
+        self.make_app()
         cert_required = ssl.CERT_REQUIRED if all((keyfile, certfile, self.cafile)) else ssl.CERT_NONE
 
-        uvicorn.run(
-            self.app,
+        options = dict(
             host="0.0.0.0",
             port=port,
             forwarded_allow_ips="*",
@@ -124,10 +335,100 @@ class StarletteProvider(BaseProvider, protocol=constants.Protocol.HTTP):
             ssl_certfile=certfile,
             ssl_ca_certs=self.cafile,
             ssl_cert_reqs=cert_required,
+            **self.server_options,
         )
 
-    def add_startup_routine(self, func: Callable):
-        self.on_startup.append(func)
+        if self.workers == 1:
+            server = _DrainingServer(uvicorn.Config(self.app, **options), self.on_drain_once + self.on_drain)
+            server.run()
+        else:
+            self._run_workers(uvicorn.Config(self.app, **options))
+
+    def _run_workers(self, config: uvicorn.Config):
+        if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("Multiple workers require fork() and SO_REUSEPORT")
+
+        asyncio.run(_run_routines(self.on_startup_once))
+
+        # The supervisor waits for the signals synchronously instead of handling them
+        handled = {signal.SIGINT, signal.SIGTERM, signal.SIGCHLD}
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, handled)
+        children: dict[int, int] = {}
+        stopping = False
+
+        def signal_workers(signum: int):
+            for pid in children:
+                try:
+                    os.kill(pid, signum)
+                except ProcessLookupError:
+                    pass
+
+        try:
+            for index in range(self.workers):
+                children[self._fork_worker(config, index, mask)] = index
+
+            while children:
+                signum = signal.sigwait(handled)
+
+                if signum == signal.SIGCHLD:
+                    for pid, status in _reap_children():
+                        index = children.pop(pid, None)
+                        if index is None or stopping:
+                            continue
+
+                        logger.error(f"Worker {index} has exited unexpectedly (status {status}), restarting it")
+                        children[self._fork_worker(config, index, mask)] = index
+                elif not stopping:
+                    stopping = True
+                    logger.info("Draining before shutdown")
+                    asyncio.run(_drain(self.on_drain_once))
+                    signal_workers(signal.SIGTERM)
+                else:
+                    # A repeated interrupt makes the workers exit without waiting for requests
+                    signal_workers(signal.SIGINT)
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+        asyncio.run(_run_routines(self.on_shutdown_once))
+
+    def _fork_worker(self, config: uvicorn.Config, index: int, mask: set[signal.Signals]) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+
+        status = 0
+        try:
+            # Interrupts reach the supervisor only, it stops every worker exactly once
+            os.setpgid(0, 0)
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+            self.worker_index = index
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind((config.host, config.port))
+
+            _DrainingServer(config, self.on_drain).run(sockets=[sock])
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+
+    def add_startup_routine(self, func: Callable, once: bool = False):
+        if once:
+            self.on_startup_once.append(func)
+        else:
+            self.on_startup.append(func)
+
+    def add_shutdown_routine(self, func: Callable, once: bool = False):
+        if once:
+            self.on_shutdown_once.append(func)
+        else:
+            self.on_shutdown.append(func)
 
-    def add_shutdown_routine(self, func: Callable):
-        self.on_shutdown.append(func)
+    def add_drain_routine(self, func: Callable, once: bool = False):
+        if once:
+            self.on_drain_once.append(func)
+        else:
+            self.on_drain.append(func)
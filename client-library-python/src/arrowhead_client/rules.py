@@ -150,7 +150,7 @@ class RegistrationRule:
 
     @property
     def payload_type(self):
-        self._provided_service.interface.payload
+        return self._provided_service.interface.payload
 
     @property
     def provided_service(self):
@@ -264,3 +264,6 @@ class RegistrationRuleContainer:
 
     def retrieve(self, service_definition: str):
         return self._rulecontainer[service_definition]
+
+    def remove(self, service_definition: str) -> RegistrationRule:
+        return self._rulecontainer.pop(service_definition)
@@ -0,0 +1,114 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from arrowhead_client.client.implementations import AsyncClient
+from arrowhead_client.consumer import AiohttpConsumer
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+
+async def slow(request):
+    await asyncio.sleep(0.1)
+    return web.json_response({'msg': 'hello'})
+
+
+def make_rule(port):
+    return OrchestrationRule(
+        Service('slow', 'slow', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+        ArrowheadSystem.make('provider', '127.0.0.1', port, ''),
+        'GET',
+    )
+
+
+def test_consumer_options():
+    client = AsyncClient.create(
+        'test_system', '127.0.0.1', 1337,
+        consumer_options={'limit': 10, 'limit_per_host': 2, 'force_close': True},
+    )
+    consumer = client.consumers['HTTP']
+
+    async def run():
+        await consumer.async_startup()
+        connector = consumer.http_session.connector
+        await consumer.async_shutdown()
+        return connector
+
+    connector = asyncio.run(run())
+
+    assert connector.limit == 10
+    assert connector.limit_per_host == 2
+    assert connector.force_close
+    assert consumer.pool_metrics()['limit'] == 10
+
+
+def test_pool_metrics():
+    consumer = AiohttpConsumer('', '', '', limit=1)
+    app = web.Application()
+    app.router.add_get('/slow', slow)
+
+    async def run():
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            rule = make_rule(server.port)
+            responses = await asyncio.gather(*(consumer.consume_service(rule) for _ in range(3)))
+            await consumer.async_shutdown()
+        return responses
+
+    responses = asyncio.run(run())
+    metrics = consumer.pool_metrics()
+
+    assert [response.status_code for response in responses] == [200] * 3
+    assert metrics['created'] == 1
+    assert metrics['reused'] == 2
+    assert metrics['queued'] == 2
+    assert metrics['waiting'] == 0
+    assert metrics['max_queue_time'] >= 0.1
+    assert metrics['in_use'] == 0
+
+
+def test_pool_metrics_in_use():
+    consumer = AiohttpConsumer('', '', '', limit=2)
+    app = web.Application()
+    app.router.add_get('/slow', slow)
+
+    async def run():
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            rule = make_rule(server.port)
+            requests = [asyncio.create_task(consumer.consume_service(rule)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            in_use = consumer.pool_metrics()['in_use']
+            await asyncio.gather(*requests)
+            await consumer.async_shutdown()
+        return in_use
+
+    assert asyncio.run(run()) == 2
+    assert consumer.pool_metrics()['in_use'] == 0
+
+
+def test_session_of_previous_loop_is_closed():
+    consumer = AiohttpConsumer('', '', '')
+    app = web.Application()
+    app.router.add_get('/slow', slow)
+
+    async def first():
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            await consumer.consume_service(make_rule(server.port))
+        return consumer.http_session
+
+    async def second():
+        await consumer.async_startup()
+        session = consumer.http_session
+        await consumer.async_shutdown()
+        return session
+
+    previous = asyncio.run(first())
+    current = asyncio.run(second())
+
+    assert current is not previous
+    assert previous.closed
+    assert previous.connector is None or previous.connector.closed
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from arrowhead_client.client import ArrowheadClientAsync
+from arrowhead_client.consumer import AiohttpConsumer
+from arrowhead_client.consumer.implementations.httpx_consumer import HttpxConsumer
+from arrowhead_client.provider.implementations.starlette_provider import StarletteProvider
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+
+class Http2Client(ArrowheadClientAsync):
+    __arrowhead_consumers__ = (AiohttpConsumer, HttpxConsumer)
+    __arrowhead_provider__ = StarletteProvider
+
+
+async def echo(request):
+    return web.json_response({'msg': request.query['msg'], 'id': request.match_info['id']})
+
+
+def test_consumers_by_protocol():
+    client = Http2Client.create('test_system', '127.0.0.1', 1337)
+
+    assert isinstance(client.consumers['HTTP'], HttpxConsumer)
+    assert isinstance(client.consumers['WS'], AiohttpConsumer)
+    assert client.consumers['HTTP'].http2
+
+
+def test_consumer_options_by_consumer():
+    client = Http2Client.create(
+        'test_system', '127.0.0.1', 1337,
+        consumer_options={'limit': 10, 'max_connections': 20, 'http2': False},
+    )
+
+    assert client.consumers['WS'].limit == 10
+    assert client.consumers['HTTP'].limits.max_connections == 20
+    assert not client.consumers['HTTP'].http2
+
+
+def test_unknown_consumer_option():
+    with pytest.raises(TypeError, match='limitt'):
+        Http2Client.create('test_system', '127.0.0.1', 1337, consumer_options={'limitt': 10})
+
+
+def test_consume_service():
+    consumer = HttpxConsumer('', '', '')
+    app = web.Application()
+    app.router.add_get('/echo/{id}', echo)
+
+    async def run():
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            rule = OrchestrationRule(
+                Service('echo', 'echo', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+                ArrowheadSystem.make('provider', '127.0.0.1', server.port, ''),
+                'GET',
+            )
+            response = await consumer.consume_service(rule, params={'msg': 'hello'}, rmid=7)
+            await consumer.async_shutdown()
+        return response
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.read_json() == {'msg': 'hello', 'id': '7'}
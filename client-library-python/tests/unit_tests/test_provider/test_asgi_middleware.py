@@ -0,0 +1,48 @@
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from arrowhead_client.provider.implementations.asgi_middleware import ArrowheadAccessPolicyMiddleware
+
+
+class FakeRule:
+    access_policy = None
+
+    def __init__(self, authorized):
+        self.authorized = authorized
+
+    def is_authorized(self, consumer_cert, auth_str):
+        return self.authorized
+
+
+def make_test_client(policy_map):
+    async def stream(request):
+        async def chunks():
+            for chunk in (b'a', b'b', b'c'):
+                yield chunk
+
+        return StreamingResponse(chunks(), media_type='text/plain')
+
+    app = Starlette(routes=[Route('/allowed', stream), Route('/denied', stream), Route('/open', stream)])
+    app.add_middleware(ArrowheadAccessPolicyMiddleware, policy_map=policy_map)
+
+    return TestClient(app)
+
+
+def test_streaming_response_passes_through():
+    test_client = make_test_client({'allowed': FakeRule(True)})
+
+    for path in ('/allowed', '/open'):
+        response = test_client.get(path)
+
+        assert response.status_code == 200
+        assert response.text == 'abc'
+
+
+def test_unauthorized_request_is_rejected():
+    test_client = make_test_client({'denied': FakeRule(False)})
+
+    response = test_client.get('/denied/')
+
+    assert response.status_code == 403
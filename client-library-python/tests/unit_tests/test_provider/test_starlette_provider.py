@@ -0,0 +1,388 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+
+import httpx
+import pytest
+import uvicorn
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from arrowhead_client.client.implementations import AsyncClient
+
+
+@pytest.fixture
+def async_client():
+    client = AsyncClient.create('test_provider', '127.0.0.1', 1337)
+
+    @client.provided_service(
+        service_definition='echo',
+        service_uri='echo',
+        protocol='HTTP',
+        method='POST',
+        payload_format='JSON',
+        access_policy='NOT_SECURE',
+    )
+    async def echo(req):
+        return req.read_json()['msg']
+
+    return client
+
+
+def make_test_client(client):
+    client._initialize_provided_services()
+    return TestClient(client.provider.make_app())
+
+
+def test_provided_service(async_client):
+    test_client = make_test_client(async_client)
+
+    response = test_client.post('/echo', json={'msg': 'hello'})
+
+    assert response.status_code == 200
+    assert response.text == 'hello'
+
+
+def test_add_provided_service_while_running(async_client):
+    test_client = make_test_client(async_client)
+
+    @async_client.provided_service(
+        service_definition='late',
+        service_uri='late/service',
+        protocol='HTTP',
+        method='GET',
+        payload_format='TEXT',
+        access_policy='NOT_SECURE',
+    )
+    async def late(req):
+        return 'late'
+
+    response = test_client.get('/late/service')
+
+    assert response.status_code == 200
+    assert response.text == 'late'
+    assert 'late/service' in async_client.provider.policy_map
+
+
+def test_remove_provided_service_while_running(async_client):
+    test_client = make_test_client(async_client)
+
+    rule = async_client.remove_provided_service('echo')
+
+    assert rule.service_definition == 'echo'
+    assert len(async_client.registration_rules) == 0
+    assert 'echo' not in async_client.provider.policy_map
+    assert test_client.post('/echo', json={'msg': 'hello'}).status_code == 404
+
+
+def test_redefine_provided_service_while_running(async_client):
+    test_client = make_test_client(async_client)
+    routes = len(async_client.provider.routes)
+
+    @async_client.provided_service(
+        service_definition='echo',
+        service_uri='echo',
+        protocol='HTTP',
+        method='POST',
+        payload_format='JSON',
+        access_policy='NOT_SECURE',
+    )
+    async def shout(req):
+        return req.read_json()['msg'].upper()
+
+    assert test_client.post('/echo', json={'msg': 'hello'}).text == 'HELLO'
+    assert len(async_client.provider.routes) == routes
+
+
+def test_remove_unknown_provided_service(async_client):
+    with pytest.raises(KeyError):
+        async_client.remove_provided_service('unknown')
+
+
+def test_query_parameters_and_custom_response(async_client):
+    @async_client.provided_service(
+        service_definition='status',
+        service_uri='status',
+        protocol='HTTP',
+        method='GET',
+        payload_format='JSON',
+        access_policy='NOT_SECURE',
+    )
+    async def status(req):
+        return JSONResponse({'id': req.query['id']}, status_code=202)
+
+    test_client = make_test_client(async_client)
+
+    response = test_client.get('/status', params={'id': 'abc'})
+
+    assert response.status_code == 202
+    assert response.json() == {'id': 'abc'}
+
+
+def test_service_cancelled_on_client_disconnect(async_client):
+    cancelled = asyncio.Event()
+
+    @async_client.provided_service(
+        service_definition='slow',
+        service_uri='slow',
+        protocol='HTTP',
+        method='POST',
+        payload_format='JSON',
+        access_policy='NOT_SECURE',
+    )
+    async def slow(req):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async_client._initialize_provided_services()
+    app = async_client.provider.make_app()
+
+    body_sent = False
+    sent = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'{}', 'more_body': False}
+        await asyncio.sleep(0.01)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': '/slow',
+        'root_path': '',
+        'query_string': b'',
+        'headers': [],
+    }
+
+    async def run():
+        await asyncio.wait_for(app(scope, receive, send), 1)
+
+    asyncio.run(run())
+
+    assert cancelled.is_set()
+    assert sent == []
+
+
+@pytest.fixture
+def dispatch_client():
+    client = AsyncClient.create('test_provider', '127.0.0.1', 1337, provider_options={'dispatch': True})
+
+    for i in range(100):
+        @client.provided_service(
+            service_definition=f'echo-{i}',
+            service_uri=f'echo/{i}',
+            protocol='HTTP',
+            method='POST',
+            payload_format='JSON',
+            access_policy='NOT_SECURE',
+        )
+        async def echo(req, i=i):
+            return f"{i}: {req.read_json()['msg']}"
+
+    return client
+
+
+def test_dispatch_mode(dispatch_client):
+    test_client = make_test_client(dispatch_client)
+
+    assert dispatch_client.provider.dispatch
+    assert len(dispatch_client.provider.routes) == 1
+
+    response = test_client.post('/echo/42/', json={'msg': 'hello'})
+
+    assert response.status_code == 200
+    assert response.text == '42: hello'
+    assert test_client.post('/echo/100', json={'msg': 'hello'}).status_code == 404
+
+    response = test_client.get('/echo/42')
+
+    assert response.status_code == 405
+    assert response.headers['allow'] == 'POST'
+
+
+def test_dispatch_mode_remove_while_running(dispatch_client):
+    test_client = make_test_client(dispatch_client)
+
+    dispatch_client.remove_provided_service('echo-7')
+
+    assert test_client.post('/echo/7', json={'msg': 'hello'}).status_code == 404
+    assert 'echo/7' not in dispatch_client.provider.policy_map
+    assert test_client.post('/echo/8', json={'msg': 'hello'}).status_code == 200
+
+
+def test_server_options(monkeypatch):
+    client = AsyncClient.create(
+        'test_provider', '127.0.0.1', 1337,
+        provider_options={'loop': 'asyncio', 'http': 'h11', 'keep_alive_timeout': 30, 'limit_concurrency': 100},
+    )
+    configs = []
+    monkeypatch.setattr(uvicorn.Server, 'run', lambda self, sockets=None: configs.append(self.config))
+
+    client.provider.run_forever('127.0.0.1', 1337, '', '')
+
+    config, = configs
+    assert config.loop == 'asyncio'
+    assert config.http == 'h11'
+    assert config.timeout_keep_alive == 30
+    assert config.limit_concurrency == 100
+    assert config.backlog == 2048
+    assert config.port == 1337
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, 'SO_REUSEPORT') or 'fork' not in multiprocessing.get_all_start_methods(),
+    reason='Multiple workers require fork() and SO_REUSEPORT',
+)
+def test_multiple_workers(async_client, tmp_path):
+    log = tmp_path / 'routines.log'
+
+    def record(event):
+        def routine():
+            with open(log, 'a') as f:
+                f.write(f'{event} {os.getpid()}\n')
+        return routine
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async_client._initialize_provided_services()
+    provider = async_client.provider
+    provider.add_startup_routine(record('startup-once'), once=True)
+    provider.add_shutdown_routine(record('shutdown-once'), once=True)
+    provider.add_startup_routine(record('startup'))
+    provider.add_shutdown_routine(record('shutdown'))
+
+    supervisor = multiprocessing.get_context('fork').Process(
+        target=provider.run_forever,
+        args=('127.0.0.1', port, '', ''),
+        kwargs={'workers': 2},
+    )
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 10
+        while log.read_text().count('startup ') < 2 if log.exists() else True:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        response = httpx.post(f'http://127.0.0.1:{port}/echo', json={'msg': 'hello'})
+        assert response.status_code == 200
+    finally:
+        supervisor.terminate()
+        supervisor.join(10)
+
+    events = [line.split() for line in log.read_text().splitlines()]
+    worker_pids = {pid for event, pid in events if event == 'startup'}
+
+    assert supervisor.exitcode == 0
+    assert [event for event, _ in events].count('startup-once') == 1
+    assert [event for event, _ in events].count('shutdown-once') == 1
+    assert events[0][0] == 'startup-once' and events[-1][0] == 'shutdown-once'
+    assert len(worker_pids) == 2
+    assert {pid for event, pid in events if event == 'shutdown'} == worker_pids
+    assert response.text == 'hello'
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, 'SO_REUSEPORT') or 'fork' not in multiprocessing.get_all_start_methods(),
+    reason='Multiple workers require fork() and SO_REUSEPORT',
+)
+@pytest.mark.parametrize('workers', [1, 2])
+def test_drain_before_shutdown(async_client, tmp_path, workers):
+    log = tmp_path / 'routines.log'
+
+    def record(event):
+        def routine():
+            with open(log, 'a') as f:
+                f.write(f'{event}\n')
+        return routine
+
+    async def slow_drain():
+        record('drain-once')()
+        await asyncio.sleep(1)
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async_client._initialize_provided_services()
+    provider = async_client.provider
+    provider.add_startup_routine(record('startup'))
+    provider.add_drain_routine(slow_drain, once=True)
+    provider.add_drain_routine(record('drain'))
+    provider.add_shutdown_routine(record('shutdown'))
+
+    server = multiprocessing.get_context('fork').Process(
+        target=provider.run_forever,
+        args=('127.0.0.1', port, '', ''),
+        kwargs={'workers': workers},
+    )
+    server.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not log.exists() or log.read_text().count('startup') < workers:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        server.terminate()
+        while 'drain-once' not in log.read_text():
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        # Still served while draining
+        response = httpx.post(f'http://127.0.0.1:{port}/echo', json={'msg': 'hello'})
+        assert response.status_code == 200
+    finally:
+        server.join(10)
+        if server.is_alive():
+            server.kill()
+
+    events = log.read_text().split()
+
+    assert server.exitcode == 0
+    assert events.count('drain-once') == 1
+    assert events.count('drain') == workers
+    assert events.count('shutdown') == workers
+    assert events.index('drain-once') < events.index('drain') < events.index('shutdown')
+
+
+def test_once_shutdown_routines_run_before_per_process_ones(async_client):
+    calls = []
+    provider = async_client.provider
+    provider.add_shutdown_routine(lambda: calls.append('per process'))
+    provider.add_shutdown_routine(lambda: calls.append('once'), once=True)
+
+    with make_test_client(async_client):
+        pass
+
+    assert calls == ['once', 'per process']
+
+
+def test_client_cleanup_uses_open_consumers(async_client, monkeypatch):
+    calls = []
+
+    def record(name):
+        async def routine():
+            calls.append(name)
+        return routine
+
+    for consumer in async_client.consumers.values():
+        monkeypatch.setattr(consumer, 'async_startup', record('startup'))
+        monkeypatch.setattr(consumer, 'async_shutdown', record('shutdown'))
+
+    with make_test_client(async_client):
+        calls.clear()
+
+    # The cleanup doesn't set the consumers up again, they are closed once after it
+    assert calls == ['shutdown'] * len(async_client.consumers)
@@ -0,0 +1,157 @@
+# ---------------------------------------------------------------------------- #
+#                                 MICRO-BATCHING                               #
+# ---------------------------------------------------------------------------- #
+#! Requests of a batched service are collected for a short time window (or up
+#! to a maximal batch size), the notebook is executed once with the list of the
+#! inputs and the list of the outputs is fanned out to the waiting requests.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+
+from dataclasses import dataclass
+from loguru import logger
+from typing import Awaitable, Callable, List, Set, Tuple
+
+from limits import OverloadedError
+
+# --------------------------------- CONSTANTS -------------------------------- #
+BATCH_KEY = "batch"
+
+# ---------------------------------------------------------------------------- #
+#                                  DATACLASSES                                 #
+# ---------------------------------------------------------------------------- #
+
+@dataclass
+class BatchSettings:
+    """
+    Dataclass to store batching settings of a notebook service
+    ...
+
+    Attributes
+    ----------
+    maxSize: int
+        maximal number of inputs in a batch
+    window: float
+        maximal time (in seconds) the first request of a batch waits for others
+    """
+    maxSize: int = 16
+    window: float = 0.01
+
+def batchSettings(options: dict, sname: str) -> BatchSettings:
+    """
+    This function returns the batching settings from the options of the
+    notebook ('batch': true or an object, keys: 'max-size' and 'window')
+
+    Args:
+        options (dict): options of the notebook
+        sname (str): service name (for the error message)
+
+    Raises:
+        ValueError: 'batch' is neither a boolean nor an object
+
+    Returns:
+        BatchSettings: batching settings, None if batching isn't enabled
+    """
+
+    batch = options.get(BATCH_KEY)
+
+    if not batch:
+        return None
+    if batch is True:
+        return BatchSettings()
+    if not isinstance(batch, dict):
+        raise ValueError("Service '{}': '{}' must be true or an object, not: {!r}".format(sname, BATCH_KEY, batch))
+
+    defaults = BatchSettings()
+    return BatchSettings(
+        maxSize=max(int(batch.get("max-size", defaults.maxSize)), 1),
+        window=max(float(batch.get("window", defaults.window)), 0.0)
+    )
+
+# ---------------------------------------------------------------------------- #
+#                                    BATCHER                                   #
+# ---------------------------------------------------------------------------- #
+
+class Batcher:
+    """
+    Collects the inputs of concurrent requests and executes them as one batch.
+    Must be used from one event loop.
+    ...
+
+    Attributes
+    ----------
+    settings: BatchSettings
+        batching settings
+    sname: str
+        service name (for logging)
+    """
+
+    def __init__(self, execute: Callable[[List[any]], Awaitable[List[any]]], settings: BatchSettings, sname: str):
+        self.settings = settings
+        self.sname = sname
+        self._execute = execute
+        self._pending: List[Tuple[any, asyncio.Future]] = list()
+        self._timer: asyncio.TimerHandle = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, data: any) -> any:
+        """
+        This function adds the input to the next batch and waits for its output
+
+        Args:
+            data (any): input data
+
+        Raises:
+            ChildProcessError: the batch cannot be executed
+            TimeoutError: the execution of the batch has exceeded its deadline
+            OverloadedError: the batch has been rejected by the admission control
+
+        Returns:
+            any: output belonging to the input
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((data, future))
+
+        if len(self._pending) >= self.settings.maxSize:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.settings.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # ! cancelled requests (e.g. disconnected clients) are left out
+        batch = [(data, future) for data, future in self._pending if not future.done()]
+        self._pending = list()
+
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[any, asyncio.Future]]) -> None:
+        logger.debug("{}: Executing batch of {} inputs!", self.sname, len(batch))
+
+        try:
+            outputs = await self._execute([data for data, _ in batch])
+
+            if not isinstance(outputs, (list, tuple)) or len(outputs) != len(batch):
+                logger.error("{}: Batched notebook must return a list of {} outputs!", self.sname, len(batch))
+                raise ChildProcessError
+        except Exception as e:
+            # ! a rejected batch is reported as such, e.g. with 429 and Retry-After
+            error = e if isinstance(e, OverloadedError) else TimeoutError() if isinstance(e, TimeoutError) else ChildProcessError()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
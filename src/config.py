@@ -7,7 +7,7 @@ import argparse
 import sys
 import yaml
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dataclass_wizard import JSONListWizard
 from dataclass_wizard.enums import LetterCase
 from loguru import logger
@@ -102,11 +102,227 @@ class AutoSetup:
         flag for automatic authorization rules registration (and cleanup) with !SYSOP! client
     consumers: List[int]
         list of consumer ID that will be presented in authorization rules
+    concurrency: int
+        maximal number of concurrent registration (and cleanup) requests
+    reconcile: bool
+        keep the registrations at shutdown and only register (or remove) the difference at startup
+    journal: str
+        path of the journal of the registered ID-s, used to clean up after a crash (empty: disabled)
     """
     sysReg: bool
     serviceReg: bool
     authRules: bool
     consumers: List[int]
+    concurrency: int = 16
+    reconcile: bool = False
+    journal: str = ""
+
+@dataclass
+class Kernels:
+    """
+    Dataclass to store kernel pool settings (jpnb engine).
+    ...
+
+    Attributes
+    ----------
+    kernelName: str
+        name of the Jupyter kernel to be started
+    minSize: int
+        number of kernels that are kept warm
+    maxSize: int
+        maximal number of kernels (concurrent executions)
+    maxExecutions: int
+        number of executions after a kernel is replaced (0: never)
+    inMemory: bool
+        if set the input is passed in memory and the notebook isn't written back
+    """
+    kernelName: str = "python3"
+    minSize: int = 1
+    maxSize: int = 4
+    maxExecutions: int = 100
+    inMemory: bool = False
+
+@dataclass
+class Execution:
+    """
+    Dataclass to store notebook execution settings.
+    ...
+
+    Attributes
+    ----------
+    engine: str
+        engine of the notebooks: 'pynb' (as python script) or 'jpnb' (in a Jupyter kernel)
+    executor: str
+        executor of the notebooks: 'inline' (in the event loop), 'thread' or 'process' (pool)
+    workers: int
+        number of workers in the pool (0: number of CPU cores)
+    maxTasksPerWorker: int
+        number of executions after a worker process is replaced (0: never)
+    timeout: float
+        default deadline of the executions in seconds (0: none)
+    startMethod: str
+        start method of the worker processes: 'spawn' or 'forkserver' (forked from a warm template)
+    preload: List[str]
+        modules imported by the worker template ('forkserver' only)
+    kernels: Kernels
+        kernel pool settings (per process) of the jpnb engine
+    """
+    engine: str = "pynb"
+    executor: str = "inline"
+    workers: int = 0
+    maxTasksPerWorker: int = 0
+    timeout: float = 0
+    startMethod: str = "spawn"
+    preload: List[str] = field(default_factory=list)
+    kernels: Kernels = field(default_factory=Kernels)
+
+@dataclass
+class Jobs:
+    """
+    Dataclass to store job store settings (notebooks in job mode).
+    ...
+
+    Attributes
+    ----------
+    maxJobs: int
+        maximal number of jobs kept in memory (pending and finished)
+    ttl: float
+        time (in seconds) a finished job is kept
+    maxWait: float
+        maximal waiting time (in seconds) of a long-polling status request
+    """
+    maxJobs: int = 1000
+    ttl: float = 600.0
+    maxWait: float = 30.0
+
+@dataclass
+class ResultCacheSettings:
+    """
+    Dataclass to store result cache settings (notebooks with caching enabled).
+    ...
+
+    Attributes
+    ----------
+    maxEntries: int
+        maximal number of cached outputs
+    maxBytes: int
+        maximal total size of the cached outputs (in bytes)
+    ttl: float
+        default expiration of the cached outputs (in seconds)
+    """
+    maxEntries: int = 1024
+    maxBytes: int = 64 * 1024 * 1024
+    ttl: float = 300.0
+
+@dataclass
+class Limits:
+    """
+    Dataclass to store admission control settings.
+    ...
+
+    Attributes
+    ----------
+    maxConcurrent: int
+        maximal number of concurrent executions of the adapter (0: unlimited)
+    maxQueue: int
+        maximal number of requests waiting for a global slot
+    serviceMaxConcurrent: int
+        default maximal number of concurrent executions of a service (0: unlimited)
+    serviceMaxQueue: int
+        default maximal number of requests waiting for a slot of a service
+    retryAfter: int
+        value of the Retry-After header of rejected requests (in seconds)
+    """
+    maxConcurrent: int = 0
+    maxQueue: int = 100
+    serviceMaxConcurrent: int = 0
+    serviceMaxQueue: int = 100
+    retryAfter: int = 1
+
+@dataclass
+class Server:
+    """
+    Dataclass to store web server settings of the provider.
+    ...
+
+    Attributes
+    ----------
+    dispatch: bool
+        serve the notebooks by one catch-all endpoint with a dict lookup instead of one route per notebook
+    workers: int
+        number of web server processes sharing the provider port
+    loop: str
+        event loop implementation: 'auto' (uvloop if installed), 'asyncio' or 'uvloop'
+    http: str
+        HTTP parser: 'auto' (httptools if installed), 'h11' or 'httptools'
+    keepAliveTimeout: int
+        time (in seconds) an idle keep-alive connection is kept open
+    backlog: int
+        maximal number of connections waiting to be accepted
+    limitConcurrency: int
+        maximal number of concurrent connections, further requests are answered with 503 (0: unlimited)
+    h11MaxIncompleteEventSize: int
+        maximal size (in bytes) of an incomplete request head with the h11 parser (0: h11 default)
+    drainDelay: float
+        time (in seconds) requests are still accepted at shutdown after the services are unregistered
+    drainTimeout: float
+        maximal waiting time (in seconds) for the running requests and jobs at shutdown
+    """
+    dispatch: bool = False
+    workers: int = 1
+    loop: str = "auto"
+    http: str = "auto"
+    keepAliveTimeout: int = 5
+    backlog: int = 2048
+    limitConcurrency: int = 0
+    h11MaxIncompleteEventSize: int = 0
+    drainDelay: float = 1.0
+    drainTimeout: float = 30.0
+
+@dataclass
+class Consumer:
+    """
+    Dataclass to store connection pool settings of the clients calling the
+    local cloud (core systems and management endpoints).
+    ...
+
+    Attributes
+    ----------
+    limit: int
+        maximal number of open connections (0: unlimited)
+    limitPerHost: int
+        maximal number of open connections to the same endpoint (0: unlimited)
+    keepAliveTimeout: float
+        time (in seconds) an idle connection is kept open for reuse
+    dnsCacheTtl: int
+        time (in seconds) resolved addresses are cached for (0: forever)
+    forceClose: bool
+        close every connection after its request instead of reusing it
+    http2: bool
+        consume HTTP services over HTTP/2 (httpx), one multiplexed connection per system
+    """
+    limit: int = 100
+    limitPerHost: int = 0
+    keepAliveTimeout: float = 15.0
+    dnsCacheTtl: int = 10
+    forceClose: bool = False
+    http2: bool = False
+
+@dataclass
+class Watch:
+    """
+    Dataclass to store hot reload settings of the notebook folder.
+    ...
+
+    Attributes
+    ----------
+    enabled: bool
+        if set added, changed and removed notebooks are applied without restart
+    interval: float
+        polling interval of the notebook folder (in seconds)
+    """
+    enabled: bool = False
+    interval: float = 2.0
 
 @dataclass
 class Config(JSONListWizard):
@@ -128,6 +344,20 @@ class Config(JSONListWizard):
         path for certificates
     nbpath: str
         path for ipython notebook
+    execution: Execution
+        notebook execution settings
+    watch: Watch
+        hot reload settings of the notebook folder
+    jobs: Jobs
+        job store settings
+    resultCache: ResultCacheSettings
+        result cache settings
+    limits: Limits
+        admission control settings
+    server: Server
+        web server settings
+    consumer: Consumer
+        connection pool settings of the clients
     """
     class ConfigMeta(JSONListWizard.Meta):
         """
@@ -141,6 +371,13 @@ class Config(JSONListWizard):
     autoSetup: AutoSetup
     certpath: str
     nbpath: str
+    execution: Execution = field(default_factory=Execution)
+    watch: Watch = field(default_factory=Watch)
+    jobs: Jobs = field(default_factory=Jobs)
+    resultCache: ResultCacheSettings = field(default_factory=ResultCacheSettings)
+    limits: Limits = field(default_factory=Limits)
+    server: Server = field(default_factory=Server)
+    consumer: Consumer = field(default_factory=Consumer)
 
 # ---------------------------------------------------------------------------- #
 #                                   FUNCTIONS                                  #
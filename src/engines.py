@@ -0,0 +1,437 @@
+# ---------------------------------------------------------------------------- #
+#                               NOTEBOOK ENGINES                               #
+# ---------------------------------------------------------------------------- #
+#! The functions of this module might be executed in worker processes, thus
+#! they have to be importable and picklable (i.e. top level functions only).
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import builtins
+import copy
+import json
+import nbformat
+import os
+import threading
+
+from functools import partial
+from loguru import logger
+from pathlib import Path
+from types import CodeType
+from typing import Callable, Dict, List
+
+from config import Execution, Kernels
+from kernelpool import KernelPool
+from nbcache import CacheEntry, NotebookCache
+
+# --------------------------------- CONSTANTS -------------------------------- #
+PYNB = "pynb"
+JPNB = "jpnb"
+
+JSON_INPUT = "json"
+OBJECT_INPUT = "object"
+RAW_INPUT = "raw"
+INPUT_MODES = (JSON_INPUT, OBJECT_INPUT, RAW_INPUT)
+
+# ! builtin containers of the setup namespace, copied (shallow) for every request
+COPIED_CONTAINERS = (list, dict, set, bytearray)
+
+# ------------------------------ GLOBAL VARIABLE ----------------------------- #
+_nb_cache = NotebookCache()
+_kernel_pool: KernelPool = None
+_kernel_pool_pid: int = None
+_kernel_pool_lock = threading.Lock()
+_setup_lock = threading.Lock()
+
+# ---------------------------------------------------------------------------- #
+#                                  KERNEL POOL                                 #
+# ---------------------------------------------------------------------------- #
+
+def getKernelPool(settings: Kernels = None) -> KernelPool:
+    """
+    This function returns the kernel pool of the current process, the pool is
+    created and started at the first call
+
+    Args:
+        settings (Kernels, optional): pool settings, defaults are used if omitted
+
+    Returns:
+        KernelPool: kernel pool of the jpnb engine
+    """
+
+    global _kernel_pool, _kernel_pool_pid
+
+    with _kernel_pool_lock:
+        # ! a pool inherited from another process (fork) can't be used
+        if _kernel_pool is None or _kernel_pool_pid != os.getpid():
+            _kernel_pool = KernelPool(settings or Kernels())
+            _kernel_pool.start()
+            _kernel_pool_pid = os.getpid()
+
+    return _kernel_pool
+
+def shutdownKernelPool() -> None:
+    """
+    This function stops the kernel pool of the current process (if there is one)
+    """
+
+    global _kernel_pool
+
+    with _kernel_pool_lock:
+        if _kernel_pool is not None and _kernel_pool_pid == os.getpid():
+            _kernel_pool.shutdown()
+        _kernel_pool = None
+
+# ---------------------------------------------------------------------------- #
+#                                NOTEBOOK CACHE                                #
+# ---------------------------------------------------------------------------- #
+
+def compileNotebook(nbRoot: str, path: str) -> CacheEntry:
+    """
+    This function converts and compiles the notebook into the cache of the
+    current process (if it isn't cached yet or it has been changed). Running
+    executions keep the previous version, the next ones get the new one.
+
+    Args:
+        nbRoot (str): root path for notebooks
+        path (str): path for the actual notebook
+
+    Returns:
+        CacheEntry: converted and compiled notebook
+    """
+
+    return _nb_cache.get(Path(nbRoot, path + ".ipynb"))
+
+def cacheStats() -> Dict[str, int]:
+    """
+    This function returns the counters of the notebook cache of the current
+    process
+
+    Returns:
+        Dict[str, int]: number of entries, hits and misses
+    """
+
+    return _nb_cache.stats()
+
+def forgetNotebook(nbRoot: str, path: str) -> None:
+    """
+    This function drops the notebook from the cache of the current process
+
+    Args:
+        nbRoot (str): root path for notebooks
+        path (str): path for the actual notebook
+    """
+
+    _nb_cache.invalidate(Path(nbRoot, path + ".ipynb"))
+
+# ---------------------------------------------------------------------------- #
+#                                    ENGINES                                   #
+# ---------------------------------------------------------------------------- #
+
+def _setupNamespace(entry: CacheEntry, sname: str) -> dict:
+    """
+    This function returns the namespace created by the setup cells of the
+    notebook, the setup cells are executed only once (per worker and version).
+    The objects of the namespace are shared by every request, also by the
+    concurrent ones of a thread executor: use _requestNamespace() to get a
+    namespace for a request.
+
+    Args:
+        entry (CacheEntry): compiled notebook with setup cells
+        sname (str): service name
+
+    Returns:
+        dict: namespace of the setup cells (must not be modified)
+    """
+
+    if entry.namespace is None:
+        with _setup_lock:
+            if entry.namespace is None:
+                namespace = _mainNamespace()
+                _execCells(entry.setup, namespace)
+                entry.namespace = namespace
+                logger.debug("Setup cells of '{}' have been executed!", sname)
+
+    return entry.namespace
+
+def _requestNamespace(entry: CacheEntry, sname: str) -> dict:
+    """
+    This function returns a copy of the setup namespace for a request. The
+    builtin containers (list, dict, set, bytearray) are copied as well, thus a
+    request appending to a setup list doesn't affect the others. Other objects
+    (e.g. arrays, data frames, models) are still shared and must not be
+    modified by the handler cells.
+
+    Args:
+        entry (CacheEntry): compiled notebook with setup cells
+        sname (str): service name
+
+    Returns:
+        dict: namespace of the request
+    """
+
+    return {
+        name: copy.copy(value) if isinstance(value, COPIED_CONTAINERS) and not name.startswith("__") else value
+        for name, value in _setupNamespace(entry, sname).items()
+    }
+
+def _mainNamespace() -> dict:
+    """
+    This function returns an empty namespace for the cells, as if the notebook
+    was run as a script ('__name__' is '__main__', only the builtins are defined)
+
+    Returns:
+        dict: fresh global namespace
+    """
+
+    return {"__name__": "__main__", "__builtins__": builtins}
+
+def _execCells(cells: List[CodeType], namespace: dict) -> None:
+    """
+    This function executes the compiled code cells in order, in the same namespace
+
+    Args:
+        cells (List[CodeType]): compiled code cells
+        namespace (dict): global namespace
+    """
+
+    for code in cells:
+        exec(code, namespace)
+
+def _dataInput(data: any, inputMode: str) -> any:
+    """
+    This function returns the value of 'data_input' for the notebook
+
+    Args:
+        data (any): input data (parsed object, or the request body in raw mode)
+        inputMode (str): 'json' (JSON string), 'object' (parsed object) or 'raw' (bytes)
+
+    Returns:
+        any: value of 'data_input'
+    """
+
+    if inputMode == JSON_INPUT:
+        return json.dumps(data)
+    return data
+
+def pynb_execute(nbRoot: str, path: str, data: any, sname: str, inputMode: str = JSON_INPUT, timeout: float = 0) -> any:
+    """
+    This function executes a jupyter notebook as regular python file
+
+    Args:
+        nbRoot (str): root path for notebooks
+        path (str): path for the actual notebook
+        data (any): input data
+        sname (str): service name
+        inputMode (str, optional): type of 'data_input' (json, object or raw)
+        timeout (float, optional): deadline of the execution, enforced by the executor (not by this engine)
+
+    Raises:
+        ChildProcessError: Any error during execution
+
+    Returns:
+        any: output of the notebook
+    """
+
+    # ----------------------------- CONVERT NOTEBOOK ----------------------------- #
+    nbPath = Path(nbRoot, path + ".ipynb")
+
+    try:
+        # ------------------------------- CREATE SCRIPT ------------------------------ #
+        entry = _nb_cache.get(nbPath)
+
+        if entry.setup is None:
+            script_local = _mainNamespace()
+            script_local["data_input"] = _dataInput(data, inputMode)
+            _execCells(entry.code, script_local)
+            return script_local["output"]
+            # ! 'output' must be declared
+
+        # ------------------------------- SETUP CELLS ------------------------------ #
+        script_local = _requestNamespace(entry, sname)
+        script_local["data_input"] = _dataInput(data, inputMode)
+        _execCells(entry.handler, script_local)
+        return script_local["output"]
+
+    except Exception as e:
+        logger.exception("Cannot execute notebbok: {}, due to: {}", sname, e)
+        raise ChildProcessError
+
+def jpnb_execute(nbRoot: str, path: str, data: any, sname: str, inputMode: str = JSON_INPUT, timeout: float = 0, kernels: Kernels = None, writeBack: bool = True) -> any:
+    """
+    This function executes a jupyter notebook as ipynb on a warm kernel of the
+    kernel pool
+
+    Args:
+        nbRoot (str): root path for notebooks
+        path (str): path for the actual notebook
+        data (any): input data
+        sname (str): service name
+        inputMode (str, optional): type of 'data_input' (json, object or raw)
+        timeout (float, optional): deadline of the execution (in seconds, 0: none), a
+            hung kernel is recycled
+        kernels (Kernels, optional): kernel pool settings
+        writeBack (bool, optional): write the executed notebook (with its outputs) back to the disk
+
+    Raises:
+        ChildProcessError: Any error during execution
+        TimeoutError: the deadline has expired
+
+    Returns:
+        any: output of the notebook
+    """
+
+    # ----------------------------- CREATE INPUTFILE ----------------------------- #
+    if inputMode == RAW_INPUT:
+        with open(Path(nbRoot, path + "-inputdata.json"),'wb') as f:
+            f.write(data)
+    else:
+        with open(Path(nbRoot, path + "-inputdata.json"),'w') as f:
+            f.write(''.join(json.dumps(data)))
+
+    nbPath = Path(nbRoot, path + ".ipynb")
+
+    try:
+        pool = getKernelPool(kernels)
+        kernel = pool.acquire()
+    except Exception as e:
+        logger.exception("Cannot get a kernel for notebook: {}, due to: {}", sname, e)
+        raise ChildProcessError
+
+    failed = False
+
+    try:
+        nb = nbformat.read(nbPath, as_version=4)
+        results = kernel.run(nb, Path(nbRoot, path).parent.absolute(), timeout=timeout)
+
+        for cell, outputs in zip([cell for cell in nb.cells if cell.cell_type == "code"], results):
+            cell.outputs = outputs
+
+        if writeBack:
+            nbformat.write(nb, nbPath)
+    except TimeoutError:
+        failed = True
+        logger.warning("Execution of notebook: {} has exceeded its deadline ({} s), recycling its kernel!", sname, timeout)
+        raise
+    except Exception as e:
+        failed = True
+        logger.exception("Cannot execute notebbok: {}, due to: {}", sname, e)
+        raise ChildProcessError
+    finally:
+        pool.release(kernel, failed)
+
+    # ----------------------------- REMOVE INPUTFILE ----------------------------- #
+    try:
+        os.remove(Path(nbRoot, path + "-inputdata.json"))
+    except OSError as e:
+        logger.exception("Cannot remove input file for '{}', due to {}", sname, e)
+
+    return nb.cells[-1]["outputs"][-1]["text"]
+
+def jpnb_execute_inmemory(nbRoot: str, path: str, data: any, sname: str, inputMode: str = JSON_INPUT, timeout: float = 0, kernels: Kernels = None) -> any:
+    """
+    This function executes a jupyter notebook as ipynb on a warm kernel of the
+    kernel pool without any file I/O. The input is injected into the kernel as
+    'data_input' (like in the pynb engine) and the notebook on the disk isn't
+    modified, thus concurrent executions of a notebook are safe.
+
+    Args:
+        nbRoot (str): root path for notebooks
+        path (str): path for the actual notebook
+        data (any): input data
+        sname (str): service name
+        inputMode (str, optional): type of 'data_input' (json, object or raw)
+        timeout (float, optional): deadline of the execution (in seconds, 0: none), a
+            hung kernel is recycled
+        kernels (Kernels, optional): kernel pool settings
+
+    Raises:
+        ChildProcessError: Any error during execution
+        TimeoutError: the deadline has expired
+
+    Returns:
+        any: 'output' variable of the notebook (as string), or the last output
+        of the last cell if 'output' isn't declared
+    """
+
+    nbPath = Path(nbRoot, path + ".ipynb")
+
+    try:
+        pool = getKernelPool(kernels)
+        kernel = pool.acquire()
+    except Exception as e:
+        logger.exception("Cannot get a kernel for notebook: {}, due to: {}", sname, e)
+        raise ChildProcessError
+
+    failed = False
+
+    try:
+        # ! only parsed: the kernel runs magics and shell commands the pynb compiler rejects
+        results = kernel.run(
+            _nb_cache.getNotebook(nbPath),
+            Path(nbRoot, path).parent.absolute(),
+            preamble=_preamble(data, inputMode),
+            timeout=timeout
+        )
+
+        try:
+            return kernel.evaluate("output")
+        except NameError:
+            return results[-1][-1]["text"]
+
+    except TimeoutError:
+        failed = True
+        logger.warning("Execution of notebook: {} has exceeded its deadline ({} s), recycling its kernel!", sname, timeout)
+        raise
+    except Exception as e:
+        failed = True
+        logger.exception("Cannot execute notebbok: {}, due to: {}", sname, e)
+        raise ChildProcessError
+    finally:
+        pool.release(kernel, failed)
+
+def _preamble(data: any, inputMode: str) -> str:
+    """
+    This function returns the code that declares 'data_input' in the kernel
+
+    Args:
+        data (any): input data (parsed object, or the request body in raw mode)
+        inputMode (str): 'json' (JSON string), 'object' (parsed object) or 'raw' (bytes)
+
+    Returns:
+        str: code to be executed before the cells
+    """
+
+    if inputMode == RAW_INPUT:
+        return "data_input = {!r}".format(data)
+    if inputMode == OBJECT_INPUT:
+        return "data_input = __import__('json').loads({!r})".format(json.dumps(data))
+    return "data_input = {!r}".format(json.dumps(data))
+
+# ---------------------------------------------------------------------------- #
+#                                    FACTORY                                   #
+# ---------------------------------------------------------------------------- #
+
+def makeEngine(c: Execution, writeBack: bool = True) -> Callable:
+    """
+    This function returns the engine defined in the config
+
+    Args:
+        c (Execution): execution settings
+        writeBack (bool, optional): the jpnb engine writes the executed notebooks back to the disk
+            (file mode only, unset if the notebooks are watched: every write would be a change)
+
+    Raises:
+        ValueError: unknown engine
+
+    Returns:
+        Callable: engine function with (nbRoot, path, data, sname, inputMode, timeout) arguments
+    """
+
+    if c.engine == PYNB:
+        return pynb_execute
+    if c.engine == JPNB:
+        # ! partial of a top level function is still picklable
+        if c.kernels.inMemory:
+            return partial(jpnb_execute_inmemory, kernels=c.kernels)
+        return partial(jpnb_execute, kernels=c.kernels, writeBack=writeBack)
+
+    raise ValueError("Unknown engine: '{}'".format(c.engine))
@@ -0,0 +1,425 @@
+# ---------------------------------------------------------------------------- #
+#                                   EXECUTORS                                  #
+# ---------------------------------------------------------------------------- #
+#! Executors decouple notebook execution from the event loop of the provider.
+#! Every executor exposes the same coroutine based interface, so the engine
+#! (pynb/jpnb) and the executor can be chosen independently in the config.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import multiprocessing
+import os
+import signal
+
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from loguru import logger
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from typing import Callable, List, Set
+
+from config import Execution
+from preload import PRELOAD_ENV, settings
+
+# --------------------------------- CONSTANTS -------------------------------- #
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+SPAWN = "spawn"
+FORKSERVER = "forkserver"
+START_METHODS = (SPAWN, FORKSERVER)
+
+# ---------------------------------------------------------------------------- #
+#                                   EXECUTORS                                  #
+# ---------------------------------------------------------------------------- #
+
+class BaseExecutor(ABC):
+    """
+    Abstract base class for notebook executors
+    ...
+
+    Attributes
+    ----------
+    timeout: float
+        default deadline of the executions (in seconds, 0: none)
+    """
+
+    timeout: float = 0
+
+    @abstractmethod
+    async def submit(self, fn: Callable, *args, timeout: float = None) -> any:
+        """
+        This function executes fn with the given arguments and returns its result
+
+        Args:
+            fn (Callable): function to be executed (must be picklable for process executors)
+            *args: arguments of the function
+            timeout (float, optional): deadline of the execution (in seconds), the
+                default deadline is used if omitted
+
+        Raises:
+            TimeoutError: the deadline has expired
+
+        Returns:
+            any: return value of fn
+        """
+
+    def _deadline(self, timeout: float) -> float:
+        return timeout or self.timeout or None
+
+    def shutdown(self) -> None:
+        """
+        This function releases the resources of the executor
+        """
+
+class InlineExecutor(BaseExecutor):
+    """
+    Executes the notebooks in the event loop (blocking). Only recommended for
+    debugging purposes, deadlines aren't supported.
+    """
+
+    async def submit(self, fn: Callable, *args, timeout: float = None) -> any:
+        return fn(*args)
+
+class PoolExecutor(BaseExecutor, ABC):
+    """
+    Base class for executors that are backed by a concurrent.futures pool. The
+    pool is created lazily (in the process that uses it first).
+    ...
+
+    Attributes
+    ----------
+    workers: int
+        number of workers in the pool
+    """
+
+    def __init__(self, workers: int, timeout: float = 0):
+        self.workers = workers or os.cpu_count()
+        self.timeout = timeout
+        self._pool: Executor = None
+        self._pid: int = None
+
+    @abstractmethod
+    def _createPool(self) -> Executor:
+        """
+        This function creates the underlying pool
+
+        Returns:
+            Executor: pool to be used
+        """
+
+    def _getPool(self) -> Executor:
+        # ! a pool inherited from another process (fork) can't be used
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = self._createPool()
+            self._pid = os.getpid()
+        return self._pool
+
+    async def submit(self, fn: Callable, *args, timeout: float = None) -> any:
+        future = asyncio.get_running_loop().run_in_executor(self._getPool(), fn, *args)
+        timeout = self._deadline(timeout)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except TimeoutError:
+            # ! a running thread can't be stopped, only its result is dropped
+            logger.warning("Execution has exceeded its deadline ({} s), it can't be stopped!", timeout)
+            raise
+
+    def shutdown(self) -> None:
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+class ThreadExecutor(PoolExecutor):
+    """
+    Executes the notebooks in a thread pool. Suitable for the jpnb engine, where
+    the notebook itself runs in a separate kernel process.
+
+    A running thread can't be stopped: an execution over its deadline fails the
+    request, but the thread keeps running until the notebook finishes.
+    """
+
+    def __init__(self, workers: int, timeout: float = 0):
+        super().__init__(workers, timeout)
+        if timeout:
+            logger.warning("Thread executor can't stop executions over their deadline ({} s), only their requests fail! Use the process executor to stop them.", timeout)
+
+    def _createPool(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nb-worker")
+
+# ---------------------------------------------------------------------------- #
+#                                PROCESS WORKERS                               #
+# ---------------------------------------------------------------------------- #
+
+class WorkerDiedError(Exception):
+    """
+    The worker process has died (or its pipe has been broken)
+    """
+
+def _workerMain(conn: Connection) -> None:
+    """
+    This function is the main loop of a worker process: it executes the
+    received (fn, args) tasks one by one and sends back their results
+
+    Args:
+        conn (Connection): pipe to the parent process
+    """
+
+    # ! interrupts (Ctrl+C) are handled by the parent, it stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        if task is None:
+            return
+
+        fn, args = task
+
+        try:
+            result = (True, fn(*args))
+        except BaseException as e:
+            result = (False, e)
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            # ! e.g. the result can't be pickled
+            conn.send((False, ChildProcessError("Cannot send result: {}".format(e))))
+
+class Worker:
+    """
+    A worker process executing one task at a time
+    ...
+
+    Attributes
+    ----------
+    process: BaseProcess
+        the worker process
+    conn: Connection
+        pipe to the worker process
+    tasks: int
+        number of executed tasks
+    """
+
+    def __init__(self, ctx: BaseContext):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_workerMain, args=(child,), name="nb-worker", daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = 0
+
+    async def run(self, fn: Callable, args: tuple, timeout: float = None) -> any:
+        """
+        This function executes the task in the worker process
+
+        Args:
+            fn (Callable): function to be executed (picklable)
+            args (tuple): arguments of the function
+            timeout (float, optional): deadline of the execution (in seconds)
+
+        Raises:
+            TimeoutError: the deadline has expired (the worker must be killed)
+            WorkerDiedError: the worker process has died
+
+        Returns:
+            any: return value of fn
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        fd = self.conn.fileno()
+
+        def ready() -> None:
+            loop.remove_reader(fd)
+            if future.done():
+                return
+            try:
+                future.set_result(self.conn.recv())
+            except Exception as e:
+                future.set_exception(e)
+
+        try:
+            self.conn.send((fn, args))
+            loop.add_reader(fd, ready)
+            ok, result = await asyncio.wait_for(future, timeout)
+        except TimeoutError:
+            raise
+        except (EOFError, OSError) as e:
+            raise WorkerDiedError(repr(e)) from e
+        finally:
+            loop.remove_reader(fd)
+
+        self.tasks += 1
+
+        if not ok:
+            raise result
+        return result
+
+    def stop(self) -> None:
+        """
+        This function asks the worker process to exit after its current task
+        """
+
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def kill(self) -> None:
+        """
+        This function kills the worker process immediately
+        """
+
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class ProcessExecutor(BaseExecutor):
+    """
+    Executes the notebooks in a pool of worker processes, thus they run in
+    parallel on all cores. A worker is killed (and replaced) if its execution
+    exceeds the deadline or it's abandoned, e.g. the client has disconnected.
+
+    Workers are started either from scratch ('spawn') or forked from a warm
+    template process ('forkserver'), which has imported the preload modules and
+    compiled the notebooks once (see preload.py).
+    ...
+
+    Attributes
+    ----------
+    workers: int
+        number of worker processes
+    maxTasksPerWorker: int
+        number of tasks after a worker process is replaced (0: never)
+    startMethod: str
+        start method of the worker processes: 'spawn' or 'forkserver'
+    """
+
+    def __init__(self, workers: int, maxTasksPerWorker: int = 0, timeout: float = 0, startMethod: str = SPAWN, preload: List[str] = None, nbRoot: str = None):
+        if startMethod not in START_METHODS:
+            raise ValueError("Unknown start method: '{}'".format(startMethod))
+
+        self.workers = workers or os.cpu_count()
+        self.maxTasksPerWorker = maxTasksPerWorker
+        self.timeout = timeout
+        self.startMethod = startMethod
+        # ! neither is forking the parent, which runs an event loop and threads
+        self._ctx = multiprocessing.get_context(startMethod)
+
+        if startMethod == FORKSERVER:
+            # ! the template is started with the first worker, it inherits the environment
+            os.environ[PRELOAD_ENV] = settings(list(preload or []), nbRoot)
+            self._ctx.set_forkserver_preload(["preload"])
+
+        self._idle: List[Worker] = list()
+        self._busy: Set[Worker] = set()
+        self._slots: asyncio.Semaphore = None
+        self._pid: int = None
+
+    async def submit(self, fn: Callable, *args, timeout: float = None) -> any:
+        # ! workers inherited from another process (fork) can't be used
+        if self._pid != os.getpid():
+            self._idle, self._busy = list(), set()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._pid = os.getpid()
+
+        timeout = self._deadline(timeout)
+
+        async with self._slots:
+            worker = self._getWorker()
+            self._busy.add(worker)
+
+            try:
+                result = await worker.run(fn, args, timeout)
+            except TimeoutError:
+                logger.warning("Execution has exceeded its deadline ({} s), killing worker process!", timeout)
+                self._busy.discard(worker)
+                worker.kill()
+                raise
+            except asyncio.CancelledError:
+                logger.debug("Execution has been abandoned, killing worker process!")
+                self._busy.discard(worker)
+                worker.kill()
+                raise
+            except WorkerDiedError as e:
+                # ----------------------- REPLACE THE DEAD WORKER ---------------------- #
+                logger.error("A worker process died unexpectedly, replacing it! Due to: {}", e)
+                self._busy.discard(worker)
+                worker.kill()
+                raise ChildProcessError
+            except BaseException:
+                self._release(worker)
+                raise
+
+            self._release(worker)
+            return result
+
+    def shutdown(self) -> None:
+        if self._pid != os.getpid():
+            return
+
+        for worker in self._idle:
+            worker.stop()
+        for worker in self._busy:
+            worker.kill()
+        for worker in self._idle:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.kill()
+
+        self._idle, self._busy = list(), set()
+
+    def _getWorker(self) -> Worker:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.process.is_alive():
+                return worker
+            worker.kill()
+
+        logger.debug("Starting worker process!")
+        return Worker(self._ctx)
+
+    def _release(self, worker: Worker) -> None:
+        self._busy.discard(worker)
+
+        # ------------------------------ RECYCLE WORKER ------------------------------ #
+        if self.maxTasksPerWorker and worker.tasks >= self.maxTasksPerWorker:
+            logger.debug("Recycling worker process after {} tasks!", worker.tasks)
+            worker.stop()
+        else:
+            self._idle.append(worker)
+
+# ---------------------------------------------------------------------------- #
+#                                    FACTORY                                   #
+# ---------------------------------------------------------------------------- #
+
+def makeExecutor(c: Execution, nbRoot: str = None) -> BaseExecutor:
+    """
+    This function creates the executor defined in the config
+
+    Args:
+        c (Execution): execution settings
+        nbRoot (str, optional): root path for notebooks (precompiled by the worker template)
+
+    Raises:
+        ValueError: unknown executor
+
+    Returns:
+        BaseExecutor: executor to be used for running notebooks
+    """
+
+    if c.executor == INLINE:
+        return InlineExecutor()
+    if c.executor == THREAD:
+        return ThreadExecutor(c.workers, c.timeout)
+    if c.executor == PROCESS:
+        return ProcessExecutor(c.workers, c.maxTasksPerWorker, c.timeout, c.startMethod, c.preload, nbRoot)
+
+    raise ValueError("Unknown executor: '{}'".format(c.executor))
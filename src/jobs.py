@@ -0,0 +1,234 @@
+# ---------------------------------------------------------------------------- #
+#                                   JOB STORE                                  #
+# ---------------------------------------------------------------------------- #
+#! Notebooks in job mode are executed in the background: the request returns a
+#! job ID immediately, the result can be polled (or awaited) and the job can be
+#! cancelled. The store keeps a bounded number of jobs, finished jobs expire.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import time
+import uuid
+
+from collections import OrderedDict
+from loguru import logger
+from typing import Awaitable, Dict
+
+from config import Jobs
+
+# --------------------------------- CONSTANTS -------------------------------- #
+SYNC = "sync"
+JOB = "job"
+MODE_KEY = "mode"
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# ---------------------------------------------------------------------------- #
+#                                      JOB                                     #
+# ---------------------------------------------------------------------------- #
+
+class Job:
+    """
+    A notebook execution running in the background
+    ...
+
+    Attributes
+    ----------
+    id: str
+        ID of the job
+    sname: str
+        service name
+    created: float
+        creation time (monotonic)
+    finished: float
+        finishing time (monotonic), None while the job is pending
+    """
+
+    def __init__(self, sname: str, task: asyncio.Task):
+        self.id = uuid.uuid4().hex
+        self.sname = sname
+        self.created = time.monotonic()
+        self.finished: float = None
+        self._task = task
+        task.add_done_callback(self._done)
+
+    @property
+    def status(self) -> str:
+        """
+        Status of the job: pending, done, failed or cancelled
+        """
+
+        if not self._task.done():
+            return PENDING
+        if self._task.cancelled():
+            return CANCELLED
+        if self._task.exception() is not None:
+            return FAILED
+        return DONE
+
+    def dto(self) -> Dict[str, any]:
+        """
+        This function returns the JSON representation of the job
+
+        Returns:
+            Dict[str, any]: ID, status and output (if the job is done) of the job
+        """
+
+        dto = {"id": self.id, "service": self.sname, "status": self.status}
+
+        if dto["status"] == DONE:
+            dto["output"] = self._task.result()
+
+        return dto
+
+    async def wait(self, timeout: float) -> None:
+        """
+        This function waits until the job is finished or the timeout expires,
+        the job itself isn't cancelled by the timeout
+
+        Args:
+            timeout (float): maximal waiting time (in seconds)
+        """
+
+        if timeout > 0 and not self._task.done():
+            await asyncio.wait({self._task}, timeout=timeout)
+
+    def cancel(self) -> bool:
+        """
+        This function cancels the job
+
+        Returns:
+            bool: False if the job has already been finished
+        """
+
+        return self._task.cancel()
+
+    def _done(self, task: asyncio.Task) -> None:
+        self.finished = time.monotonic()
+
+        # ! the exception is retrieved, so asyncio doesn't log it again
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("{}: Job '{}' has failed!", self.sname, self.id)
+
+# ---------------------------------------------------------------------------- #
+#                                     STORE                                    #
+# ---------------------------------------------------------------------------- #
+
+class JobStore:
+    """
+    Bounded store of jobs. Finished jobs are evicted after the TTL, or earlier
+    (oldest first) if the store is full. Must be used from one event loop.
+    ...
+
+    Attributes
+    ----------
+    settings: Jobs
+        size and expiration settings of the store
+    """
+
+    def __init__(self, settings: Jobs):
+        self.settings = settings
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def submit(self, sname: str, execution: Awaitable) -> Job:
+        """
+        This function starts the execution as a new job
+
+        Args:
+            sname (str): service name
+            execution (Awaitable): execution of the notebook
+
+        Raises:
+            OverflowError: the store is full of pending jobs
+
+        Returns:
+            Job: the started job
+        """
+
+        self._evict(room=True)
+
+        if len(self._jobs) >= self.settings.maxJobs:
+            # ! the coroutine won't be awaited
+            if asyncio.iscoroutine(execution):
+                execution.close()
+            raise OverflowError("Too many pending jobs!")
+
+        job = Job(sname, asyncio.ensure_future(execution))
+        self._jobs[job.id] = job
+        logger.debug("{}: Job '{}' has been started!", sname, job.id)
+
+        return job
+
+    def get(self, jobid: str) -> Job:
+        """
+        This function returns the job with the given ID
+
+        Args:
+            jobid (str): ID of the job
+
+        Raises:
+            KeyError: unknown (or expired) job
+
+        Returns:
+            Job: the job
+        """
+
+        self._evict()
+        return self._jobs[jobid]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        This function returns the number of jobs by status
+
+        Returns:
+            Dict[str, int]: number of pending, done, failed and cancelled jobs
+        """
+
+        self._evict()
+        stats = {PENDING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+
+        for job in self._jobs.values():
+            stats[job.status] += 1
+
+        return stats
+
+    async def drain(self, timeout: float) -> None:
+        """
+        This function waits until every pending job is finished or the timeout
+        expires, the jobs themselves aren't cancelled by the timeout
+
+        Args:
+            timeout (float): maximal waiting time (in seconds)
+        """
+
+        pending = [job for job in self._jobs.values() if job.status == PENDING]
+
+        if pending:
+            logger.info("Waiting for {} pending jobs!", len(pending))
+            await asyncio.gather(*(job.wait(timeout) for job in pending))
+
+    def cancel(self) -> None:
+        """
+        This function cancels every pending job
+        """
+
+        for job in self._jobs.values():
+            job.cancel()
+
+    def _evict(self, room: bool = False) -> None:
+        now = time.monotonic()
+
+        # ------------------------------ EXPIRED JOBS ------------------------------ #
+        for jobid in [jobid for jobid, job in self._jobs.items() if job.finished is not None and now - job.finished >= self.settings.ttl]:
+            del self._jobs[jobid]
+
+        # ! the oldest finished jobs are dropped to make room for a new one (only on submit,
+        # ! a lookup must not drop the job it's looking for)
+        if room and len(self._jobs) >= self.settings.maxJobs:
+            for jobid in [jobid for jobid, job in self._jobs.items() if job.finished is not None]:
+                del self._jobs[jobid]
+                if len(self._jobs) < self.settings.maxJobs:
+                    break
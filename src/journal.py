@@ -0,0 +1,185 @@
+# ---------------------------------------------------------------------------- #
+#                                 STATE JOURNAL                                #
+# ---------------------------------------------------------------------------- #
+#! The IDs registered in the local cloud (system, services, authorization rules)
+#! are recorded in a small JSON file as they are created and removed. The file
+#! is replaced atomically (temporary file, fsync, rename), thus after a crash it
+#! holds either the previous or the new state, never a partial one. The next
+#! start cleans the stale registrations up (or adopts them) from the journal.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import json
+import os
+
+from dataclasses import asdict
+from loguru import logger
+from pathlib import Path
+from typing import Dict, List
+
+from system_setup import RegisteredService
+
+# --------------------------------- CONSTANTS -------------------------------- #
+VERSION = 1
+
+# ---------------------------------------------------------------------------- #
+#                                    JOURNAL                                   #
+# ---------------------------------------------------------------------------- #
+
+class Journal:
+    """
+    Persistent record of the registrations of the provider. Every change is
+    written to the disk right away.
+    ...
+
+    Attributes
+    ----------
+    path: Path
+        path of the journal file (None: nothing is persisted)
+    sysid: int
+        ID of the registered provider system
+    services: Dict[str, RegisteredService]
+        registered services by service name
+    authids: List[int]
+        ID-s of the registered authorization rules
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else None
+        self.sysid: int = None
+        self.services: Dict[str, RegisteredService] = dict()
+        self.authids: List[int] = list()
+
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    @property
+    def empty(self) -> bool:
+        """
+        True if nothing is recorded
+        """
+
+        return self.sysid is None and not self.services and not self.authids
+
+    def recordSystem(self, sysid: int) -> None:
+        """
+        This function records the registered provider system
+
+        Args:
+            sysid (int): ID of the system
+        """
+
+        self.sysid = sysid
+        self._save()
+
+    def recordServices(self, services: Dict[str, RegisteredService]) -> None:
+        """
+        This function records registered services
+
+        Args:
+            services (Dict[str, RegisteredService]): registered services by service name
+        """
+
+        if services:
+            self.services.update(services)
+            self._save()
+
+    def forgetServices(self, snames: List[str]) -> None:
+        """
+        This function forgets unregistered services
+
+        Args:
+            snames (List[str]): names of the unregistered services
+        """
+
+        if any(self.services.pop(sname, None) for sname in snames):
+            self._save()
+
+    def recordAuthRules(self, authids: List[int]) -> None:
+        """
+        This function records registered authorization rules
+
+        Args:
+            authids (List[int]): ID-s of the rules
+        """
+
+        if authids:
+            self.authids.extend(authid for authid in authids if authid not in self.authids)
+            self._save()
+
+    def forgetAuthRules(self, authids: List[int]) -> None:
+        """
+        This function forgets removed authorization rules
+
+        Args:
+            authids (List[int]): ID-s of the removed rules
+        """
+
+        if set(authids) & set(self.authids):
+            self.authids = [authid for authid in self.authids if authid not in authids]
+            self._save()
+
+    def replace(self, services: Dict[str, RegisteredService], authids: List[int]) -> None:
+        """
+        This function replaces the recorded services and authorization rules
+        (e.g. after reconciliation)
+
+        Args:
+            services (Dict[str, RegisteredService]): registered services by service name
+            authids (List[int]): ID-s of the registered rules
+        """
+
+        self.services, self.authids = dict(services), list(authids)
+        self._save()
+
+    def clear(self) -> None:
+        """
+        This function forgets everything (e.g. after a complete cleanup)
+        """
+
+        self.sysid, self.services, self.authids = None, dict(), list()
+
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+
+            self.sysid = state.get("sysid")
+            self.services = {sname: RegisteredService(**service) for sname, service in state.get("services", dict()).items()}
+            self.authids = list(state.get("authids", list()))
+        except (OSError, ValueError, TypeError) as e:
+            # ! the file is replaced atomically, so it's broken only if it has been edited by hand
+            logger.warning("Journal '{}' cannot be read, it's ignored! Due to: {!r}", self.path, e)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+
+        state = {
+            "version": VERSION,
+            "sysid": self.sysid,
+            "services": {sname: asdict(service) for sname, service in self.services.items()},
+            "authids": self.authids
+        }
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+
+        # ----------------------------- ATOMIC REPLACE ----------------------------- #
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.path)
+
+        # ! the rename itself is made durable by syncing the directory
+        try:
+            fd = os.open(self.path.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
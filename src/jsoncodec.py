@@ -0,0 +1,72 @@
+# ---------------------------------------------------------------------------- #
+#                                  JSON CODEC                                  #
+# ---------------------------------------------------------------------------- #
+#! JSON parsing and serialization of the request path. orjson is used if it's
+#! installed (it's in requirements.txt), otherwise the standard json module.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --------------------------------- CONSTANTS -------------------------------- #
+JSON_MEDIA_TYPE = "application/json"
+
+# ! orjson converts integers beyond 64 bits to float, documents with such long numbers are parsed by json
+LONG_NUMBER = re.compile(rb"\d{19}")
+
+# ---------------------------------------------------------------------------- #
+#                                   FUNCTIONS                                  #
+# ---------------------------------------------------------------------------- #
+
+def loads(data: bytes) -> any:
+    """
+    This function parses a JSON document, the result is the same as the one of
+    json.loads (orjson is used only where it agrees with it)
+
+    Args:
+        data (bytes): JSON document
+
+    Raises:
+        ValueError: invalid JSON document
+
+    Returns:
+        any: parsed object
+    """
+
+    if orjson is not None and not LONG_NUMBER.search(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # ! e.g. NaN and Infinity are accepted by json
+            pass
+    return json.loads(data)
+
+def dumps(obj: any, sortKeys: bool = False) -> bytes:
+    """
+    This function serializes an object as (UTF-8 encoded) JSON, numpy arrays
+    are supported by orjson, any other unknown type is serialized as string
+
+    Args:
+        obj (any): object to be serialized
+        sortKeys (bool, optional): if set the keys of objects are sorted (canonical form)
+
+    Returns:
+        bytes: JSON document
+    """
+
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sortKeys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except orjson.JSONEncodeError:
+            # ! e.g. integers beyond 64 bits are serialized by json
+            pass
+
+    return json.dumps(obj, default=str, sort_keys=sortKeys, ensure_ascii=False, separators=(",", ":")).encode()
@@ -0,0 +1,356 @@
+# ---------------------------------------------------------------------------- #
+#                                  KERNEL POOL                                 #
+# ---------------------------------------------------------------------------- #
+#! Pool of pre-started Jupyter kernels for the jpnb engine. A kernel is used by
+#! one execution at a time, its namespace is reset after every execution and it
+#! is replaced after a given number of executions or on error.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import atexit
+import nbformat
+import threading
+import time
+
+from jupyter_client.blocking import BlockingKernelClient
+from jupyter_client.manager import KernelManager
+from loguru import logger
+from nbformat import NotebookNode
+from pathlib import Path
+from typing import List
+
+from config import Kernels
+
+# --------------------------------- CONSTANTS -------------------------------- #
+STARTUP_TIMEOUT = 60
+RESET_TIMEOUT = 10
+RESET_CODE = "%reset -f"
+CHDIR_CODE = "__import__('os').chdir({!r})"
+PRINT_CODE = "print({}, end='')"
+OUTPUT_TYPES = ("stream", "display_data", "execute_result", "error")
+
+# ---------------------------------------------------------------------------- #
+#                                    KERNEL                                    #
+# ---------------------------------------------------------------------------- #
+
+class PooledKernel:
+    """
+    A started kernel with its connected (blocking) client
+    ...
+
+    Attributes
+    ----------
+    km: KernelManager
+        manager of the kernel process
+    kc: BlockingKernelClient
+        client connected to the kernel
+    executions: int
+        number of executions served by the kernel
+    """
+
+    def __init__(self, kernelName: str):
+        self.km = KernelManager(kernel_name=kernelName)
+        self.km.start_kernel()
+        self.kc: BlockingKernelClient = self.km.client()
+        self.kc.start_channels()
+        self.kc.allow_stdin = False
+        self.executions = 0
+
+        try:
+            self.kc.wait_for_ready(timeout=STARTUP_TIMEOUT)
+        except RuntimeError:
+            self.shutdown()
+            raise
+
+    def isAlive(self) -> bool:
+        """
+        This function checks the health of the kernel
+
+        Returns:
+            bool: True if the kernel process and its heartbeat are alive
+        """
+
+        return self.km.is_alive() and self.kc.hb_channel.is_beating()
+
+    def run(self, nb: NotebookNode, cwd: Path, preamble: str = None, timeout: float = None) -> List[list]:
+        """
+        This function executes the code cells of the notebook, the notebook
+        itself isn't modified
+
+        Args:
+            nb (NotebookNode): notebook to be executed
+            cwd (Path): working directory of the execution
+            preamble (str, optional): code executed (silently) before the cells
+            timeout (float, optional): deadline of the whole execution (in seconds)
+
+        Raises:
+            RuntimeError: a cell has raised an exception
+            TimeoutError: the deadline has expired (the kernel must be recycled)
+
+        Returns:
+            List[list]: outputs of the code cells
+        """
+
+        deadline = time.monotonic() + timeout if timeout else None
+
+        def remaining() -> float:
+            if deadline is None:
+                return None
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise TimeoutError("Execution has exceeded its deadline ({} s)!".format(timeout))
+            return left
+
+        self._execute(CHDIR_CODE.format(str(cwd)), silent=True, timeout=remaining())
+
+        if preamble:
+            self._execute(preamble, silent=True, timeout=remaining())
+
+        results = list()
+
+        for index, cell in enumerate(nb.cells):
+            if cell.cell_type != "code":
+                continue
+
+            outputs = list()
+            results.append(outputs)
+            reply = self._execute(cell.source, timeout=remaining(), hook=lambda msg: _addOutput(outputs, msg))
+
+            if reply["content"]["status"] != "ok":
+                raise RuntimeError("Cell {} has failed: {}: {}".format(
+                    index,
+                    reply["content"].get("ename"),
+                    reply["content"].get("evalue")
+                ))
+
+        return results
+
+    def evaluate(self, name: str) -> str:
+        """
+        This function returns a variable of the kernel namespace as string
+
+        Args:
+            name (str): name of the variable
+
+        Raises:
+            NameError: the variable isn't defined
+
+        Returns:
+            str: str() of the variable
+        """
+
+        text = list()
+
+        def hook(msg: dict) -> None:
+            if msg["msg_type"] == "stream" and msg["content"]["name"] == "stdout":
+                text.append(msg["content"]["text"])
+
+        reply = self._execute(PRINT_CODE.format(name), silent=True, hook=hook)
+
+        if reply["content"]["status"] != "ok":
+            raise NameError("'{}' is not defined in the kernel!".format(name))
+
+        return "".join(text)
+
+    def reset(self) -> bool:
+        """
+        This function clears the namespace of the kernel
+
+        Returns:
+            bool: True if the kernel has been reset successfully
+        """
+
+        try:
+            reply = self._execute(RESET_CODE, silent=True, timeout=RESET_TIMEOUT)
+            return reply["content"]["status"] == "ok"
+        except Exception as e:
+            logger.warning("Cannot reset kernel, due to: {}", e)
+            return False
+
+    def shutdown(self) -> None:
+        """
+        This function stops the kernel process
+        """
+
+        try:
+            self.kc.stop_channels()
+            self.km.shutdown_kernel(now=True)
+        except Exception as e:
+            logger.warning("Cannot shut down kernel properly, due to: {}", e)
+
+    def _execute(self, code: str, silent: bool = False, timeout: float = None, hook: callable = None) -> dict:
+        # ! raises TimeoutError if the kernel doesn't reply in time (e.g. a hung cell)
+        return self.kc.execute_interactive(
+            code,
+            silent=silent,
+            store_history=False,
+            allow_stdin=False,
+            timeout=timeout,
+            output_hook=hook or (lambda msg: None)
+        )
+
+def _addOutput(outputs: list, msg: dict) -> None:
+    """
+    This function converts an iopub message to a notebook output, consecutive
+    stream messages are merged (like nbclient does)
+
+    Args:
+        outputs (list): outputs of the cell
+        msg (dict): iopub message from the kernel
+    """
+
+    if msg["msg_type"] not in OUTPUT_TYPES:
+        return
+
+    output = nbformat.v4.output_from_msg(msg)
+
+    if output.output_type == "stream" and outputs and outputs[-1].output_type == "stream" and outputs[-1].name == output.name:
+        outputs[-1].text += output.text
+    else:
+        outputs.append(output)
+
+# ---------------------------------------------------------------------------- #
+#                                     POOL                                     #
+# ---------------------------------------------------------------------------- #
+
+class KernelPool:
+    """
+    Thread-safe pool of warm kernels
+    ...
+
+    Attributes
+    ----------
+    settings: Kernels
+        size and recycling settings of the pool
+    """
+
+    def __init__(self, settings: Kernels):
+        self.settings = settings
+        self._idle: List[PooledKernel] = list()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        atexit.register(self.shutdown)
+
+    def start(self) -> None:
+        """
+        This function starts the minimal number of kernels
+        """
+
+        with self._cond:
+            missing = max(self.settings.minSize - self._size, 0)
+            self._size += missing
+
+        for _ in range(missing):
+            self._addIdle(self._startKernel())
+
+        logger.debug("Kernel pool has been started with {} kernels!", missing)
+
+    def acquire(self) -> PooledKernel:
+        """
+        This function returns a healthy idle kernel, it starts a new one if there
+        isn't any idle kernel and the pool isn't full, otherwise it waits
+
+        Raises:
+            RuntimeError: the pool has been shut down
+
+        Returns:
+            PooledKernel: kernel reserved for the caller
+        """
+
+        dead: List[PooledKernel] = list()
+
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Kernel pool has been shut down!")
+
+                    # ------------------------------ HEALTH CHECK ------------------------------ #
+                    while self._idle:
+                        kernel = self._idle.pop()
+                        if kernel.isAlive():
+                            return kernel
+                        logger.warning("Dead kernel has been dropped from the pool!")
+                        self._size -= 1
+                        dead.append(kernel)
+
+                    if self._size < self.settings.maxSize:
+                        self._size += 1
+                        break
+
+                    self._cond.wait()
+        finally:
+            # ! dead kernels are shut down outside of the lock, the other requests don't wait for it
+            for kernel in dead:
+                kernel.shutdown()
+
+        return self._startKernel()
+
+    def release(self, kernel: PooledKernel, failed: bool = False) -> None:
+        """
+        This function gives the kernel back to the pool, the kernel is recycled
+        if the execution has failed or it has reached the execution limit
+
+        Args:
+            kernel (PooledKernel): kernel returned by acquire
+            failed (bool, optional): True if the execution has failed
+        """
+
+        kernel.executions += 1
+        limit = self.settings.maxExecutions
+
+        if not failed and (not limit or kernel.executions < limit) and kernel.reset():
+            self._addIdle(kernel)
+            return
+
+        # --------------------------------- RECYCLE -------------------------------- #
+        logger.debug("Recycling kernel after {} executions!", kernel.executions)
+        kernel.shutdown()
+
+        with self._cond:
+            self._size -= 1
+            replace = not self._closed and self._size < self.settings.minSize
+            if replace:
+                self._size += 1
+            self._cond.notify()
+
+        # ! the replacement starts in the background, the caller doesn't wait for it
+        if replace:
+            threading.Thread(target=self._replaceKernel, name="kernel-starter", daemon=True).start()
+
+    def shutdown(self) -> None:
+        """
+        This function stops every idle kernel and closes the pool
+        """
+
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, list()
+            self._cond.notify_all()
+
+        for kernel in idle:
+            kernel.shutdown()
+
+    def _startKernel(self) -> PooledKernel:
+        try:
+            return PooledKernel(self.settings.kernelName)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _replaceKernel(self) -> None:
+        try:
+            self._addIdle(self._startKernel())
+        except Exception as e:
+            logger.exception("Cannot start a replacement kernel, due to: {}", e)
+
+    def _addIdle(self, kernel: PooledKernel) -> None:
+        with self._cond:
+            if self._closed:
+                kernel.shutdown()
+                return
+            self._idle.append(kernel)
+            self._cond.notify()
@@ -0,0 +1,258 @@
+# ---------------------------------------------------------------------------- #
+#                              ADMISSION CONTROL                               #
+# ---------------------------------------------------------------------------- #
+#! Concurrent executions are limited per service and globally. Requests above
+#! the limit wait in a bounded queue, once the queue is full they are rejected
+#! right away (429 for a service, 503 for the whole adapter) with Retry-After.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from config import Limits
+
+# --------------------------------- CONSTANTS -------------------------------- #
+LIMITS_KEY = "limits"
+SERVICE_OVERLOADED = 429
+ADAPTER_OVERLOADED = 503
+
+# ---------------------------------------------------------------------------- #
+#                                  EXCEPTIONS                                  #
+# ---------------------------------------------------------------------------- #
+
+class OverloadedError(Exception):
+    """
+    The request has been rejected by the admission control
+    ...
+
+    Attributes
+    ----------
+    status_code: int
+        HTTP status of the rejection (429 or 503)
+    retryAfter: int
+        suggested delay of the next attempt (in seconds)
+    """
+
+    def __init__(self, message: str, status_code: int, retryAfter: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryAfter = retryAfter
+
+# ---------------------------------------------------------------------------- #
+#                                    LIMITER                                   #
+# ---------------------------------------------------------------------------- #
+
+class Limiter:
+    """
+    Limits the concurrent executions with a bounded wait queue. Must be used
+    from one event loop.
+    ...
+
+    Attributes
+    ----------
+    maxConcurrent: int
+        maximal number of concurrent executions (0: unlimited)
+    maxQueue: int
+        maximal number of waiting requests
+    active: int
+        number of running executions
+    waiting: int
+        number of queued requests (jobs wait without being queued)
+    rejected: int
+        number of rejected requests
+    """
+
+    def __init__(self, maxConcurrent: int, maxQueue: int, status_code: int, retryAfter: int):
+        self.maxConcurrent = maxConcurrent
+        self.maxQueue = maxQueue
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._status_code = status_code
+        self._retryAfter = retryAfter
+        self._semaphore = asyncio.Semaphore(maxConcurrent) if maxConcurrent > 0 else None
+
+    async def acquire(self, queue: bool = True) -> None:
+        """
+        This function reserves an execution slot, it waits if every slot is taken
+
+        Args:
+            queue (bool, optional): if unset the request waits regardless of the queue limit (it isn't counted as queued)
+
+        Raises:
+            OverloadedError: the queue is full
+        """
+
+        if self._semaphore is None:
+            self.active += 1
+            return
+
+        if self.locked() and queue and self.waiting >= self.maxQueue:
+            self.rejected += 1
+            raise OverloadedError("Too many requests!", self._status_code, self._retryAfter)
+
+        # ! only queued requests count against the queue limit
+        if not queue:
+            await self._semaphore.acquire()
+        else:
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+
+    def release(self) -> None:
+        """
+        This function frees an execution slot
+        """
+
+        self.active -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def locked(self) -> bool:
+        """
+        This function tells whether a new request would have to wait
+
+        Returns:
+            bool: every slot is taken
+        """
+
+        return self._semaphore is not None and self._semaphore.locked()
+
+    @asynccontextmanager
+    async def slot(self, queue: bool = True) -> AsyncIterator[None]:
+        """
+        This function reserves an execution slot for the context
+
+        Args:
+            queue (bool, optional): if unset the request waits regardless of the queue limit
+
+        Raises:
+            OverloadedError: the queue is full
+        """
+
+        await self.acquire(queue)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        This function returns the counters of the limiter
+
+        Returns:
+            Dict[str, int]: limits, running, waiting and rejected requests
+        """
+
+        return {
+            "maxConcurrent": self.maxConcurrent,
+            "maxQueue": self.maxQueue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected
+        }
+
+class AdmissionControl:
+    """
+    Global and per service limiters of the adapter
+    ...
+
+    Attributes
+    ----------
+    settings: Limits
+        limits of the adapter and the default limits of the services
+    total: Limiter
+        global limiter
+    services: Dict[str, Limiter]
+        limiters by service name
+    """
+
+    def __init__(self, settings: Limits):
+        self.settings = settings
+        self.total = Limiter(settings.maxConcurrent, settings.maxQueue, ADAPTER_OVERLOADED, settings.retryAfter)
+        self.services: Dict[str, Limiter] = dict()
+
+    def limiter(self, sname: str, options: dict) -> Limiter:
+        """
+        This function creates the limiter of a service, the defaults can be
+        overridden by the options of the notebook ('limits' object, keys:
+        'max-concurrent' and 'max-queue')
+
+        Args:
+            sname (str): service name
+            options (dict): options of the notebook
+
+        Returns:
+            Limiter: limiter of the service
+        """
+
+        limits = options.get(LIMITS_KEY) or dict()
+
+        self.services[sname] = Limiter(
+            int(limits.get("max-concurrent", self.settings.serviceMaxConcurrent)),
+            int(limits.get("max-queue", self.settings.serviceMaxQueue)),
+            SERVICE_OVERLOADED,
+            self.settings.retryAfter
+        )
+
+        return self.services[sname]
+
+    def remove(self, sname: str) -> None:
+        """
+        This function drops the limiter of a removed service
+
+        Args:
+            sname (str): service name
+        """
+
+        self.services.pop(sname, None)
+
+    @asynccontextmanager
+    async def slot(self, service: Limiter, queue: bool = True) -> AsyncIterator[None]:
+        """
+        This function reserves a slot of the service and a global slot
+
+        Args:
+            service (Limiter): limiter of the service
+            queue (bool, optional): if unset the request waits regardless of the queue limits
+
+        Raises:
+            OverloadedError: a queue is full
+        """
+
+        # ! a request never holds a slot while it waits for the other one, it waits for the
+        # ! one that is taken and takes the other one only if it's free right away
+        first, second = service, self.total
+
+        while True:
+            await first.acquire(queue)
+            if not second.locked():
+                await second.acquire(queue)
+                break
+            first.release()
+            first, second = second, first
+
+        try:
+            yield
+        finally:
+            service.release()
+            self.total.release()
+
+    def stats(self) -> Dict[str, any]:
+        """
+        This function returns the counters of the limiters
+
+        Returns:
+            Dict[str, any]: global and per service counters
+        """
+
+        return {
+            "global": self.total.stats(),
+            "services": {sname: limiter.stats() for sname, limiter in self.services.items()}
+        }
@@ -5,22 +5,26 @@
 # ---------------------------------------------------------------------------- #
 #                                    IMPORTS                                   #
 # ---------------------------------------------------------------------------- #
-import json
-import nbconvert
-import nbformat
-import os
-import pathlib
+import asyncio
 import sys
 
 import system_setup
 
-from fnmatch import fnmatch
 from loguru import logger
-from nbclient import NotebookClient
 from pathlib import Path
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Tuple
 
 from config import readConfig, Config
+from engines import JPNB, PYNB, INPUT_MODES, JSON_INPUT, RAW_INPUT, makeEngine, getKernelPool, shutdownKernelPool, cacheStats, compileNotebook, forgetNotebook
+from batcher import Batcher, batchSettings
+from executor import PROCESS, BaseExecutor, ThreadExecutor, makeExecutor
+from jobs import JOB, MODE_KEY, SYNC, Job, JobStore
+from journal import Journal
+from jsoncodec import JSON_MEDIA_TYPE, dumps, loads
+from limits import AdmissionControl, OverloadedError
+from nbcache import prunedCells, readNotebook, readOptions
+from resultcache import CACHE_HEADER, HIT, MISS, ResultCache, cacheTTL
+from watcher import Notebook, NotebookWatcher, discoverNotebooks
 
 # ---------------------------------------------------------------------------- #
 #                               ARROWHEAD LIBRARY                              #
@@ -29,98 +33,188 @@ from arrowhead_client.client.implementations import AsyncClient
 from arrowhead_client.system import ArrowheadSystem
 
 from arrowhead_client.request import Request
-from arrowhead_client.constants import CoreSystem
+from arrowhead_client.constants import CoreSystem, Misc
+
+from starlette.responses import JSONResponse, Response
 
 # ---------------------------------------------------------------------------- #
 #                                   CONSTANTS                                  #
 # ---------------------------------------------------------------------------- #
-IPYNB_EXT = "*.ipynb"
-
-def pynb_execute(nbRoot: str, path: str, data: any, sname: str) -> any:
+JOB_URI = "/job"
+JOB_SUFFIX = "-job"
+JOB_CANCEL_SUFFIX = "-job-cancel"
+
+TIMEOUT_KEY = "timeout"
+INPUT_KEY = "input"
+OUTPUT_KEY = "output"
+TEXT_OUTPUT = "text"
+JSON_OUTPUT = "json"
+OUTPUT_MODES = (TEXT_OUTPUT, JSON_OUTPUT)
+
+# ! underscores of notebook names are converted to dashes, thus it can't collide with a notebook
+METRICS_URI = "_metrics"
+METRICS_SERVICE = "prototaip-metrics"
+
+def makeptThread(nbRoot: str, path: str, name: str, _provider: AsyncClient, _executor: BaseExecutor, _engine: callable, _jobs: JobStore, _results: ResultCache, _admission: AdmissionControl, options: dict = None) -> Dict[str, str]:
     """
-    This function executes a jupyter notebook as regular python file
+    It's a function factory closure
 
     Args:
-        fpath (Path): path for the nb file
-        data (any): input data
-        sname (str): service name
-
-    Raises:
-        ChildProcessError: Any error during execution
+        nbRoot (str): root path for notebooks
+        path (str): path for the actual notebook
+        name (str): name of the service
+        _provider (AsyncClient): provider client
+        _executor (BaseExecutor): executor that runs the notebook
+        _engine (callable): engine that executes the notebook
+        _jobs (JobStore): store of the jobs (job mode)
+        _results (ResultCache): cache of the outputs (cached notebooks)
+        _admission (AdmissionControl): concurrency limits
+        options (dict, optional): options of the notebook (metadata)
 
     Returns:
-        any: output of the notebook
+        Dict[str, str]: provided services (service name: service URI)
     """
-    
-    # ----------------------------- CONVERT NOTEBOOK ----------------------------- #
+
+    options = options or dict()
+
+    def overloaded(e: OverloadedError) -> Response:
+        logger.warning("Service: {} has rejected a request, due to: {}", name, e)
+        return JSONResponse({Misc.ERROR_MESSAGE: str(e)}, status_code=e.status_code, headers={"Retry-After": str(e.retryAfter)})
+
+    # ------------------------------ INPUT / OUTPUT ------------------------------ #
+    inputMode = options.get(INPUT_KEY, JSON_INPUT)
+    outputMode = options.get(OUTPUT_KEY, TEXT_OUTPUT)
+
+    if inputMode not in INPUT_MODES or outputMode not in OUTPUT_MODES:
+        logger.warning('Service "{}" has unknown input or output mode, defaults are used!', name)
+        inputMode = inputMode if inputMode in INPUT_MODES else JSON_INPUT
+        outputMode = outputMode if outputMode in OUTPUT_MODES else TEXT_OUTPUT
+
+    timeout = float(options.get(TIMEOUT_KEY, 0))
+    # ! the engine gets the deadline too, e.g. the jpnb engine recycles a hung kernel
+    deadline = timeout or _executor.timeout
+    ttl = cacheTTL(options, _results.settings.ttl)
     nbPath = Path(nbRoot, path + ".ipynb")
 
-    try:
-        # ------------------------------- CREATE SCRIPT ------------------------------ #
-        nb = nbformat.read(nbPath, as_version=4)
-        script, _ = nbconvert.PythonExporter().from_notebook_node(nb)
-
-        script_local = {"data_input": json.dumps(data)}
-        exec(script, None, script_local)
-        return script_local["output"]
-        # ! 'output' must be declared
-        
-    except Exception as e:
-        logger.exception("Cannot execute notebbok: {}, due to: {}", sname, e)
-        raise ChildProcessError
-    
-def jpnb_execute(nbRoot: str, path: str, data: any, sname: str) -> any:
-    """
-    This function executes a jupyter notebook as ipynb
+    if timeout and isinstance(_executor, ThreadExecutor):
+        logger.warning('Service "{}" has a timeout, but the thread executor cannot stop executions over it, only their requests fail!', name)
 
-    Args:
-        fpath (Path): path for the nb file
-        data (any): input data
-        sname (str): service name
+    batch = batchSettings(options, name)
 
-    Raises:
-        ChildProcessError: Any error during execution
+    def readInput(req: Request[any]) -> any:
+        # ! the notebook parses the body itself
+        if inputMode == RAW_INPUT:
+            return req.body
 
-    Returns:
-        any: output of the notebook
-    """
+        try:
+            data = loads(req.body)
+            logger.debug(name +": Input data: {}", data)
+            return data
+        except Exception as e:
+            logger.exception("Cannot run service: {}, due to: {}", name, e)
+            raise ValueError
 
-    # ----------------------------- CREATE INPUTFILE ----------------------------- #
-    with open(Path(nbRoot, path + "-inputdata.json"),'w') as f:
-        f.write(''.join(json.dumps(data)))
+    # ----------------------------- ADMISSION CONTROL ---------------------------- #
+    # ! replaces the limiter of the previous version, thus it's created once every option is parsed
+    limiter = _admission.limiter(name, options)
 
-    nbPath = Path(nbRoot, path + ".ipynb")
+    # --------------------------------- BATCHING --------------------------------- #
+    batcher = None
 
-    try:
-        nb = nbformat.read(nbPath, as_version=4)
-        client = NotebookClient(nb, resources={'metadata': {'path': Path(nbRoot, path).parent}})
-        client.execute()
-        nbformat.write(nb, nbPath)
-    except Exception as e:
-        logger.exception("Cannot execute notebbok: {}, due to: {}", sname, e)
-        raise ChildProcessError
+    async def executeBatch(inputs: List[any]) -> any:
+        # ! a batch takes one slot, thus the limits don't cap the size of the batches
+        async with _admission.slot(limiter):
+            return await _executor.submit(_engine, nbRoot, path, inputs, name, inputMode, deadline, timeout=timeout)
 
-    # ----------------------------- REMOVE INPUTFILE ----------------------------- #
-    try:
-        os.remove(Path(nbRoot, path + "-inputdata.json"))
-    except OSError as e:
-        logger.exception("Cannot remove input file for '{}', due to {}", sname, e)
+    if batch:
+        batcher = Batcher(executeBatch, batch, name)
+        logger.debug('Service "{}" executes batches of up to {} inputs!', name, batch.maxSize)
 
-    return nb.cells[-1]["outputs"][-1]["text"]
+    async def run(data: any, queue: bool = True) -> any:
+        # ------------------------------ EXECUTE SCRIPT ------------------------------ #
+        if batcher:
+            output = await batcher.submit(data)
+        else:
+            async with _admission.slot(limiter, queue):
+                output = await _executor.submit(_engine, nbRoot, path, data, name, inputMode, deadline, timeout=timeout)
 
-def makeptThread(nbRoot: str, path: str, name: str, _provider: AsyncClient) -> callable:
-    """
-    It's a function factory closure
+        logger.debug(name +": Output data: {}", output)
+        return output
 
-    Args:
-        nbRoot (str): root path for notebooks
-        path (str): path for the actual notebook
-        name (str): name of the service
-        _provider (AsyncClient): provider client
+    # ------------------------------- RESULT CACHE ------------------------------- #
+    async def execute(data: any, queue: bool = True) -> Tuple[any, bool]:
+        if ttl is None:
+            return await run(data, queue), False
+
+        try:
+            key = _results.key(nbPath, data)
+        except OSError as e:
+            logger.warning("Cannot use result cache of service: {}, due to: {}", name, e)
+            return await run(data, queue), False
+
+        return await _results.get(key, ttl, lambda: run(data, queue))
+
+    async def output(data: any) -> any:
+        # ! jobs are bounded by the job store, they wait for a slot instead of being rejected
+        return (await execute(data, queue=False))[0]
+
+    if options.get(MODE_KEY, SYNC) != JOB:
+        @_provider.provided_service(
+            service_definition=name,
+            service_uri=path,
+            protocol='HTTP',
+            method='POST',
+            payload_format='JSON',
+            access_policy='CERTIFICATE',
+            data_model=any
+        )
+        async def ptThread(req: Request[any]) -> any:
+            """
+            This function executes a notebook based on the input data
+
+            Args:
+                req (Request[any]): input data from webservice
+
+            Raises:
+                ValueError: Bad request
+                ChildProcessError: Cannot execute notebook properly
+
+            Returns:
+                any: output of the notebook
+            """
+
+            try:
+                output, cached = await execute(readInput(req))
+            except OverloadedError as e:
+                return overloaded(e)
+            except TimeoutError:
+                logger.warning("Service: {} has exceeded its deadline!", name)
+                return JSONResponse({Misc.ERROR_MESSAGE: "Execution has exceeded its deadline!"}, status_code=504)
+
+            headers = None if ttl is None else {CACHE_HEADER: HIT if cached else MISS}
+
+            # ! structured outputs are serialized only once
+            if outputMode == JSON_OUTPUT:
+                return Response(dumps(output), media_type=JSON_MEDIA_TYPE, headers=headers)
+            if headers is None:
+                return output
+            return Response(str(output), headers=headers)
+
+        return {name: path}
+
+    # --------------------------------- JOB MODE --------------------------------- #
+    def jobResponse(job: Job, status_code: int = 200) -> Response:
+        return Response(dumps(job.dto()), status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+    def findJob(req: Request[any]) -> Job:
+        try:
+            return _jobs.get(req.query["id"])
+        except KeyError:
+            raise LookupError
+
+    def notFound() -> Response:
+        return JSONResponse({Misc.ERROR_MESSAGE: "Unknown or expired job!"}, status_code=404)
 
-    Returns:
-        callable: provided service
-    """
     @_provider.provided_service(
         service_definition=name,
         service_uri=path,
@@ -130,35 +224,242 @@ def makeptThread(nbRoot: str, path: str, name: str, _provider: AsyncClient) -> c
         access_policy='CERTIFICATE',
         data_model=any
     )
-    async def ptThread(req: Request[any]) -> any:
+    async def ptJob(req: Request[any]) -> Response:
         """
-        This function executes a notebook based on the input data
+        This function starts the execution of a notebook as a job
 
         Args:
             req (Request[any]): input data from webservice
 
         Raises:
             ValueError: Bad request
-            ChildProcessError: Cannot execute notebook properly
 
         Returns:
-            any: output of the notebook
+            Response: the started job (HTTP 202) or HTTP 503 if there are too many jobs
         """
 
+        data = readInput(req)
+
         try:
-            data = json.loads(req.body)
-            logger.debug(name +": Input data: {}", data)
+            job = _jobs.submit(name, output(data))
+        except OverflowError as e:
+            logger.warning("Cannot start job of service: {}, due to: {}", name, e)
+            return JSONResponse({Misc.ERROR_MESSAGE: str(e)}, status_code=503)
+
+        return jobResponse(job, 202)
+
+    @_provider.provided_service(
+        service_definition=name + JOB_SUFFIX,
+        service_uri=path + JOB_URI,
+        protocol='HTTP',
+        method='GET',
+        payload_format='JSON',
+        access_policy='CERTIFICATE',
+        data_model=any
+    )
+    async def ptJobStatus(req: Request[any]) -> Response:
+        """
+        This function returns the status (and the output) of a job, it waits for
+        the job at most 'wait' seconds (query parameter)
+
+        Args:
+            req (Request[any]): request with the 'id' (and 'wait') query parameters
+
+        Returns:
+            Response: the job or HTTP 404 if the job is unknown
+        """
+
+        try:
+            job = findJob(req)
+            wait = float(req.query.get("wait", 0))
+        except LookupError:
+            return notFound()
+        except ValueError:
+            return JSONResponse({Misc.ERROR_MESSAGE: "'wait' must be a number!"}, status_code=400)
+
+        await job.wait(min(wait, _jobs.settings.maxWait))
+        return jobResponse(job)
+
+    @_provider.provided_service(
+        service_definition=name + JOB_CANCEL_SUFFIX,
+        service_uri=path + JOB_URI,
+        protocol='HTTP',
+        method='DELETE',
+        payload_format='JSON',
+        access_policy='CERTIFICATE',
+        data_model=any
+    )
+    async def ptJobCancel(req: Request[any]) -> Response:
+        """
+        This function cancels a job
+
+        Args:
+            req (Request[any]): request with the 'id' query parameter
+
+        Returns:
+            Response: the job or HTTP 404 if the job is unknown
+        """
+
+        try:
+            job = findJob(req)
+        except LookupError:
+            return notFound()
+
+        job.cancel()
+        await asyncio.sleep(0)
+        return jobResponse(job)
+
+    return {name: path, name + JOB_SUFFIX: path + JOB_URI, name + JOB_CANCEL_SUFFIX: path + JOB_URI}
+
+# ---------------------------------------------------------------------------- #
+#                               NOTEBOOK SERVICES                              #
+# ---------------------------------------------------------------------------- #
+
+class NotebookServices:
+    """
+    Services defined by the notebooks. They follow the changes of the notebook
+    folder (see NotebookWatcher), the registry is updated by the given
+    register and unregister coroutines.
+    ...
+
+    Attributes
+    ----------
+    config: Config
+        config struct
+    provided: Dict[str, Dict[str, str]]
+        provided services (service name: service URI) by notebook URI
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        provider: AsyncClient,
+        executor: BaseExecutor,
+        engine: callable,
+        jobs: JobStore,
+        results: ResultCache,
+        admission: AdmissionControl,
+        register: Callable[[Dict[str, str]], Awaitable[None]],
+        unregister: Callable[[List[str]], Awaitable[None]]
+    ):
+        self.config = config
+        self.provided: Dict[str, Dict[str, str]] = dict()
+        self._provider = provider
+        self._executor = executor
+        self._engine = engine
+        self._jobs = jobs
+        self._results = results
+        self._admission = admission
+        self._register = register
+        self._unregister = unregister
+
+    def provide(self, nb: Notebook) -> Dict[str, str]:
+        """
+        This function defines (or redefines) the services of the notebook
+
+        Args:
+            nb (Notebook): the notebook
+
+        Raises:
+            ValueError: invalid options in the notebook metadata
+
+        Returns:
+            Dict[str, str]: provided services (service name: service URI)
+        """
+
+        # ! reported only, the cells are pruned where the notebook is compiled
+        if self.config.execution.engine == PYNB:
+            try:
+                pruned = prunedCells(readNotebook(nb.file))
+            except (OSError, ValueError, SyntaxError):
+                pruned = list()
+            if pruned:
+                logger.info('Service "{}": cells {} cannot affect the output, they are skipped!', nb.sname, pruned)
+
+        options = readOptions(nb.file)
+
+        # ! every server worker has its own job store, a status request might reach another worker
+        if options.get(MODE_KEY, SYNC) == JOB and self.config.server.workers > 1:
+            logger.warning('Service "{}": job mode isn\'t supported with multiple server workers, it\'s served synchronously!', nb.sname)
+            options = {**options, MODE_KEY: SYNC}
+
+        self.provided[nb.spath] = makeptThread(self.config.nbpath, nb.spath, nb.sname, self._provider, self._executor, self._engine, self._jobs, self._results, self._admission, options)
+        return self.provided[nb.spath]
+
+    def unprovide(self, nb: Notebook) -> Dict[str, str]:
+        """
+        This function removes the services of the notebook
+
+        Args:
+            nb (Notebook): the notebook
+
+        Returns:
+            Dict[str, str]: removed services (service name: service URI)
+        """
+
+        services = self.provided.pop(nb.spath, dict())
+        self._remove(list(services))
+        return services
+
+    async def onAdded(self, nb: Notebook) -> None:
+        """
+        This function provides and registers the services of a new notebook
+
+        Args:
+            nb (Notebook): the added notebook
+        """
+
+        services = self.provide(nb)
+        logger.info('Service "{}" has been added!', nb.sname)
+        await self._register(services)
+
+    async def onChanged(self, nb: Notebook) -> None:
+        """
+        This function redefines the services of a changed notebook, the previous
+        definition is kept if the new one cannot be provided
+
+        Args:
+            nb (Notebook): the changed notebook
+        """
+
+        old = self.provided.get(nb.spath, dict())
+
+        # ! the new version is built first and its routes replace the old ones in place,
+        # ! thus the service is never missing and a broken version doesn't remove it
+        try:
+            # ! compiled in advance, so the first request doesn't pay for it and broken notebooks are reported right away
+            if self.config.execution.engine == PYNB and self.config.execution.executor != PROCESS:
+                await asyncio.to_thread(compileNotebook, self.config.nbpath, nb.spath)
+
+            # ! the service is redefined, since its options (metadata) might have been changed
+            services = self.provide(nb)
         except Exception as e:
-            logger.exception("Cannot run service: {}, due to: {}", name, e)
-            raise ValueError
+            logger.error('Service "{}" cannot be updated, the previous definition is kept! Due to: {}', nb.sname, e)
+            return
 
-        # ------------------------------ EXECUTE SCRIPT ------------------------------ #
-        #output = jpnb_execute(nbRoot, path, data, name)
-        output = pynb_execute(nbRoot, path, data, name)
+        self._remove([sname for sname in old if sname not in services])
+        logger.info('Service "{}" has been updated!', nb.sname)
 
-        logger.debug(name +": Output data: {}", output)
-        return output
-    return ptThread
+        await self._unregister([sname for sname in old if sname not in services])
+        await self._register({sname: spath for sname, spath in services.items() if sname not in old})
+
+    async def onRemoved(self, nb: Notebook) -> None:
+        """
+        This function removes and unregisters the services of a removed notebook
+
+        Args:
+            nb (Notebook): the removed notebook
+        """
+
+        old = self.unprovide(nb)
+        forgetNotebook(self.config.nbpath, nb.spath)
+        logger.info('Service "{}" has been removed!', nb.sname)
+        await self._unregister(list(old))
+
+    def _remove(self, snames: List[str]) -> None:
+        for sname in snames:
+            self._provider.remove_provided_service(sname)
+            self._admission.remove(sname)
 
 def main():
     config = readConfig()
@@ -178,14 +479,30 @@ def main():
         certfile=cPath / 'prototaip.crt.pem'
     ), config.provider.sysid
 
+    # ---------------------------------- JOURNAL --------------------------------- #
+    journal = Journal(config.autoSetup.journal)
+
+    # ! registrations left behind by a crashed run would collide with the new ones
+    if not journal.empty and not config.autoSetup.reconcile:
+        logger.warning("Registrations of a previous run have been found in the journal, they are cleaned up!")
+        journal.forgetAuthRules(asyncio.run(system_setup.removeAuthRules(config, journal.authids)))
+        removed = asyncio.run(system_setup.removeServices(config, [service.id for service in journal.services.values()]))
+        journal.forgetServices([sname for sname, service in journal.services.items() if service.id in removed])
+
     if config.autoSetup.sysReg:
-        sysid = system_setup.setupSystem(config, provider_sys)
+        # ! the system registered by a previous run is adopted
+        if config.autoSetup.reconcile:
+            found = system_setup.findSystem(config, provider_sys)
+        else:
+            found = journal.sysid
+        sysid = found or system_setup.setupSystem(config, provider_sys)
+        journal.recordSystem(sysid)
     
     logger.info("Provider system has been created with ID: {}!", sysid)    
 
     # -------------------------- CONFIG PROVIDER CLIENT -------------------------- #
 
-    provider = AsyncClient.create(
+    provider = system_setup.clientClass(config).create(
         system_name=config.provider.sysName,
         address=config.provider.uri,
         port=config.provider.port,
@@ -208,65 +525,203 @@ def main():
         },
         keyfile=cPath / 'prototaip.key.pem',
         certfile=cPath / 'prototaip.crt.pem',
-        cafile=cPath / 'sysop.ca'
+        cafile=cPath / 'sysop.ca',
+        provider_options={
+            'dispatch': config.server.dispatch,
+            'loop': config.server.loop,
+            'http': config.server.http,
+            'keep_alive_timeout': config.server.keepAliveTimeout,
+            'backlog': config.server.backlog,
+            'limit_concurrency': config.server.limitConcurrency or None,
+            'h11_max_incomplete_event_size': config.server.h11MaxIncompleteEventSize or None,
+            'graceful_shutdown_timeout': config.server.drainTimeout,
+        },
+        consumer_options=system_setup.consumerOptions(config)
+    )
+
+    # ----------------------------- CONFIG EXECUTOR ----------------------------- #
+    # ! only the pynb engine compiles notebooks, the worker template precompiles them for it
+    executor = makeExecutor(config.execution, config.nbpath if config.execution.engine == PYNB else None)
+    # ! every server worker would register the changes, the notebooks are read once at startup
+    watching = config.watch.enabled and config.server.workers <= 1
+    engine = makeEngine(config.execution, writeBack=not watching)
+    logger.info("Notebooks will be executed by the '{}' engine and the '{}' executor!", config.execution.engine, config.execution.executor)
+
+    # ! kernels of process executors are started by the workers themselves
+    if config.execution.engine == JPNB and config.execution.executor != PROCESS:
+        if config.server.workers > 1:
+            # ! every server worker starts its own pool, they can't share one forked from here
+            provider.provider.add_startup_routine(lambda: getKernelPool(config.execution.kernels))
+        else:
+            getKernelPool(config.execution.kernels)
+            logger.info("Kernel pool has been started!")
+
+    # ! executors and kernel pools are per process, server workers stop their own ones
+    if config.server.workers > 1:
+        provider.provider.add_shutdown_routine(executor.shutdown)
+        provider.provider.add_shutdown_routine(shutdownKernelPool)
+        logger.info("Web server will run {} worker processes!", config.server.workers)
+
+    # ---------------------------------- JOBS ---------------------------------- #
+    jobs = JobStore(config.jobs)
+    provider.provider.add_drain_routine(lambda: jobs.drain(config.server.drainTimeout))
+    provider.provider.add_shutdown_routine(jobs.cancel)
+
+    results = ResultCache(config.resultCache)
+    admission = AdmissionControl(config.limits)
+
+    # --------------------------------- METRICS --------------------------------- #
+    @provider.provided_service(
+        service_definition=METRICS_SERVICE,
+        service_uri=METRICS_URI,
+        protocol='HTTP',
+        method='GET',
+        payload_format='JSON',
+        access_policy='CERTIFICATE',
+        data_model=any
     )
+    async def metrics(req: Request[any]) -> Response:
+        """
+        This function returns the counters of the adapter
+
+        Args:
+            req (Request[any]): request from webservice
+
+        Returns:
+            Response: limits, queues and rejections, cache, job and connection pool counters
+        """
+
+        return Response(dumps({
+            "admission": admission.stats(),
+            "resultCache": results.stats(),
+            "notebookCache": cacheStats(),
+            "jobs": jobs.stats(),
+            "connectionPools": {
+                "provider": system_setup.poolMetrics(provider),
+                "sysop": system_setup.poolMetrics()
+            }
+        }), media_type=JSON_MEDIA_TYPE)
 
     # ---------------------- CREATING AND REGISTER SERVICES ---------------------- #
-    services = list()
+    notebooks = discoverNotebooks(config.nbpath)
 
-    for path, _, files in os.walk(config.nbpath):
-        for name in files:
-            if fnmatch(name, IPYNB_EXT):
-                services.append(pathlib.PurePath(path, name))
-    
-    logger.debug("The following services will be created: {}", [str(service.stem).replace(" ", "-").replace("_", "-") for service in services])
+    logger.debug("The following services will be created: {}", [nb.sname for nb in notebooks.values()])
 
-    # ----------------------------- GET SERVICE NAMES ---------------------------- #
-    service_ids = list()
+    service_ids = dict()
+    provided = dict()
 
-    for service in services:
-        spath = str(service.relative_to(config.nbpath).with_suffix('')).replace(" ", "-").replace("_", "-")
-        sname = str(service.stem).replace(" ", "-").replace("_", "-")
+    # ! services and authorization rules are registered concurrently (see system_setup)
+    authids = list()
 
-        # ----------------------------- DEFINING SERVICE ----------------------------- #
-        makeptThread(config.nbpath, spath, sname, provider)
+    async def register(services: Dict[str, str]) -> None:
+        if not config.autoSetup.serviceReg or not services:
+            return
 
-        # ----------------------------- REGISTER SERVICE ----------------------------- #
-        if config.autoSetup.serviceReg:
-            try:
-                service_ids.append(system_setup.registerService(provider_sys, spath, sname))
-                logger.debug('Service "{}" registered successfully!', sname)
-            except Exception:
-                logger.warning('Service "{}" cannot be registered!', sname)
+        # ! services that cannot be registered are reported and left out
+        ids = await system_setup.registerServices(config, provider_sys, services)
+        service_ids.update(ids)
+        journal.recordServices(ids)
+
+        if config.autoSetup.authRules and ids:
+            created = await system_setup.setupAuthRules(config, [service.definitionId for service in ids.values()], sysid)
+            authids.extend(created)
+            journal.recordAuthRules(created)
+
+    async def unregister(snames: List[str]) -> None:
+        snames = [sname for sname in snames if sname in service_ids]
+        removed = await system_setup.removeServices(config, [service_ids[sname].id for sname in snames])
+
+        # ! services that cannot be unregistered are kept in the journal for the next run
+        journal.forgetServices([sname for sname in snames if service_ids[sname].id in removed])
+        for sname in snames:
+            service_ids.pop(sname)
+
+    async def reconcile(services: Dict[str, str]) -> None:
+        service_ids.update(await system_setup.reconcileServices(config, provider_sys, sysid, services))
+
+        if config.autoSetup.authRules:
+            authids.extend(await system_setup.reconcileAuthRules(config, [service.definitionId for service in service_ids.values()], sysid))
+
+        journal.replace(service_ids, authids)
+
+    # ----------------------------- DEFINING SERVICES ---------------------------- #
+    notebookServices = NotebookServices(config, provider, executor, engine, jobs, results, admission, register, unregister)
+    services = dict()
+
+    for nb in notebooks.values():
+        services.update(notebookServices.provide(nb))
 
-    logger.info("Services have been registered!")
+    # ----------------------------- REGISTER SERVICES ---------------------------- #
+    if config.autoSetup.serviceReg:
+        asyncio.run(reconcile(services) if config.autoSetup.reconcile else register(services))
+        logger.info("{}/{} services have been registered!", len(service_ids), len(services))
+
+        if authids:
+            logger.info("Authorization rules has been set up!")
+
+    # -------------------------------- HOT RELOAD -------------------------------- #
+    watcher = None
+
+    if config.watch.enabled and not watching:
+        logger.warning("Watching the notebook folder isn't supported with multiple server workers, it's disabled!")
+    elif watching:
+        watcher = NotebookWatcher(config.nbpath, config.watch.interval, notebooks, notebookServices.onAdded, notebookServices.onChanged, notebookServices.onRemoved)
+        provider.provider.add_startup_routine(watcher.start)
+        provider.provider.add_shutdown_routine(watcher.stop)
+
+    # ----------------------------------- DRAIN ---------------------------------- #
+    async def drain() -> None:
+        logger.warning("Graceful shutdown! Please wait...")
+
+        # ! no services are registered again by the watcher
+        if watcher is not None:
+            await watcher.stop()
 
-    # ----------------------------- SETUP AUTH RULES ----------------------------- #
-    if config.autoSetup.authRules and config.autoSetup.serviceReg:
-        authids = system_setup.setupAuth(config, service_ids, sysid)
-        logger.info("Authorization rules has been set up!")
+        # ! consumers stop getting this provider from the orchestrator, while it still serves
+        if service_ids and not config.autoSetup.reconcile:
+            await unregister(list(service_ids))
+            logger.info("Services has been unregistered successfully!")
+
+        if config.server.drainDelay > 0:
+            await asyncio.sleep(config.server.drainDelay)
+
+    provider.provider.add_drain_routine(drain, once=True)
 
     # ------------------------------ WAIT FOR SIGNAL ----------------------------- #
-    provider.run_forever()
+    provider.run_forever(workers=config.server.workers)
+
+    # ----------------------------- STOP EXECUTOR ----------------------------- #
+    executor.shutdown()
+    shutdownKernelPool()
+    logger.info("Notebook executor has been stopped!")
 
-    logger.warning("Graceful shutdown! Please wait...")
+    # ! the registrations are kept for the next run, which only registers the difference
+    if config.autoSetup.reconcile:
+        logger.info("Registrations have been kept (reconcile mode)!")
+        logger.info("Application has been shuted down gracefully!")
+        return
 
     # ----------------------------- REMOVE AUTH RULES ---------------------------- #
-    if config.autoSetup.authRules and config.autoSetup.serviceReg:
-        system_setup.removeAuth(authids)
+    if authids:
+        journal.forgetAuthRules(asyncio.run(system_setup.removeAuthRules(config, authids)))
         logger.info("Authorization rules has been removed successfully!")
 
     # ------------------------------ REMOVE SERVICES ----------------------------- #
-    if config.autoSetup.serviceReg:
-        for service_id in service_ids:
-            system_setup.removeService(service_id)
+    # ! unregistered while draining already, unless the drain has been interrupted
+    if config.autoSetup.serviceReg and service_ids:
+        asyncio.run(unregister(list(service_ids)))
         logger.info("Services has been unregistered successfully!")
 
     # ------------------------------- REMOVE SYSTEM ------------------------------ #
     if config.autoSetup.sysReg:
         system_setup.removeSystem(sysid)
+        journal.recordSystem(None)
         logger.info("System has been removed successfully!")
 
+    # ! whatever couldn't be removed is cleaned up by the next run
+    if journal.empty:
+        journal.clear()
+
     logger.info("Application has been shuted down gracefully!")
 
 if __name__ == "__main__":
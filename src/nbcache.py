@@ -0,0 +1,424 @@
+# ---------------------------------------------------------------------------- #
+#                                NOTEBOOK CACHE                                #
+# ---------------------------------------------------------------------------- #
+
+#! Notebooks are converted natively: the code cells are parsed and compiled one
+#! by one (nbconvert isn't needed), thus tracebacks refer to the cell and its
+#! own line numbers. A few IPython magics without effect in a service are
+#! dropped, the others are rejected when the notebook is compiled.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import ast
+import json
+import linecache
+import nbformat
+import os
+import re
+import threading
+
+from dataclasses import dataclass
+from loguru import logger
+from nbformat import NotebookNode
+from pathlib import Path
+from types import CodeType
+from typing import Dict, List, Tuple
+
+from pruning import PRUNE_KEY, liveCells
+
+# --------------------------------- CONSTANTS -------------------------------- #
+SETUP_TAG = "setup"
+HANDLER_TAG = "handler"
+OPTIONS_KEY = "prototaip"
+
+# ! magics only affecting an interactive session, they are dropped
+IGNORED_MAGICS = ("matplotlib", "config", "load_ext", "reload_ext", "autoreload", "aimport")
+# ! magics executing their statement (or cell) as it is
+TRANSPARENT_MAGICS = ("time",)
+
+_MAGIC = re.compile(r"^(\s*)%(%?)(\w+)(.*)$")
+_SHELL = re.compile(r"^\s*(\w+\s*=\s*)?!")
+_HELP = re.compile(r"^\s*(\?\??[\w.]+|[\w.]+\?\??)\s*$")
+
+# ---------------------------------------------------------------------------- #
+#                                  DATACLASSES                                 #
+# ---------------------------------------------------------------------------- #
+
+@dataclass
+class CacheEntry:
+    """
+    Dataclass to store a converted and compiled notebook
+    ...
+
+    Attributes
+    ----------
+    mtime: int
+        modification time of the notebook file (in nanoseconds) at conversion
+    size: int
+        size of the notebook file (in bytes) at conversion
+    nb: NotebookNode
+        parsed notebook (must not be modified)
+    script: str
+        python source converted from the notebook (for reference only)
+    code: List[CodeType]
+        compiled code objects of the code cells (executed in order)
+    setup: List[CodeType]
+        compiled code of the cells tagged as 'setup' (None if there isn't any)
+    handler: List[CodeType]
+        compiled code of the cells executed on every request if there are setup
+        cells: the cells tagged as 'handler', or every other code cell if there
+        isn't any handler tag
+    namespace: dict
+        namespace created by the setup cells (populated by the engine)
+    pruned: List[int]
+        numbers of the code cells skipped, since they cannot affect the output
+    """
+    mtime: int
+    size: int
+    nb: NotebookNode
+    script: str
+    code: List[CodeType]
+    setup: List[CodeType] = None
+    handler: List[CodeType] = None
+    namespace: dict = None
+    pruned: List[int] = None
+
+# ---------------------------------------------------------------------------- #
+#                                     CACHE                                    #
+# ---------------------------------------------------------------------------- #
+
+class NotebookCache:
+    """
+    Cache for converted and compiled notebooks. Entries are keyed by the path of
+    the notebook and they are invalidated when the modification time or the size
+    of the file changes.
+    ...
+
+    Attributes
+    ----------
+    hits: int
+        number of lookups served from the cache
+    misses: int
+        number of lookups that required a (re)conversion
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, CacheEntry] = dict()
+        self._notebooks: Dict[str, Tuple[int, int, NotebookNode]] = dict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, nbPath: Path) -> CacheEntry:
+        """
+        This function returns the compiled notebook, it converts the notebook
+        only if it isn't cached yet or the file has been changed since
+
+        Args:
+            nbPath (Path): path for the nb file
+
+        Raises:
+            SyntaxError: a code cell is invalid or it uses an unsupported magic
+
+        Returns:
+            CacheEntry: converted and compiled notebook
+        """
+
+        key = str(nbPath)
+
+        # ! stat before reading, so a concurrent edit is detected by the next lookup
+        stat = os.stat(nbPath)
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.mtime == stat.st_mtime_ns and entry.size == stat.st_size:
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        with self._lock:
+            self.misses += 1
+
+        nb = readNotebook(nbPath)
+        numbers = {id(cell): i for i, cell in enumerate(nb.cells, 1)}
+        cells = [cell for cell in nb.cells if cell.cell_type == "code"]
+        trees = {id(cell): _parseCell(cell.source, "{} (cell {})".format(key, numbers[id(cell)])) for cell in cells}
+
+        # ---------------------------------- PRUNING --------------------------------- #
+        pruned = prunedCells(nb, [trees[id(cell)] for cell in cells])
+        cells = [cell for cell in cells if numbers[id(cell)] not in pruned]
+
+        if pruned:
+            logger.debug("Cells {} of '{}' cannot affect the output, they are skipped!", pruned, key)
+
+        code = {id(cell): _compileCell(cell.source, trees[id(cell)], "{} (cell {})".format(key, numbers[id(cell)])) for cell in cells}
+
+        entry = CacheEntry(
+            mtime=stat.st_mtime_ns,
+            size=stat.st_size,
+            nb=nb,
+            script=_convert(nb),
+            code=[code[id(cell)] for cell in cells],
+            pruned=pruned
+        )
+
+        # ------------------------------- TAGGED CELLS ------------------------------- #
+        setup = _tagged(nb, SETUP_TAG)
+
+        if setup:
+            handler = _tagged(nb, HANDLER_TAG) or [cell for cell in nb.cells if cell.cell_type == "code" and not any(cell is s for s in setup)]
+            entry.setup = [code[id(cell)] for cell in setup if id(cell) in code]
+            entry.handler = [code[id(cell)] for cell in handler if id(cell) in code]
+
+        self._entries[key] = entry
+        logger.debug("Notebook '{}' has been compiled and cached!", key)
+
+        return entry
+
+    def getNotebook(self, nbPath: Path) -> NotebookNode:
+        """
+        This function returns the parsed notebook without compiling it (e.g.
+        for a Jupyter kernel, which runs magics and shell commands as well), it
+        reads the notebook only if it isn't cached yet or the file has been
+        changed since
+
+        Args:
+            nbPath (Path): path for the nb file
+
+        Returns:
+            NotebookNode: parsed notebook (must not be modified)
+        """
+
+        key = str(nbPath)
+
+        stat = os.stat(nbPath)
+        cached = self._notebooks.get(key)
+
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            with self._lock:
+                self.hits += 1
+            return cached[2]
+
+        with self._lock:
+            self.misses += 1
+
+        nb = readNotebook(nbPath)
+        self._notebooks[key] = (stat.st_mtime_ns, stat.st_size, nb)
+
+        return nb
+
+    def invalidate(self, nbPath: Path = None) -> None:
+        """
+        This function drops one (or every) entry from the cache
+
+        Args:
+            nbPath (Path, optional): path for the nb file, drops every entry if omitted
+        """
+
+        with self._lock:
+            if nbPath is None:
+                self._entries.clear()
+                self._notebooks.clear()
+            else:
+                self._entries.pop(str(nbPath), None)
+                self._notebooks.pop(str(nbPath), None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        This function returns the counters of the cache
+
+        Returns:
+            Dict[str, int]: number of entries, hits and misses
+        """
+
+        return {"entries": len(self._entries) + len(self._notebooks), "hits": self.hits, "misses": self.misses}
+
+# ---------------------------------------------------------------------------- #
+#                                   FUNCTIONS                                  #
+# ---------------------------------------------------------------------------- #
+
+def readOptions(nbPath: Path) -> dict:
+    """
+    This function returns the PrototAIp options of the notebook, i.e. the
+    'prototaip' object of the notebook metadata
+
+    Args:
+        nbPath (Path): path for the nb file
+
+    Returns:
+        dict: options of the notebook (empty if there isn't any)
+    """
+
+    try:
+        with open(nbPath, "r") as f:
+            return json.load(f).get("metadata", {}).get(OPTIONS_KEY, {})
+    except (OSError, ValueError) as e:
+        logger.warning("Cannot read options of notebook '{}', due to: {}", nbPath, e)
+        return dict()
+
+def readNotebook(nbPath: Path) -> NotebookNode:
+    """
+    This function reads the notebook file, v4 notebooks are loaded without
+    schema validation, older ones are upgraded by nbformat
+
+    Args:
+        nbPath (Path): path for the nb file
+
+    Returns:
+        NotebookNode: parsed notebook (v4)
+    """
+
+    with open(nbPath, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    if raw.get("nbformat") != 4:
+        return nbformat.reads(json.dumps(raw), as_version=4)
+
+    nb = nbformat.from_dict(raw)
+
+    for cell in nb.cells:
+        if isinstance(cell.get("source"), list):
+            cell.source = "".join(cell.source)
+        cell.setdefault("metadata", nbformat.NotebookNode())
+
+    return nb
+
+def prunedCells(nb: NotebookNode, trees: List[ast.Module] = None) -> List[int]:
+    """
+    This function returns the code cells that cannot affect the output of the
+    notebook (see pruning.py), if pruning is enabled in the notebook metadata
+    ('prune': true)
+
+    Args:
+        nb (NotebookNode): notebook
+        trees (List[ast.Module], optional): syntax trees of the code cells, parsed if omitted
+
+    Raises:
+        SyntaxError: a code cell is invalid or it uses an unsupported magic
+
+    Returns:
+        List[int]: numbers of the prunable cells (1-based, as positions in the notebook)
+    """
+
+    if nb.get("metadata", {}).get(OPTIONS_KEY, {}).get(PRUNE_KEY, False) is not True:
+        return list()
+
+    numbers = [i for i, cell in enumerate(nb.cells, 1) if cell.cell_type == "code"]
+
+    if trees is None:
+        trees = [_parseCell(nb.cells[i - 1].source, "cell {}".format(i)) for i in numbers]
+
+    return [i for i, live in zip(numbers, liveCells(trees)) if not live]
+
+def _parseCell(source: str, filename: str) -> ast.Module:
+    """
+    This function parses the source of a code cell
+
+    Args:
+        source (str): source of the cell
+        filename (str): name of the cell (for errors)
+
+    Raises:
+        SyntaxError: invalid source or unsupported magic
+
+    Returns:
+        ast.Module: syntax tree of the cell
+    """
+
+    try:
+        tree = ast.parse(source, filename)
+    except SyntaxError:
+        # ! valid python is never rewritten, only cells that might contain magics
+        tree = ast.parse(_transformMagics(source, filename), filename)
+
+    return tree
+
+def _compileCell(source: str, tree: ast.Module, filename: str) -> CodeType:
+    """
+    This function compiles a parsed code cell, the source is registered in the
+    line cache, so tracebacks show the lines of the cell
+
+    Args:
+        source (str): source of the cell
+        tree (ast.Module): syntax tree of the cell
+        filename (str): name of the cell in tracebacks
+
+    Returns:
+        CodeType: compiled code of the cell
+    """
+
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    return compile(tree, filename, "exec")
+
+def _transformMagics(source: str, filename: str) -> str:
+    """
+    This function rewrites the IPython magics of a cell to plain python, the
+    number of lines is kept, thus line numbers still refer to the cell
+
+    Args:
+        source (str): source of the cell
+        filename (str): name of the cell (for errors)
+
+    Raises:
+        SyntaxError: unsupported magic, shell command or help request
+
+    Returns:
+        str: python source
+    """
+
+    lines = source.split("\n")
+
+    for lineno, line in enumerate(lines, 1):
+        def reject(reason: str) -> SyntaxError:
+            return SyntaxError("{} isn't supported by the pynb engine".format(reason), (filename, lineno, 1, line))
+
+        magic = _MAGIC.match(line)
+
+        if magic is not None:
+            indent, cellMagic, name, rest = magic.groups()
+
+            # ------------------------------- CELL MAGICS ------------------------------ #
+            if cellMagic:
+                if lineno != 1 or name not in TRANSPARENT_MAGICS:
+                    raise reject("Cell magic '%%{}'".format(name))
+                lines[0] = "pass"
+
+            # ------------------------------- LINE MAGICS ------------------------------ #
+            elif name in IGNORED_MAGICS:
+                lines[lineno - 1] = indent + "pass"
+            elif name in TRANSPARENT_MAGICS and rest.strip():
+                lines[lineno - 1] = indent + rest.strip()
+            else:
+                raise reject("Magic '%{}'".format(name))
+
+        elif _SHELL.match(line):
+            raise reject("Shell command")
+        elif _HELP.match(line):
+            raise reject("Help request")
+
+    return "\n".join(lines)
+
+def _convert(nb: NotebookNode) -> str:
+    """
+    This function concatenates the code cells of the notebook to a script
+
+    Args:
+        nb (NotebookNode): notebook to be converted
+
+    Returns:
+        str: python source
+    """
+
+    return "\n\n".join("# In[{}]:\n{}\n".format(i, cell.source) for i, cell in enumerate(nb.cells, 1) if cell.cell_type == "code")
+
+def _tagged(nb: NotebookNode, tag: str) -> List[NotebookNode]:
+    """
+    This function returns the code cells with the given tag (cell metadata)
+
+    Args:
+        nb (NotebookNode): notebook
+        tag (str): tag to be searched
+
+    Returns:
+        List[NotebookNode]: tagged code cells
+    """
+
+    return [cell for cell in nb.cells if cell.cell_type == "code" and tag in cell.metadata.get("tags", [])]
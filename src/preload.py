@@ -0,0 +1,80 @@
+# ---------------------------------------------------------------------------- #
+#                               WORKER TEMPLATE                                #
+# ---------------------------------------------------------------------------- #
+#! This module is imported by the template (forkserver) process of the process
+#! executor, before it forks any worker. The configured modules are imported,
+#! the notebooks are compiled into the cache and the heap is frozen, thus every
+#! worker starts warm and shares these pages with the template copy-on-write.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import gc
+import importlib
+import json
+import os
+
+from loguru import logger
+from typing import List
+
+# --------------------------------- CONSTANTS -------------------------------- #
+PRELOAD_ENV = "PROTOTAIP_PRELOAD"
+
+# ---------------------------------------------------------------------------- #
+#                                   FUNCTIONS                                  #
+# ---------------------------------------------------------------------------- #
+
+def settings(modules: List[str], nbRoot: str = None) -> str:
+    """
+    This function serializes the preload settings for the template process
+    (passed in the PROTOTAIP_PRELOAD environment variable)
+
+    Args:
+        modules (List[str]): modules to be imported
+        nbRoot (str, optional): root path for notebooks to be compiled
+
+    Returns:
+        str: serialized settings
+    """
+
+    return json.dumps({"modules": modules, "nbRoot": nbRoot})
+
+def preload(modules: List[str], nbRoot: str = None) -> None:
+    """
+    This function imports the modules, compiles every notebook under the root
+    path and freezes the heap. Failures are logged only, a cold worker still
+    works.
+
+    Args:
+        modules (List[str]): modules to be imported
+        nbRoot (str, optional): root path for notebooks to be compiled
+    """
+
+    # ! the collector would touch (and thus copy) every shared page in the workers
+    gc.disable()
+
+    # ---------------------------------- MODULES --------------------------------- #
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning("Module '{}' cannot be preloaded! Due to: {!r}", name, e)
+
+    # --------------------------------- NOTEBOOKS -------------------------------- #
+    if nbRoot:
+        from engines import compileNotebook
+        from watcher import discoverNotebooks
+
+        for nb in discoverNotebooks(nbRoot).values():
+            try:
+                compileNotebook(nbRoot, nb.spath)
+            except Exception as e:
+                logger.warning("Notebook '{}' cannot be precompiled! Due to: {!r}", nb.spath, e)
+
+    gc.collect()
+    gc.freeze()
+    gc.enable()
+
+    logger.debug("Worker template has been preloaded: {} modules, {} objects frozen!", len(modules), gc.get_freeze_count())
+
+# ! runs on import in the template process only
+if PRELOAD_ENV in os.environ:
+    preload(**json.loads(os.environ[PRELOAD_ENV]))
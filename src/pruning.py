@@ -0,0 +1,378 @@
+# ---------------------------------------------------------------------------- #
+#                               DEAD CELL PRUNING                              #
+# ---------------------------------------------------------------------------- #
+#! A def-use graph of the code cells is built from their syntax trees, then the
+#! cells are walked backwards from 'output': a cell is kept only if it binds or
+#! modifies a name that a later kept cell uses. The analysis is conservative:
+#! cells with visible effects (raise, assert, or any call that isn't known to
+#! be free of effects: files, requests, plots...) are always kept and notebooks
+#! it cannot follow (exec, star imports, global...) are not pruned. Pruning is
+#! opt-in per notebook ('prune': true in the notebook metadata).
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import ast
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+# --------------------------------- CONSTANTS -------------------------------- #
+PRUNE_KEY = "prune"
+OUTPUT_NAME = "output"
+
+# ! calls hiding name bindings from the analysis
+DYNAMIC_CALLS = ("exec", "eval", "globals", "locals", "vars", "__import__", "setattr", "delattr")
+# ! calls that only display their arguments
+SINK_CALLS = ("print", "display")
+# ! builtins without effects, they don't modify their arguments either
+PURE_CALLS = (
+    "abs", "all", "any", "bool", "bytes", "chr", "complex", "dict", "divmod", "enumerate", "float",
+    "format", "frozenset", "hash", "int", "isinstance", "issubclass", "len", "list", "max", "min",
+    "ord", "pow", "range", "repr", "reversed", "round", "set", "slice", "sorted", "str", "sum",
+    "tuple", "type", "zip"
+)
+# ! methods of the built-in containers and strings that modify their receiver at most (e.g.
+# ! list.append), thus they're bindings. Other objects might have methods of the same name
+# ! with effects (e.g. a database client's insert), see CONTAINER_CALLS.
+PURE_METHODS = (
+    "append", "extend", "insert", "pop", "remove", "clear", "copy", "update", "setdefault", "add",
+    "discard", "sort", "reverse", "get", "keys", "values", "items", "index", "count", "join", "split",
+    "rsplit", "strip", "lstrip", "rstrip", "replace", "lower", "upper", "title", "format",
+    "startswith", "endswith", "encode", "decode", "splitlines"
+)
+# ! builtins creating containers, a name bound only to these (or to literals) is a container
+CONTAINER_CALLS = ("dict", "list", "set", "str")
+# ! modules whose functions are all free of effects
+PURE_MODULES = ("math", "cmath", "statistics", "re", "string", "operator", "itertools", "fractions", "decimal")
+# ! functions of other modules free of effects (top level module, function name)
+PURE_MODULE_CALLS = (
+    ("json", "dumps"), ("json", "loads"), ("os", "join"), ("os", "basename"), ("os", "dirname"),
+    ("copy", "copy"), ("copy", "deepcopy"), ("numpy", "array"), ("numpy", "asarray")
+)
+# ! modules whose functions only render their arguments
+DISPLAY_MODULES = ("IPython", "pprint")
+
+# ---------------------------------------------------------------------------- #
+#                                  DATACLASSES                                 #
+# ---------------------------------------------------------------------------- #
+
+@dataclass
+class CellFlow:
+    """
+    Dataclass to store the def-use information of a code cell
+    ...
+
+    Attributes
+    ----------
+    defs: Set[str]
+        names bound or modified by the cell
+    uses: Set[str]
+        names read by the cell
+    calls: Set[str]
+        names of the called functions (resolved later: user functions might modify
+        more names, anything else is an effect)
+    effect: bool
+        the cell has effects outside of the namespace (always kept)
+    dynamic: bool
+        the cell binds names the analysis cannot follow (disables pruning)
+    """
+    defs: Set[str] = field(default_factory=set)
+    uses: Set[str] = field(default_factory=set)
+    calls: Set[str] = field(default_factory=set)
+    effect: bool = False
+    dynamic: bool = False
+
+# ---------------------------------------------------------------------------- #
+#                                   ANALYSIS                                   #
+# ---------------------------------------------------------------------------- #
+
+def _root(node: ast.expr) -> ast.expr:
+    """
+    This function returns the root of an attribute, subscript or call chain,
+    e.g. the name 'df' for df.groupby("a")["b"].sum
+
+    Args:
+        node (ast.expr): expression
+
+    Returns:
+        ast.expr: root of the chain
+    """
+
+    while isinstance(node, (ast.Attribute, ast.Subscript, ast.Starred, ast.Call)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node
+
+def _base(node: ast.expr) -> str:
+    """
+    This function returns the root name of a chain (see _root())
+
+    Args:
+        node (ast.expr): expression
+
+    Returns:
+        str: root name, None if the chain doesn't start with a name
+    """
+
+    node = _root(node)
+    return node.id if isinstance(node, ast.Name) else None
+
+class _DefUseVisitor(ast.NodeVisitor):
+    """
+    Collects the def-use information of a cell. Names bound in function and
+    class bodies are attributed to the cell as well (over-approximation), the
+    names bound and the effects of a function body are also collected per
+    function. Every call is an effect unless it is known to be free of effects
+    (see PURE_CALLS, PURE_MODULES and PURE_METHODS of containers) or it calls a
+    user function.
+    """
+
+    def __init__(self, modules: Dict[str, str], containers: Set[str]):
+        self.flow = CellFlow()
+        self.functions: Dict[str, CellFlow] = dict()
+        self._modules = modules
+        self._containers = containers
+        self._stack: List[CellFlow] = [self.flow]
+
+    def _def(self, name: str) -> None:
+        for flow in self._stack:
+            flow.defs.add(name)
+
+    def _effect(self) -> None:
+        # ! in a function body it's the effect of calling the function, not of defining it
+        self._stack[-1].effect = True
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.flow.uses.add(node.id)
+        else:
+            self._def(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if not isinstance(node.ctx, ast.Load):
+            name = _base(node)
+            if name is None or name in self._modules:
+                # ! e.g. f().x = 1 or module state: the effect cannot be attributed to a name
+                self._effect()
+            else:
+                self._def(name)
+        self.generic_visit(node)
+
+    visit_Subscript = visit_Attribute
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._def(node.name)
+        self.functions[node.name] = CellFlow()
+        self._stack.append(self.functions[node.name])
+        self.generic_visit(node)
+        self._stack.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._def(node.name)
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self._def(alias.asname or alias.name.split(".")[0])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name == "*":
+                self.flow.dynamic = True
+            else:
+                self._def(alias.asname or alias.name)
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.flow.dynamic = True
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Raise(self, node: ast.Raise) -> None:
+        self._effect()
+        self.generic_visit(node)
+
+    visit_Assert = visit_Raise
+
+    def _pureModuleCall(self, module: str, name: str) -> bool:
+        return module in PURE_MODULES or module in DISPLAY_MODULES or (module, name) in PURE_MODULE_CALLS
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        arguments = [_base(arg) for arg in node.args] + [_base(keyword.value) for keyword in node.keywords]
+
+        # ------------------------------- FUNCTION CALL ------------------------------ #
+        if isinstance(func, ast.Name):
+            if func.id in DYNAMIC_CALLS:
+                self.flow.dynamic = True
+            elif func.id in SINK_CALLS or func.id in PURE_CALLS:
+                pass
+            elif func.id in self._modules:
+                # ! imported function (from module import function)
+                if not self._pureModuleCall(self._modules[func.id], func.id):
+                    self._effect()
+            else:
+                # ! a user function might modify its arguments, its effects are resolved later
+                # ! (anything else, e.g. a builtin like open(), is an effect)
+                for name in filter(None, arguments):
+                    self._def(name)
+                self._stack[-1].calls.add(func.id)
+
+        # -------------------------------- METHOD CALL ------------------------------- #
+        elif isinstance(func, ast.Attribute):
+            receiver = _base(func)
+
+            if receiver is None:
+                # ! methods of literals (e.g. ", ".join) don't modify anything
+                if not isinstance(_root(func), ast.Constant):
+                    self._effect()
+            elif receiver in self._modules:
+                if not self._pureModuleCall(self._modules[receiver], func.attr):
+                    self._effect()
+            elif func.attr in PURE_METHODS and isinstance(func.value, ast.Name) and receiver in self._containers:
+                # ! a method of a container modifies its receiver at most
+                self._def(receiver)
+            else:
+                # ! e.g. df.to_csv(), fig.savefig(), session.post(), db.audit.insert()
+                self._def(receiver)
+                self._effect()
+
+        else:
+            # ! e.g. a called lambda or a call of a call
+            self._effect()
+
+        self.generic_visit(node)
+
+def _imports(trees: List[ast.Module]) -> Dict[str, str]:
+    """
+    This function collects the names bound to modules (or module members) by
+    the import statements of the cells
+
+    Args:
+        trees (List[ast.Module]): syntax trees of the cells
+
+    Returns:
+        Dict[str, str]: top level module by bound name
+    """
+
+    modules = dict()
+
+    for tree in trees:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    modules[alias.asname or alias.name.split(".")[0]] = alias.name.split(".")[0]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                for alias in node.names:
+                    modules[alias.asname or alias.name] = node.module.split(".")[0]
+
+    return modules
+
+def _containers(trees: List[ast.Module]) -> Set[str]:
+    """
+    This function collects the names that are bound only to literals or to new
+    built-in containers (see CONTAINER_CALLS) by the cells, thus PURE_METHODS
+    can be trusted on them. Augmented assignments (e.g. s += "x") don't change
+    the type of a container.
+
+    Args:
+        trees (List[ast.Module]): syntax trees of the cells
+
+    Returns:
+        Set[str]: names of containers
+    """
+
+    nodes = [node for tree in trees for node in ast.walk(tree)]
+
+    # ! a builtin can be shadowed by the notebook
+    shadowed = {node.id for node in nodes if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load)}
+    shadowed |= {node.name for node in nodes if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))}
+
+    def container(value: ast.expr) -> bool:
+        if isinstance(value, (ast.Constant, ast.JoinedStr, ast.List, ast.Tuple, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)):
+            return True
+        return isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id in CONTAINER_CALLS and value.func.id not in shadowed
+
+    bindings = set()
+    neutral = set()
+
+    for node in nodes:
+        if isinstance(node, ast.Assign) and container(node.value):
+            bindings |= {id(target) for target in node.targets if isinstance(target, ast.Name)}
+        elif isinstance(node, (ast.AnnAssign, ast.NamedExpr)) and node.value is not None and container(node.value):
+            bindings.add(id(node.target))
+        elif isinstance(node, ast.AugAssign):
+            neutral.add(id(node.target))
+
+    containers = set()
+    others = set()
+
+    for node in nodes:
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load) and id(node) not in neutral:
+            (containers if id(node) in bindings else others).add(node.id)
+        elif isinstance(node, ast.arg):
+            others.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            others.add(node.name)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            others.add(node.name)
+
+    return containers - others
+
+def liveCells(trees: List[ast.Module]) -> List[bool]:
+    """
+    This function decides which cells can affect 'output'
+
+    Args:
+        trees (List[ast.Module]): syntax trees of the code cells (in execution order)
+
+    Returns:
+        List[bool]: True for the cells to be kept (every cell if the notebook cannot be analysed)
+    """
+
+    modules = _imports(trees)
+    containers = _containers(trees)
+    flows: List[CellFlow] = list()
+    functions: Dict[str, CellFlow] = dict()
+
+    for tree in trees:
+        visitor = _DefUseVisitor(modules, containers)
+        visitor.visit(tree)
+        flows.append(visitor.flow)
+        functions.update(visitor.functions)
+
+    if any(flow.dynamic for flow in flows) or not any(OUTPUT_NAME in flow.defs for flow in flows):
+        return [True] * len(trees)
+
+    # ---------------------------- USER FUNCTION CALLS --------------------------- #
+    # ! calling a user function modifies whatever its body (or its callees) modifies,
+    # ! calling anything else that isn't known to be pure is an effect
+    def resolve(name: str, seen: Set[str]) -> CellFlow:
+        if name not in functions:
+            return CellFlow(effect=True)
+        if name in seen:
+            return CellFlow()
+        seen.add(name)
+        flow = CellFlow(defs=set(functions[name].defs), effect=functions[name].effect)
+        for callee in functions[name].calls:
+            callee = resolve(callee, seen)
+            flow.defs |= callee.defs
+            flow.effect |= callee.effect
+        return flow
+
+    for flow in flows:
+        for name in flow.calls:
+            called = resolve(name, set())
+            flow.defs |= called.defs
+            flow.effect |= called.effect
+
+    # ------------------------------ BACKWARD PASS ------------------------------- #
+    live = {OUTPUT_NAME}
+    keep = [False] * len(flows)
+
+    for i in reversed(range(len(flows))):
+        if flows[i].effect or flows[i].defs & live:
+            keep[i] = True
+            # ! bindings aren't killed, a conditional binding must not hide earlier ones
+            live |= flows[i].uses
+
+    return keep
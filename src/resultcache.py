@@ -0,0 +1,226 @@
+# ---------------------------------------------------------------------------- #
+#                                 RESULT CACHE                                 #
+# ---------------------------------------------------------------------------- #
+#! Outputs of deterministic notebooks (opted in via the notebook metadata) are
+#! memoized. The key is the hash of the notebook content and the canonical JSON
+#! of the input, thus editing the notebook invalidates its results.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import hashlib
+import os
+import sys
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from loguru import logger
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Tuple
+
+from config import ResultCacheSettings
+from jsoncodec import dumps
+
+# --------------------------------- CONSTANTS -------------------------------- #
+CACHE_KEY = "cache"
+CACHE_HEADER = "X-Cache"
+HIT = "HIT"
+MISS = "MISS"
+
+# ---------------------------------------------------------------------------- #
+#                                  DATACLASSES                                 #
+# ---------------------------------------------------------------------------- #
+
+@dataclass
+class CachedResult:
+    """
+    Dataclass to store a cached output
+    ...
+
+    Attributes
+    ----------
+    output: any
+        output of the notebook
+    size: int
+        size of the output serialized as JSON (in bytes)
+    expires: float
+        expiration time (monotonic)
+    """
+    output: any
+    size: int
+    expires: float
+
+def cacheTTL(options: dict, default: float) -> float:
+    """
+    This function returns the TTL of the cached results from the options of the
+    notebook ('cache': true or an object with a 'ttl' key)
+
+    Args:
+        options (dict): options of the notebook
+        default (float): default TTL (in seconds)
+
+    Returns:
+        float: TTL (in seconds), None if caching isn't enabled
+    """
+
+    cache = options.get(CACHE_KEY)
+
+    if not cache:
+        return None
+    if cache is True:
+        return default
+
+    return float(cache.get("ttl", default))
+
+# ---------------------------------------------------------------------------- #
+#                                     CACHE                                    #
+# ---------------------------------------------------------------------------- #
+
+class ResultCache:
+    """
+    LRU cache of notebook outputs limited by the number of entries and their
+    total size. Concurrent lookups of the same missing key are executed only
+    once. Must be used from one event loop.
+    ...
+
+    Attributes
+    ----------
+    settings: ResultCacheSettings
+        size and expiration settings of the cache
+    hits: int
+        number of lookups served from the cache
+    misses: int
+        number of lookups that required an execution
+    """
+
+    def __init__(self, settings: ResultCacheSettings):
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = dict()
+        self._size = 0
+        self._hashes: Dict[str, Tuple[int, int, str]] = dict()
+
+    def key(self, nbPath: Path, data: any) -> str:
+        """
+        This function returns the cache key of an execution
+
+        Args:
+            nbPath (Path): path for the nb file
+            data (any): input data (JSON serializable or bytes)
+
+        Returns:
+            str: hash of the notebook content and the canonical input
+        """
+
+        # ! raw inputs (request bodies) are hashed as they are
+        canonical = data if isinstance(data, bytes) else dumps(data, sortKeys=True)
+        return hashlib.sha256(self._contentHash(nbPath).encode() + canonical).hexdigest()
+
+    async def get(self, key: str, ttl: float, execute: Callable[[], Awaitable[any]]) -> Tuple[any, bool]:
+        """
+        This function returns the cached output or executes the notebook and
+        caches its output
+
+        Args:
+            key (str): cache key (see key())
+            ttl (float): expiration of the output (in seconds)
+            execute (Callable[[], Awaitable[any]]): execution of the notebook
+
+        Returns:
+            Tuple[any, bool]: output of the notebook and True if it's from the cache
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.output, True
+            self._remove(key)
+
+        # ! identical concurrent requests wait for the first execution
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            try:
+                output = await asyncio.shield(inflight)
+                self.hits += 1
+                return output, True
+            except asyncio.CancelledError:
+                # ! the first execution has been abandoned, the next waiter executes it
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            output = await execute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # ! the exception is retrieved, so asyncio doesn't log it if nobody waits
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(output)
+        self._store(key, output, ttl)
+
+        return output, False
+
+    def stats(self) -> Dict[str, int]:
+        """
+        This function returns the counters of the cache
+
+        Returns:
+            Dict[str, int]: number of entries, their size, hits and misses
+        """
+
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+    def _store(self, key: str, output: any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+
+        # ! the size of the response body, str() would count characters and truncate numpy/pandas objects
+        try:
+            size = len(dumps(output))
+        except (TypeError, ValueError):
+            size = sys.getsizeof(output)
+
+        if size > self.settings.maxBytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = CachedResult(output, size, time.monotonic() + ttl)
+        self._size += size
+
+        # ---------------------------------- EVICT --------------------------------- #
+        while len(self._entries) > self.settings.maxEntries or self._size > self.settings.maxBytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        self._size -= self._entries.pop(key).size
+
+    def _contentHash(self, nbPath: Path) -> str:
+        stat = os.stat(nbPath)
+        known = self._hashes.get(str(nbPath))
+
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+
+        with open(nbPath, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        self._hashes[str(nbPath)] = (stat.st_mtime_ns, stat.st_size, digest)
+        logger.debug("Content hash of '{}' has been updated!", nbPath)
+
+        return digest
@@ -8,14 +8,23 @@
 #! Mangement Tool.
 
 # ---------------------------------- IMPORT ---------------------------------- #
+import asyncio
 import sys
 
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from loguru import logger
 from pathlib import Path
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Tuple
 
+from arrowhead_client.constants import Protocol
 from arrowhead_client.dto import DTOMixin
-from arrowhead_client.client.implementations import SyncClient
+from arrowhead_client.client.client_core import ArrowheadClient
+from arrowhead_client.client.client_async import ArrowheadClientAsync
+from arrowhead_client.client.implementations import AsyncClient, AsyncHttpProvider, SyncClient
+from arrowhead_client.consumer import AiohttpConsumer
+from arrowhead_client.consumer.implementations.httpx_consumer import HttpxConsumer
+from arrowhead_client.response import Response
 from arrowhead_client.system import ArrowheadSystem
 from arrowhead_client.service import Service
 from arrowhead_client.rules import OrchestrationRule
@@ -26,8 +35,106 @@ from config import Config
 
 # ------------------------------ GLOBAL VARIABLE ----------------------------- #
 _setup_client = None
+_async_setup_client = None
+_async_limit = 1
+_async_users = 0
+
+# --------------------------------- DATACLASS -------------------------------- #
+@dataclass
+class RegisteredService:
+    """
+    Dataclass to store a service registry entry of the provider
+    ...
+
+    Attributes
+    ----------
+    id: int
+        ID of the service registry entry (used for unregistration)
+    definitionId: int
+        ID of the service definition (used in authorization rules)
+    uri: str
+        URI of the service
+    """
+    id: int
+    definitionId: int
+    uri: str
+
+    @classmethod
+    def fromEntry(cls, entry: dict) -> "RegisteredService":
+        return cls(entry['id'], entry['serviceDefinition']['id'], entry['serviceUri'])
+
+# ---------------------------------- CLIENTS --------------------------------- #
+class Http2Client(ArrowheadClientAsync):
+    """
+    Asynchronous client consuming HTTP services over HTTP/2 (httpx), the
+    concurrent requests to a system share one TLS connection
+    """
+    __arrowhead_consumers__ = (AiohttpConsumer, HttpxConsumer)
+    __arrowhead_provider__ = AsyncHttpProvider
+
+# ---------------------------------- FORMS ----------------------------------- #
+class AuthorizationIntracloudForm(DTOMixin):
+    consumer_id: int
+    provider_ids: List[int]
+    interface_ids: List[int]
+    service_definition_ids: List[int]
+
+def _serviceForm(provider_sys: ArrowheadSystem, servicepath: str, servicename: str) -> ServiceRegistrationForm:
+    return ServiceRegistrationForm.make(
+            Service(
+                    servicename,
+                    servicepath,
+                    ServiceInterface.from_str('HTTP-SECURE-JSON'),
+                    'CERTIFICATE'
+            ),
+            provider_sys
+        )
+
+def _authForm(consumer: int, serviceList: List[int], sysid: int) -> AuthorizationIntracloudForm:
+    return AuthorizationIntracloudForm(
+        consumer_id=consumer,
+        provider_ids=[sysid],
+        interface_ids=[1],
+        service_definition_ids=serviceList,
+    )
 
 # ----------------------------- PRIVATE FUNCTIONS ---------------------------- #
+def _managementRules(c: Config) -> List[OrchestrationRule]:
+    """
+    This function returns the orchestration rules of the management endpoints
+    used by the sysop client
+
+    Args:
+        c (Config): config struct
+
+    Returns:
+        List[OrchestrationRule]: management endpoints of the core systems
+    """
+
+    registry = ArrowheadSystem(
+        system_name = 'service_registry',
+        address = c.core.serviceRegistry.uri,
+        port = c.core.serviceRegistry.port
+    )
+    authorization = ArrowheadSystem(
+        system_name = 'authorization',
+        address = c.core.authorization.uri,
+        port = c.core.authorization.port
+    )
+
+    return [
+        OrchestrationRule(Service('mgmt_get_services', 'serviceregistry/mgmt', ServiceInterface.from_str('HTTP-SECURE-JSON')), registry, 'GET'),
+        OrchestrationRule(Service('mgmt_register_service', 'serviceregistry/mgmt', ServiceInterface.from_str('HTTP-SECURE-JSON')), registry, 'POST'),
+        OrchestrationRule(Service('mgmt_remove_service', 'serviceregistry/mgmt', ServiceInterface.from_str('HTTP-SECURE-JSON')), registry, 'DELETE'),
+        OrchestrationRule(Service('mgmt_get_systems', 'serviceregistry/mgmt/systems', ServiceInterface('HTTP', 'SECURE', 'JSON')), registry, 'GET'),
+        OrchestrationRule(Service('mgmt_register_system', 'serviceregistry/mgmt/systems', ServiceInterface('HTTP', 'SECURE', 'JSON')), registry, 'POST'),
+        # ONLY FOR CONSUMER TESTING
+        OrchestrationRule(Service('mgmt_remove_system', 'serviceregistry/mgmt/systems', ServiceInterface('HTTP', 'SECURE', 'JSON')), registry, 'DELETE'),
+        OrchestrationRule(Service('mgmt_authorization_get', 'authorization/mgmt/intracloud', ServiceInterface('HTTP', 'SECURE', 'JSON')), authorization, 'GET'),
+        OrchestrationRule(Service('mgmt_authorization_store', 'authorization/mgmt/intracloud', ServiceInterface('HTTP', 'SECURE', 'JSON')), authorization, 'POST'),
+        OrchestrationRule(Service('mgmt_authorization_remove', 'authorization/mgmt/intracloud', ServiceInterface('HTTP', 'SECURE', 'JSON')), authorization, 'DELETE'),
+    ]
+
 def _setupClient(c: Config) -> None:
     """
     This function set a sysop client up to perform automated administration
@@ -50,126 +157,187 @@ def _setupClient(c: Config) -> None:
     )
 
     # ------------------------- MANAGAMENT ENDPOINT SETUP ------------------------ #
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_register_service',
-                'serviceregistry/mgmt',
-                ServiceInterface.from_str('HTTP-SECURE-JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'service_registry',
-                address = c.core.serviceRegistry.uri,
-                port = c.core.serviceRegistry.port
-            ),
-            'POST',
-        )
-    )
+    for rule in _managementRules(c):
+        _setup_client.orchestration_rules.store(rule)
 
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_remove_service',
-                'serviceregistry/mgmt',
-                ServiceInterface.from_str('HTTP-SECURE-JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'service_registry',
-                address = c.core.serviceRegistry.uri,
-                port = c.core.serviceRegistry.port
-            ),
-            'DELETE',
-        )
-    )
+    _setup_client.setup()
+    logger.debug("SYSOP client has been set up!")
 
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_get_systems',
-                'serviceregistry/mgmt/systems',
-                ServiceInterface('HTTP', 'SECURE', 'JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'service_registry',
-                address = c.core.serviceRegistry.uri,
-                port = c.core.serviceRegistry.port
-            ),
-            'GET',
-        )
-    )
+def _setupAsyncClient(c: Config) -> None:
+    """
+    This function set an asynchronous sysop client up, its connections are
+    pooled and shared by the concurrent requests of the batch functions
 
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_register_system',
-                'serviceregistry/mgmt/systems',
-                ServiceInterface('HTTP', 'SECURE', 'JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'service_registry',
-                address = c.core.serviceRegistry.uri,
-                port = c.core.serviceRegistry.port
-            ),
-            'POST',
-        )
-    )
+    Args:
+        c (Config): config struct
+    """
 
-    # ONLY FOR CONSUMER TESTING
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_remove_system',
-                'serviceregistry/mgmt/systems',
-                ServiceInterface('HTTP', 'SECURE', 'JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'service_registry',
-                address = c.core.serviceRegistry.uri,
-                port = c.core.serviceRegistry.port
-            ),
-            'DELETE',
-        )
-    )
+    global _async_setup_client, _async_limit
 
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_authorization_store',
-                'authorization/mgmt/intracloud',
-                ServiceInterface('HTTP', 'SECURE', 'JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'authorization',
-                address = c.core.authorization.uri,
-                port = c.core.authorization.port
-            ),
-            'POST',
-        )
-    )
+    cPath = Path(c.certpath)
 
-    _setup_client.orchestration_rules.store(
-        OrchestrationRule(
-            Service(
-                'mgmt_authorization_remove',
-                'authorization/mgmt/intracloud',
-                ServiceInterface('HTTP', 'SECURE', 'JSON'),
-            ),
-            ArrowheadSystem(
-                system_name = 'authorization',
-                address = c.core.authorization.uri,
-                port = c.core.authorization.port
-            ),
-            'DELETE',
-        )
+    _async_setup_client = clientClass(c).create(
+        system_name='sysop',
+        address=c.provider.uri,
+        port=58923,
+        keyfile=cPath / 'sysop.key.pem',
+        certfile=cPath / 'sysop.crt.pem',
+        cafile=cPath / 'sysop.ca',
+        consumer_options=consumerOptions(c)
     )
 
-    _setup_client.setup()
-    logger.debug("SYSOP client has been set up!")
+    # ------------------------- MANAGAMENT ENDPOINT SETUP ------------------------ #
+    for rule in _managementRules(c):
+        _async_setup_client.orchestration_rules.store(rule)
+
+    ArrowheadClient.setup(_async_setup_client)
+    _async_limit = max(c.autoSetup.concurrency, 1)
+    logger.debug("Asynchronous SYSOP client has been set up!")
+
+@asynccontextmanager
+async def _asyncClient():
+    """
+    This function opens the connection pool of the asynchronous sysop client
+    in the running event loop, the pool is closed by its last user
+    """
+
+    global _async_users
+
+    await _async_setup_client.setup()
+    _async_users += 1
+
+    try:
+        yield _async_setup_client
+    finally:
+        _async_users -= 1
+        if not _async_users:
+            await _async_setup_client.shutdown()
+
+async def _fanOut(items: List[any], request: Callable[[any], Awaitable[any]], what: str) -> List[Tuple[any, any]]:
+    """
+    This function sends a request for every item concurrently (at most
+    'concurrency' at a time) and reports every failure
+
+    Args:
+        items (List[any]): items to be sent
+        request (Callable[[any], Awaitable[any]]): request of one item, returns its result
+        what (str): description of the requests (for logging)
+
+    Returns:
+        List[Tuple[any, any]]: items and their results, failed items are left out
+    """
+
+    semaphore = asyncio.Semaphore(_async_limit)
+
+    async def send(item: any) -> any:
+        async with semaphore:
+            return await request(item)
+
+    async with _asyncClient():
+        results = await asyncio.gather(*(send(item) for item in items), return_exceptions=True)
+
+    done = list()
+
+    for item, result in zip(items, results):
+        if isinstance(result, BaseException):
+            logger.error("{} '{}' has failed, due to: {!r}", what, item, result)
+        else:
+            done.append((item, result))
+
+    logger.debug("{}: {}/{} requests have succeeded!", what, len(done), len(items))
+
+    return done
+
+def _checked(response: Response) -> Response:
+    """
+    This function raises an exception for error responses of the core systems
+
+    Args:
+        response (Response): response of a management endpoint
+
+    Raises:
+        RuntimeError: the response isn't HTTP 2xx
+
+    Returns:
+        Response: the given response
+    """
+
+    if not 200 <= int(response.status_code) < 300:
+        raise RuntimeError("HTTP {}: {}".format(response.status_code, response.read_string()))
+    return response
 
 # ---------------------------------------------------------------------------- #
 #                               PUBLIC FUNCTIONS                               #
 # ---------------------------------------------------------------------------- #
 
+# ------------------------------ CONNECTION POOL ----------------------------- #
+def clientClass(c: Config) -> type:
+    """
+    This function returns the asynchronous client class of the consumer
+    settings: HTTP/2 clients consume HTTP services by httpx (WebSockets are
+    still consumed by aiohttp)
+
+    Args:
+        c (Config): config data
+
+    Returns:
+        type: client class
+    """
+
+    return Http2Client if c.consumer.http2 else AsyncClient
+
+def consumerOptions(c: Config) -> Dict[str, any]:
+    """
+    This function translates the connection pool settings to the options of
+    the consumers of the client class (see clientClass()), every consumer
+    picks its own ones (see ArrowheadClient.create())
+
+    Args:
+        c (Config): config data
+
+    Returns:
+        Dict[str, any]: keyword arguments of the consumers
+    """
+
+    options = {
+        'limit': c.consumer.limit,
+        'limit_per_host': c.consumer.limitPerHost,
+        'keepalive_timeout': c.consumer.keepAliveTimeout,
+        'ttl_dns_cache': c.consumer.dnsCacheTtl or None,
+        'force_close': c.consumer.forceClose
+    }
+
+    # ! WebSockets are still consumed by aiohttp, httpx has neither per host limits nor a DNS cache
+    if c.consumer.http2:
+        options.update({
+            'max_connections': c.consumer.limit or None,
+            'max_keepalive_connections': 0 if c.consumer.forceClose else c.consumer.limit or None,
+            'keepalive_expiry': c.consumer.keepAliveTimeout
+        })
+
+    return options
+
+def poolMetrics(client: ArrowheadClientAsync = None) -> Dict[str, any]:
+    """
+    This function returns the connection pool counters of the HTTP consumer
+    of an asynchronous client
+
+    Args:
+        client (ArrowheadClientAsync, optional): client (default: the asynchronous sysop client)
+
+    Returns:
+        Dict[str, any]: pool counters (None if the client hasn't been set up or
+        its consumer has no counters, e.g. httpx)
+    """
+
+    client = client or _async_setup_client
+
+    if client is None:
+        return None
+
+    metrics = getattr(client.consumers[Protocol.HTTP], "pool_metrics", None)
+    return metrics() if metrics is not None else None
+
 # ------------------------------- SETUP SYSTEM ------------------------------- #
 def setupSystem(c: Config, _system: ArrowheadSystem) -> int:
     """
@@ -198,10 +366,64 @@ def setupSystem(c: Config, _system: ArrowheadSystem) -> int:
 
     return data['id']
 
-# -------------------------------- SETUP AUTH -------------------------------- #
-def setupAuth(c: Config, serviceList: List[int], sysid: int) -> List[int]:
+# ------------------------------- REMOVE SYSTEM ------------------------------ #
+def removeSystem(_sysid: int):
+    """
+    This function unregister a system from local cloud
+
+    Args:
+        _sysid (int): ID of the provider system to be unregistered
+    """
+
+    global _setup_client
+    try:
+        _setup_client.consume_service(
+            'mgmt_remove_system',
+            rmid=_sysid
+        )
+        logger.debug("System'{}' has been removed!", _sysid)
+
+    except Exception as e:
+        logger.exception("Cannot remove system '{}', due to: {}", _sysid, e)
+
+# ---------------------------------------------------------------------------- #
+#                            ASYNC BATCH FUNCTIONS                             #
+# ---------------------------------------------------------------------------- #
+#! The batch functions send their requests concurrently, limited by the
+#! 'concurrency' of the auto setup settings, over the pooled connections of an
+#! asynchronous sysop client. A failed item is reported and left out, the
+#! others are processed anyway.
+
+# ---------------------------- REGISTER SERVICES ----------------------------- #
+async def registerServices(c: Config, provider_sys: ArrowheadSystem, services: Dict[str, str]) -> Dict[str, RegisteredService]:
     """
-    This function sets the required authorization rules in the local cloud
+    This function registers the given services concurrently
+
+    Args:
+        c (Config): config data
+        provider_sys (ArrowheadSystem): provider system
+        services (Dict[str, str]): URI of the services by service name
+
+    Returns:
+        Dict[str, RegisteredService]: the registered services by service name (failed services are left out)
+    """
+
+    if not _async_setup_client:
+        _setupAsyncClient(c)
+
+    async def register(servicename: str) -> RegisteredService:
+        response = await _async_setup_client.consume_service(
+            'mgmt_register_service',
+            json=_serviceForm(provider_sys, services[servicename], servicename).dto(),
+        )
+        return RegisteredService.fromEntry(_checked(response).read_json())
+
+    return dict(await _fanOut(list(services), register, "Registration of service"))
+
+# ----------------------------- SETUP AUTH RULES ----------------------------- #
+async def setupAuthRules(c: Config, serviceList: List[int], sysid: int) -> List[int]:
+    """
+    This function sets the authorization rules of the consumers concurrently
 
     Args:
         c (Config): config data
@@ -209,138 +431,206 @@ def setupAuth(c: Config, serviceList: List[int], sysid: int) -> List[int]:
         sysid (int): ID of the provider system
 
     Returns:
-        List[int]: list of authorization rule ID-s
+        List[int]: list of authorization rule ID-s (failed consumers are left out)
     """
 
-    global _setup_client
-    if not _setup_client:
-        _setupClient(c)
+    return await _authorize(c, {consumer: serviceList for consumer in c.autoSetup.consumers}, sysid)
 
-    class AuthorizationIntracloudForm(DTOMixin):
-        consumer_id: int
-        provider_ids: List[int]
-        interface_ids: List[int]
-        service_definition_ids: List[int]
+async def _authorize(c: Config, rules: Dict[int, List[int]], sysid: int) -> List[int]:
+    """
+    This function sets the authorization rules concurrently, one request per
+    consumer
+
+    Args:
+        c (Config): config data
+        rules (Dict[int, List[int]]): service ID-s to be authorized by consumer ID
+        sysid (int): ID of the provider system
 
-    ids = list()
+    Returns:
+        List[int]: list of authorization rule ID-s (failed consumers are left out)
+    """
 
-    logger.debug("Authorization rules will be registered for the following consumers: {}", c.autoSetup.consumers)
+    if not _async_setup_client:
+        _setupAsyncClient(c)
 
-    for consumer in c.autoSetup.consumers:
-        form = AuthorizationIntracloudForm(
-            consumer_id=consumer,
-            provider_ids=[sysid],
-            interface_ids=[1],
-            service_definition_ids=serviceList,
+    async def authorize(consumer: int) -> List[int]:
+        response = await _async_setup_client.consume_service(
+            'mgmt_authorization_store',
+            json=_authForm(consumer, rules[consumer], sysid).dto(),
         )
+        return [rule['id'] for rule in _checked(response).read_json()['data']]
 
-        try:
-            result = _setup_client.consume_service(
-                'mgmt_authorization_store',
-                json=form.dto()
-            )
-            ids.append(result.read_json()["count"])
-            logger.debug("Authorization rule for consumer ID: '{}' has been set up!", consumer)
-    
-        except Exception as e:
-            logger.exception("Cannot setup authorization rule for consumer {} due to: {}", consumer, e)
-    
-    return ids
-
-# ----------------------------- REGISTER SERIVCE ----------------------------- #
-def registerService(provider_sys: ArrowheadSystem, servicepath: str, servicename: str) -> int:
-    """_summary_
+    done = await _fanOut([consumer for consumer in rules if rules[consumer]], authorize, "Authorization of consumer")
+    return [authid for _, authids in done for authid in authids]
+
+# ----------------------------- REMOVE SERVICES ------------------------------ #
+async def removeServices(c: Config, serviceIds: List[int]) -> List[int]:
+    """
+    This function unregisters the given services concurrently
 
     Args:
-        provider_sys (ArrowheadSystem): provider system
-        servicepath (str): URI of the service
-        servicename (str): name of the service
+        c (Config): config data
+        serviceIds (List[int]): ID-s of the services to be unregistered
 
-    Raises:
-        Exception: if the register request doesn't return with HTTP 2xx - (unauthorized, bad request/service definition)
+    Returns:
+        List[int]: ID-s of the unregistered services (failed ones are left out)
+    """
+
+    if not serviceIds:
+        return list()
+    if not _async_setup_client:
+        _setupAsyncClient(c)
+
+    async def remove(service_id: int) -> None:
+        _checked(await _async_setup_client.consume_service('mgmt_remove_service', rmid=service_id))
+
+    return [service_id for service_id, _ in await _fanOut(list(serviceIds), remove, "Removal of service")]
+
+# ----------------------------- REMOVE AUTH RULES ---------------------------- #
+async def removeAuthRules(c: Config, authids: List[int]) -> List[int]:
+    """
+    This function removes the given authorization rules concurrently
+
+    Args:
+        c (Config): config data
+        authids (List[int]): list of authorzation rule ID-s
 
     Returns:
-        int: ID of the registered service 
+        List[int]: ID-s of the removed rules (failed ones are left out)
     """
-    global _setup_client
 
-    serviceForm = ServiceRegistrationForm.make(
-            Service(
-                    servicename,
-                    servicepath,
-                    ServiceInterface.from_str('HTTP-SECURE-JSON'),
-                    'CERTIFICATE'
-            ),
-            provider_sys
-        )
+    if not authids:
+        return list()
+    if not _async_setup_client:
+        _setupAsyncClient(c)
 
-    try:
-        register_res = _setup_client.consume_service(
-            'mgmt_register_service',
-            json=serviceForm.dto(),
-        ).read_json()
-        
-        return register_res['serviceDefinition']['id']
-    
-    except Exception as e:
-        logger.exception("Cannot register service due to: {}", e)
-        raise Exception
+    async def remove(authid: int) -> None:
+        _checked(await _async_setup_client.consume_service('mgmt_authorization_remove', rmid=authid))
+
+    return [authid for authid, _ in await _fanOut(list(authids), remove, "Removal of authorization rule")]
 
-# ------------------------------ REMOVE SERVICE ------------------------------ #
-def removeService(service_id: int) -> None:
+# ---------------------------------------------------------------------------- #
+#                                RECONCILIATION                                #
+# ---------------------------------------------------------------------------- #
+#! In reconcile mode the registrations are kept at shutdown. At startup the
+#! provider system, its services and authorization rules that are already
+#! registered are queried and only the difference to the discovered notebooks
+#! and the configured consumers is created or deleted.
+
+# -------------------------------- FIND SYSTEM ------------------------------- #
+def findSystem(c: Config, _system: ArrowheadSystem) -> int:
     """
-    This function unregister the given service from local cloud
+    This function looks the given AH system up in the local cloud's registry
 
     Args:
-        service_id (int): ID of ther service to be unregistered
+        c (Config): config data
+        _system (ArrowheadSystem): Arrowhead provider system
+
+    Returns:
+        int: system ID, None if the system isn't registered
     """
 
     global _setup_client
+    if not _setup_client:
+        _setupClient(c)
+
     try:
-        _setup_client.consume_service(
-            'mgmt_remove_service',
-            rmid=service_id
-        )
-        logger.debug("Service '{}' has been unregistered!", service_id)
+        systems = _checked(_setup_client.consume_service('mgmt_get_systems')).read_json()['data']
     except Exception as e:
-        logger.exception("Cannot unregister service '{}', due to: {}", service_id, e)
+        logger.exception("Cannot query the systems of the cloud! Due to: {}", e)
+        sys.exit(127)
 
-# ------------------------------- REMOVE SYSTEM ------------------------------ #
-def removeSystem(_sysid: int):
+    for system in systems:
+        if (system['systemName'], system['address'], system['port']) == (_system.system_name, _system.address, _system.port):
+            return system['id']
+
+    return None
+
+# ---------------------------- RECONCILE SERVICES ---------------------------- #
+async def reconcileServices(c: Config, provider_sys: ArrowheadSystem, sysid: int, services: Dict[str, str]) -> Dict[str, RegisteredService]:
     """
-    This function unregister a system from local cloud
+    This function registers the services that aren't registered yet and
+    unregisters the ones of the provider that aren't provided anymore (or
+    whose URI has been changed)
 
     Args:
-        _sysid (int): ID of the provider system to be unregistered
+        c (Config): config data
+        provider_sys (ArrowheadSystem): provider system
+        sysid (int): ID of the provider system
+        services (Dict[str, str]): URI of the provided services by service name
+
+    Returns:
+        Dict[str, RegisteredService]: the registered services by service name
     """
 
-    global _setup_client
-    try:
-        _setup_client.consume_service(
-            'mgmt_remove_system',
-            rmid=_sysid
-        )
-        logger.debug("System'{}' has been removed!", _sysid)
+    if not _async_setup_client:
+        _setupAsyncClient(c)
 
-    except Exception as e:
-        logger.exception("Cannot remove system '{}', due to: {}", _sysid, e)
+    async with _asyncClient() as client:
+        entries = _checked(await client.consume_service('mgmt_get_services')).read_json()['data']
+
+    # ! the registry might hold several entries of a service definition (e.g. a crash during an earlier reconciliation)
+    found: Dict[str, List[RegisteredService]] = dict()
+
+    for entry in entries:
+        if entry['provider']['id'] == sysid:
+            found.setdefault(entry['serviceDefinition']['serviceDefinition'], list()).append(RegisteredService.fromEntry(entry))
+
+    # ----------------------------------- DIFF ----------------------------------- #
+    # ! one entry with the current URI is kept, every other entry of the provider is stale
+    registered: Dict[str, RegisteredService] = dict()
+    stale: List[int] = list()
+
+    for sname, candidates in found.items():
+        current = next((service for service in candidates if service.uri == services.get(sname)), None)
+        if current is not None:
+            registered[sname] = current
+        stale += [service.id for service in candidates if service is not current]
+
+    missing = {sname: spath for sname, spath in services.items() if sname not in registered}
+
+    logger.info("Services: {} registered already, {} to be unregistered, {} to be registered!", len(registered), len(stale), len(missing))
 
-# -------------------------------- REMOVE AUTH ------------------------------- #
-def removeAuth(authids: List[int]) -> None:
+    await removeServices(c, stale)
+    registered.update(await registerServices(c, provider_sys, missing))
+
+    return registered
+
+# ---------------------------- RECONCILE AUTH RULES -------------------------- #
+async def reconcileAuthRules(c: Config, serviceList: List[int], sysid: int) -> List[int]:
     """
-    This function removes registered authorization rules
+    This function sets the missing authorization rules of the consumers and
+    removes the rules of the provider that aren't needed anymore (unknown
+    consumer or service)
 
     Args:
-        authids (List[int]): list of authorzation rule ID-s
+        c (Config): config data
+        serviceList (List[int]): list of servive ID-s for which the consumers will be authorized
+        sysid (int): ID of the provider system
+
+    Returns:
+        List[int]: list of authorization rule ID-s
     """
 
-    global _setup_client
-    for authid in authids:
-        try:
-            _setup_client.consume_service(
-                'mgmt_authorization_remove',
-                rmid=authid
-            )
-            logger.debug("Authorization rule '{}' has been removed!", authid)
-        except Exception as e:
-            logger.exception("Cannot remove authorization rule '{}', due to: {}", authid, e)
\ No newline at end of file
+    if not _async_setup_client:
+        _setupAsyncClient(c)
+
+    async with _asyncClient() as client:
+        rules = _checked(await client.consume_service('mgmt_authorization_get')).read_json()['data']
+
+    existing = {
+        (rule['consumerSystem']['id'], rule['serviceDefinition']['id']): rule['id']
+        for rule in rules if rule['providerSystem']['id'] == sysid
+    }
+
+    # ----------------------------------- DIFF ----------------------------------- #
+    wanted = {(consumer, service) for consumer in c.autoSetup.consumers for service in serviceList}
+    stale = [authid for pair, authid in existing.items() if pair not in wanted]
+    missing = {consumer: [service for service in serviceList if (consumer, service) not in existing] for consumer in c.autoSetup.consumers}
+
+    logger.info("Authorization rules: {} set already, {} to be removed, {} to be set!", len(existing) - len(stale), len(stale), sum(map(len, missing.values())))
+
+    await removeAuthRules(c, stale)
+    created = await _authorize(c, missing, sysid)
+
+    return [authid for pair, authid in existing.items() if pair in wanted] + created
@@ -0,0 +1,171 @@
+# ---------------------------------------------------------------------------- #
+#                               NOTEBOOK WATCHER                               #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import os
+import pathlib
+
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from loguru import logger
+from typing import Awaitable, Callable, Dict
+
+# --------------------------------- CONSTANTS -------------------------------- #
+IPYNB_EXT = "*.ipynb"
+
+# ---------------------------------------------------------------------------- #
+#                                  DATACLASSES                                 #
+# ---------------------------------------------------------------------------- #
+
+@dataclass
+class Notebook:
+    """
+    Dataclass to store a discovered notebook
+    ...
+
+    Attributes
+    ----------
+    file: pathlib.PurePath
+        path of the notebook file
+    spath: str
+        URI of the service (path relative to the notebook root, without extension)
+    sname: str
+        name of the service
+    mtime: int
+        modification time of the file (in nanoseconds)
+    size: int
+        size of the file (in bytes)
+    """
+    file: pathlib.PurePath
+    spath: str
+    sname: str
+    mtime: int
+    size: int
+
+# ---------------------------------------------------------------------------- #
+#                                   FUNCTIONS                                  #
+# ---------------------------------------------------------------------------- #
+
+def discoverNotebooks(nbRoot: str) -> Dict[str, Notebook]:
+    """
+    This function collects every notebook under the root path
+
+    Args:
+        nbRoot (str): root path for notebooks
+
+    Returns:
+        Dict[str, Notebook]: notebooks by service URI
+    """
+
+    notebooks = dict()
+
+    for path, _, files in os.walk(nbRoot):
+        for name in files:
+            if not fnmatch(name, IPYNB_EXT):
+                continue
+
+            file = pathlib.PurePath(path, name)
+
+            try:
+                stat = os.stat(file)
+            except OSError:
+                # ! removed in the meantime
+                continue
+
+            spath = str(file.relative_to(nbRoot).with_suffix('')).replace(" ", "-").replace("_", "-")
+            sname = str(file.stem).replace(" ", "-").replace("_", "-")
+            notebooks[spath] = Notebook(file, spath, sname, stat.st_mtime_ns, stat.st_size)
+
+    return notebooks
+
+# ---------------------------------------------------------------------------- #
+#                                    WATCHER                                   #
+# ---------------------------------------------------------------------------- #
+
+class NotebookWatcher:
+    """
+    Background task that polls the notebook root and reports added, changed and
+    removed notebooks to the given callbacks. The callbacks are awaited one by
+    one in the event loop of the provider.
+    ...
+
+    Attributes
+    ----------
+    nbRoot: str
+        root path for notebooks
+    interval: float
+        polling interval (in seconds)
+    notebooks: Dict[str, Notebook]
+        currently known notebooks by service URI
+    """
+
+    def __init__(
+        self,
+        nbRoot: str,
+        interval: float,
+        notebooks: Dict[str, Notebook],
+        onAdded: Callable[[Notebook], Awaitable[None]],
+        onChanged: Callable[[Notebook], Awaitable[None]],
+        onRemoved: Callable[[Notebook], Awaitable[None]]
+    ):
+        self.nbRoot = nbRoot
+        self.interval = interval
+        self.notebooks = dict(notebooks)
+        self._onAdded = onAdded
+        self._onChanged = onChanged
+        self._onRemoved = onRemoved
+        self._task: asyncio.Task = None
+
+    async def start(self) -> None:
+        """
+        This function starts watching in the running event loop
+        """
+
+        self._task = asyncio.create_task(self._run())
+        logger.info("Watching '{}' for notebook changes!", self.nbRoot)
+
+    async def stop(self) -> None:
+        """
+        This function stops watching
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def poll(self) -> None:
+        """
+        This function compares the notebook root with the known notebooks and
+        calls the callbacks for the differences
+        """
+
+        current = await asyncio.to_thread(discoverNotebooks, self.nbRoot)
+
+        for spath in self.notebooks.keys() - current.keys():
+            await self._call(self._onRemoved, self.notebooks[spath])
+
+        for spath, nb in current.items():
+            known = self.notebooks.get(spath)
+
+            if known is None:
+                await self._call(self._onAdded, nb)
+            elif (known.mtime, known.size) != (nb.mtime, nb.size):
+                await self._call(self._onChanged, nb)
+
+        self.notebooks = current
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.exception("Cannot check notebooks for changes, due to: {}", e)
+
+    async def _call(self, callback: Callable[[Notebook], Awaitable[None]], nb: Notebook) -> None:
+        try:
+            await callback(nb)
+        except Exception as e:
+            logger.exception("Cannot handle the change of notebook '{}', due to: {}", nb.sname, e)
@@ -0,0 +1,88 @@
+# ---------------------------------------------------------------------------- #
+#                                  TEST SETUP                                  #
+# ---------------------------------------------------------------------------- #
+#! The modules of the adapter import each other by name (they are run from the
+#! src folder), thus src and the client library are put on the import path.
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import sys
+
+from pathlib import Path
+from typing import Dict, List
+
+import nbformat
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "client-library-python" / "src")]
+
+from config import Config
+
+from arrowhead_client.client.implementations import AsyncClient
+from starlette.testclient import TestClient
+
+# ---------------------------------------------------------------------------- #
+#                                   FIXTURES                                   #
+# ---------------------------------------------------------------------------- #
+
+@pytest.fixture
+def config() -> Config:
+    with open(ROOT / "config.yml.example", "r") as stream:
+        return Config.from_dict(yaml.safe_load(stream))
+
+@pytest.fixture
+def writeNotebook():
+    def write(path: Path, *sources: str, **options) -> Path:
+        nb = nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell(source) for source in sources])
+        if options:
+            nb.metadata["prototaip"] = options
+        nbformat.write(nb, str(path))
+        return path
+    return write
+
+class Served:
+    """
+    Notebook services of a folder, served with the inline executor
+    ...
+
+    Attributes
+    ----------
+    services: NotebookServices
+        the notebook services
+    registry: List[tuple]
+        recorded register and unregister calls
+    """
+
+    def __init__(self, config: Config):
+        import main
+
+        from engines import makeEngine
+        from executor import makeExecutor
+        from jobs import JobStore
+        from limits import AdmissionControl
+        from resultcache import ResultCache
+
+        self.provider = AsyncClient.create('test_provider', '127.0.0.1', 1337)
+        self.registry = list()
+        self.services = main.NotebookServices(
+            config, self.provider, makeExecutor(config.execution, config.nbpath), makeEngine(config.execution),
+            JobStore(config.jobs), ResultCache(config.resultCache), AdmissionControl(config.limits),
+            self._register, self._unregister
+        )
+
+    def client(self) -> TestClient:
+        self.provider._initialize_provided_services()
+        return TestClient(self.provider.provider.make_app())
+
+    async def _register(self, services: Dict[str, str]) -> None:
+        self.registry.append(("register", services))
+
+    async def _unregister(self, snames: List[str]) -> None:
+        self.registry.append(("unregister", snames))
+
+@pytest.fixture
+def served(config, tmp_path):
+    # ! the config might be changed by the test before serving
+    config.nbpath = str(tmp_path)
+    return lambda: Served(config)
@@ -0,0 +1,147 @@
+# ---------------------------------------------------------------------------- #
+#                                 MICRO-BATCHING                               #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batcher import Batcher, BatchSettings, batchSettings
+from limits import OverloadedError
+from watcher import discoverNotebooks
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+class Recorder:
+    """
+    Batched execution doubling its inputs, it records the batches
+    """
+
+    def __init__(self, fail: bool = False):
+        self.batches = list()
+        self.fail = fail
+
+    async def __call__(self, inputs):
+        self.batches.append(list(inputs))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ValueError("broken batch")
+        return [2 * data for data in inputs]
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_settings_from_options():
+    assert batchSettings({}, "test") is None
+    assert batchSettings({"batch": True}, "test") == BatchSettings()
+    assert batchSettings({"batch": {"max-size": 0, "window": 0.5}}, "test") == BatchSettings(maxSize=1, window=0.5)
+
+@pytest.mark.parametrize("batch", [8, "yes", [1]])
+def test_invalid_settings_name_the_service(batch):
+    with pytest.raises(ValueError, match="my-nb"):
+        batchSettings({"batch": batch}, "my-nb")
+
+def test_full_batch_is_flushed_at_once():
+    execute = Recorder()
+    batcher = Batcher(execute, BatchSettings(maxSize=3, window=60), "test")
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), 5)
+
+    assert asyncio.run(run()) == [0, 2, 4]
+    assert execute.batches == [[0, 1, 2]]
+
+def test_batch_is_flushed_after_window():
+    execute = Recorder()
+    batcher = Batcher(execute, BatchSettings(maxSize=16, window=0.01), "test")
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert execute.batches == [[0, 1, 2, 3, 4]]
+
+def test_overflow_starts_next_batch():
+    execute = Recorder()
+    batcher = Batcher(execute, BatchSettings(maxSize=2, window=0.01), "test")
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert execute.batches == [[0, 1], [2, 3], [4]]
+
+def test_failed_batch_fails_only_its_requests():
+    execute = Recorder(fail=True)
+    batcher = Batcher(execute, BatchSettings(maxSize=2, window=0.01), "test")
+
+    async def run():
+        failed = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        execute.fail = False
+        return failed, await batcher.submit(3)
+
+    failed, output = asyncio.run(run())
+
+    assert all(isinstance(e, ChildProcessError) for e in failed)
+    assert output == 6
+
+def test_wrong_number_of_outputs_fails_batch():
+    async def execute(inputs):
+        return inputs[:1]
+
+    batcher = Batcher(execute, BatchSettings(maxSize=2, window=0.01), "test")
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert all(isinstance(e, ChildProcessError) for e in asyncio.run(run()))
+
+def test_timeout_is_propagated():
+    async def execute(inputs):
+        raise TimeoutError
+
+    batcher = Batcher(execute, BatchSettings(maxSize=1, window=0.01), "test")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(batcher.submit(1))
+
+def test_cancelled_request_is_left_out():
+    execute = Recorder()
+    batcher = Batcher(execute, BatchSettings(maxSize=16, window=0.05), "test")
+
+    async def run():
+        cancelled = asyncio.create_task(batcher.submit(1))
+        kept = asyncio.create_task(batcher.submit(2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(run()) == 4
+    assert execute.batches == [[2]]
+
+def test_rejection_is_propagated():
+    async def execute(inputs):
+        raise OverloadedError("Too many requests!", 429, 1)
+
+    batcher = Batcher(execute, BatchSettings(maxSize=2, window=0.01), "test")
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert all(isinstance(e, OverloadedError) and e.status_code == 429 for e in asyncio.run(run()))
+
+def test_batch_takes_one_slot(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "import json\ninputs = json.loads(data_input)\noutput = [len(inputs)] * len(inputs)", batch={"max-size": 3, "window": 5}, limits={"max-concurrent": 1})
+    serving = served()
+    serving.services.provide(discoverNotebooks(str(tmp_path))["nb"])
+
+    with serving.client() as client, ThreadPoolExecutor(3) as pool:
+        responses = list(pool.map(lambda i: client.post("/nb", json=i), range(3)))
+
+    assert [response.text for response in responses] == ["3", "3", "3"]
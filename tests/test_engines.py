@@ -0,0 +1,77 @@
+# ---------------------------------------------------------------------------- #
+#                               NOTEBOOK ENGINES                               #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import os
+
+import nbformat
+import pytest
+
+from engines import pynb_execute
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+def tag(path, tags):
+    nb = nbformat.read(str(path), 4)
+    for cell, cellTags in zip(nb.cells, tags):
+        cell.metadata["tags"] = cellTags
+    nbformat.write(nb, str(path))
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_notebook_runs_as_main(tmp_path, writeNotebook):
+    writeNotebook(tmp_path / "nb.ipynb", "import json\noutput = [__name__, json.loads(data_input)]")
+
+    assert pynb_execute(str(tmp_path), "nb", {"a": 1}, "nb") == ["__main__", {"a": 1}]
+
+def test_functions_see_notebook_globals(tmp_path, writeNotebook):
+    writeNotebook(tmp_path / "nb.ipynb", "factor = 3", "def scale(x):\n    return factor * x", "output = scale(2)")
+
+    assert pynb_execute(str(tmp_path), "nb", None, "nb") == 6
+
+def test_adapter_names_do_not_leak(tmp_path, writeNotebook):
+    writeNotebook(tmp_path / "nb.ipynb", "output = logger")
+
+    with pytest.raises(ChildProcessError):
+        pynb_execute(str(tmp_path), "nb", None, "nb")
+
+def test_setup_notebook_runs_as_main(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "factor = 3", "def scale(x):\n    return factor * x", "output = [__name__, scale(2)]")
+    tag(path, [["setup"]])
+
+    assert pynb_execute(str(tmp_path), "nb", None, "nb") == ["__main__", 6]
+
+def test_setup_cells_run_once(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "import itertools\ncounter = itertools.count()", "output = next(counter)")
+    tag(path, [["setup"]])
+
+    assert [pynb_execute(str(tmp_path), "nb", None, "nb") for _ in range(3)] == [0, 1, 2]
+
+def test_setup_cells_rerun_after_change(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "import itertools\ncounter = itertools.count()", "output = next(counter)")
+    tag(path, [["setup"]])
+    pynb_execute(str(tmp_path), "nb", None, "nb")
+
+    stat = os.stat(path)
+    writeNotebook(path, "import itertools\ncounter = itertools.count(10)", "output = next(counter)")
+    tag(path, [["setup"]])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert pynb_execute(str(tmp_path), "nb", None, "nb") == 10
+
+def test_setup_containers_are_copied_per_request(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "seen = []", "seen.append(1)\noutput = len(seen)")
+    tag(path, [["setup"]])
+
+    assert [pynb_execute(str(tmp_path), "nb", None, "nb") for _ in range(2)] == [1, 1]
+
+def test_only_handler_cells_run_per_request(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "base = 1", "output = base + 1", "raise RuntimeError('notes')")
+    tag(path, [["setup"], ["handler"], []])
+
+    assert pynb_execute(str(tmp_path), "nb", None, "nb") == 2
@@ -0,0 +1,121 @@
+# ---------------------------------------------------------------------------- #
+#                                   EXECUTORS                                  #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from executor import InlineExecutor, ProcessExecutor, ThreadExecutor, makeExecutor
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_process_executor_runs_in_worker():
+    executor = ProcessExecutor(workers=1)
+
+    async def run():
+        return await executor.submit(os.getpid), await executor.submit(pow, 2, 10)
+
+    try:
+        pid, result = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert pid != os.getpid()
+    assert result == 1024
+
+def test_process_executor_reraises_exception():
+    executor = ProcessExecutor(workers=1)
+
+    try:
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(executor.submit(divmod, 1, 0))
+    finally:
+        executor.shutdown()
+
+def test_thread_executor_runs_in_thread():
+    executor = ThreadExecutor(workers=2)
+
+    try:
+        assert asyncio.run(executor.submit(threading.get_ident)) != threading.get_ident()
+    finally:
+        executor.shutdown()
+
+def test_executor_from_config(config):
+    assert isinstance(makeExecutor(config.execution), InlineExecutor)
+
+    config.execution.executor = "fibers"
+    with pytest.raises(ValueError):
+        makeExecutor(config.execution)
+
+def test_timeout_kills_worker():
+    executor = ProcessExecutor(workers=1)
+
+    async def run():
+        pid = await executor.submit(os.getpid)
+        worker = executor._idle[0]
+
+        with pytest.raises(TimeoutError):
+            await executor.submit(time.sleep, 30, timeout=0.2)
+
+        assert not worker.process.is_alive()
+        return pid, await executor.submit(os.getpid)
+
+    try:
+        started = time.monotonic()
+        pid, replacement = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert replacement != pid
+    assert time.monotonic() - started < 20
+
+def test_cancel_kills_worker():
+    executor = ProcessExecutor(workers=1)
+
+    async def run():
+        await executor.submit(os.getpid)
+        worker = executor._idle[0]
+
+        task = asyncio.create_task(executor.submit(time.sleep, 30))
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert not worker.process.is_alive()
+        assert await executor.submit(pow, 3, 2) == 9
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+def test_worker_is_recycled():
+    executor = ProcessExecutor(workers=1, maxTasksPerWorker=2)
+
+    async def run():
+        return [await executor.submit(os.getpid) for _ in range(3)]
+
+    try:
+        pids = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert pids[0] == pids[1] != pids[2]
+
+def test_thread_executor_deadline():
+    executor = ThreadExecutor(workers=1)
+
+    try:
+        with pytest.raises(TimeoutError):
+            asyncio.run(executor.submit(time.sleep, 0.5, timeout=0.05))
+    finally:
+        executor.shutdown()
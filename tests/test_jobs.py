@@ -0,0 +1,136 @@
+# ---------------------------------------------------------------------------- #
+#                                   JOB STORE                                  #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+
+import pytest
+
+from config import Jobs
+from jobs import CANCELLED, DONE, FAILED, PENDING, JobStore
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+async def execution(output, delay: float = 0):
+    await asyncio.sleep(delay)
+    if isinstance(output, Exception):
+        raise output
+    return output
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_job_is_done():
+    store = JobStore(Jobs())
+
+    async def run():
+        job = store.submit("echo", execution({"msg": "hi"}, 0.01))
+        pending = job.dto()
+        await job.wait(5)
+        return pending, store.get(job.id).dto()
+
+    pending, done = asyncio.run(run())
+
+    assert pending["status"] == PENDING and "output" not in pending
+    assert done["status"] == DONE and done["output"] == {"msg": "hi"}
+
+def test_job_has_failed():
+    store = JobStore(Jobs())
+
+    async def run():
+        job = store.submit("echo", execution(ValueError("broken")))
+        await job.wait(5)
+        return job
+
+    job = asyncio.run(run())
+
+    assert job.dto() == {"id": job.id, "service": "echo", "status": FAILED}
+    assert job.finished is not None
+
+def test_job_is_cancelled():
+    store = JobStore(Jobs())
+
+    async def run():
+        job = store.submit("echo", execution(1, 60))
+        await asyncio.sleep(0)
+        assert job.cancel()
+        await asyncio.sleep(0)
+        return job
+
+    job = asyncio.run(run())
+
+    assert job.status == CANCELLED
+    assert not job.cancel()
+
+def test_wait_timeout_does_not_cancel_job():
+    store = JobStore(Jobs())
+
+    async def run():
+        job = store.submit("echo", execution(1, 0.2))
+        await job.wait(0.01)
+        status = job.status
+        await job.wait(5)
+        return status, job.status
+
+    assert asyncio.run(run()) == (PENDING, DONE)
+
+def test_full_store_rejects_job():
+    store = JobStore(Jobs(maxJobs=1))
+
+    async def run():
+        store.submit("echo", execution(1, 60))
+        with pytest.raises(OverflowError):
+            store.submit("echo", execution(2))
+        store.cancel()
+
+    asyncio.run(run())
+
+def test_finished_job_makes_room():
+    store = JobStore(Jobs(maxJobs=1))
+
+    async def run():
+        first = store.submit("echo", execution(1))
+        await first.wait(5)
+        second = store.submit("echo", execution(2))
+        await second.wait(5)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    with pytest.raises(KeyError):
+        store.get(first.id)
+    assert store.get(second.id).dto()["output"] == 2
+
+def test_finished_job_expires():
+    store = JobStore(Jobs(ttl=0))
+
+    async def run():
+        job = store.submit("echo", execution(1))
+        await job.wait(5)
+        return job
+
+    job = asyncio.run(run())
+
+    with pytest.raises(KeyError):
+        store.get(job.id)
+
+def test_stats_and_cancel():
+    store = JobStore(Jobs())
+
+    async def run():
+        done = store.submit("echo", execution(1))
+        store.submit("echo", execution(1, 60))
+        await done.wait(5)
+        before = store.stats()
+        store.cancel()
+        await asyncio.sleep(0)
+        return before, store.stats()
+
+    before, after = asyncio.run(run())
+
+    assert before == {PENDING: 1, DONE: 1, FAILED: 0, CANCELLED: 0}
+    assert after == {PENDING: 0, DONE: 1, FAILED: 0, CANCELLED: 1}
@@ -0,0 +1,90 @@
+# ---------------------------------------------------------------------------- #
+#                                 STATE JOURNAL                                #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import json
+import os
+
+import pytest
+
+from journal import Journal
+from system_setup import RegisteredService
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_state_is_recovered(tmp_path):
+    path = tmp_path / "journal.json"
+    journal = Journal(str(path))
+
+    journal.recordSystem(7)
+    journal.recordServices({"echo": RegisteredService(1, 11, "nb/echo"), "sum": RegisteredService(2, 12, "nb/sum")})
+    journal.recordAuthRules([21, 22])
+    journal.forgetServices(["sum"])
+    journal.forgetAuthRules([22])
+
+    recovered = Journal(str(path))
+
+    assert recovered.sysid == 7
+    assert recovered.services == {"echo": RegisteredService(1, 11, "nb/echo")}
+    assert recovered.authids == [21]
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_failed_write_keeps_previous_state(tmp_path, monkeypatch):
+    path = tmp_path / "journal.json"
+    journal = Journal(str(path))
+    journal.recordSystem(7)
+
+    # ! crash between writing the temporary file and the rename
+    def crash(src, dst):
+        raise OSError("crash")
+
+    monkeypatch.setattr(os, "replace", crash)
+
+    with pytest.raises(OSError):
+        journal.recordAuthRules([21])
+
+    monkeypatch.undo()
+    recovered = Journal(str(path))
+
+    assert recovered.sysid == 7
+    assert recovered.authids == []
+
+def test_broken_journal_is_ignored(tmp_path):
+    path = tmp_path / "journal.json"
+    path.write_text('{"sysid": 7, "services": {"echo": {"id"')
+
+    journal = Journal(str(path))
+
+    assert journal.empty
+
+    journal.recordSystem(8)
+    assert json.loads(path.read_text())["sysid"] == 8
+
+def test_replace_and_clear(tmp_path):
+    path = tmp_path / "journal.json"
+    journal = Journal(str(path))
+    journal.recordSystem(7)
+    journal.recordAuthRules([21])
+
+    journal.replace({"echo": RegisteredService(3, 13, "nb/echo")}, [31])
+    recovered = Journal(str(path))
+
+    assert recovered.services == {"echo": RegisteredService(3, 13, "nb/echo")}
+    assert recovered.authids == [31]
+
+    journal.clear()
+
+    assert journal.empty
+    assert not path.exists()
+
+def test_journal_without_path_is_not_persisted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    journal = Journal("")
+
+    journal.recordSystem(7)
+
+    assert journal.sysid == 7
+    assert not list(tmp_path.iterdir())
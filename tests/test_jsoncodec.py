@@ -0,0 +1,59 @@
+# ---------------------------------------------------------------------------- #
+#                                  JSON CODEC                                  #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import json
+import math
+
+import pytest
+
+import jsoncodec
+
+from jsoncodec import dumps, loads
+
+# ---------------------------------------------------------------------------- #
+#                                   FIXTURES                                   #
+# ---------------------------------------------------------------------------- #
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(jsoncodec, "orjson", None)
+    elif jsoncodec.orjson is None:
+        pytest.skip("orjson isn't installed")
+    return request.param
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+@pytest.mark.parametrize("document", [
+    b'{"a": [1, 2.5, "x", null, true]}',
+    b'{"id": 123456789012345678901234567890}',
+    b'[-9223372036854775809, 18446744073709551615]',
+    b'"\\u00e9"',
+])
+def test_loads_agrees_with_json(codec, document):
+    assert loads(document) == json.loads(document)
+
+def test_loads_keeps_big_integers(codec):
+    assert loads(b'{"id": 123456789012345678901234567890}') == {"id": 123456789012345678901234567890}
+
+def test_loads_accepts_nan(codec):
+    assert math.isnan(loads(b"[NaN]")[0])
+
+def test_loads_rejects_invalid_document(codec):
+    with pytest.raises(ValueError):
+        loads(b'{"a": ')
+
+def test_dumps_round_trip(codec):
+    obj = {"b": [1, 2.5, "é"], "a": None, "id": 123456789012345678901234567890}
+
+    assert loads(dumps(obj)) == obj
+
+def test_dumps_sorted_keys(codec):
+    assert dumps({"b": 1, "a": 2}, sortKeys=True) == b'{"a":2,"b":1}'
+
+def test_dumps_unknown_type_as_string(codec):
+    assert loads(dumps({"value": object})) == {"value": str(object)}
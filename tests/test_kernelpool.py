@@ -0,0 +1,183 @@
+# ---------------------------------------------------------------------------- #
+#                                  KERNEL POOL                                 #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import threading
+
+import nbformat
+import pytest
+
+import kernelpool
+
+from config import Kernels
+from engines import jpnb_execute, jpnb_execute_inmemory, shutdownKernelPool
+from kernelpool import KernelPool
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+class FakeKernel:
+    """
+    Stands in for a started kernel, the pool logic doesn't need a real one
+    """
+
+    def __init__(self, kernelName: str):
+        self.executions = 0
+        self.alive = True
+        self.stopped = False
+
+    def isAlive(self) -> bool:
+        return self.alive
+
+    def reset(self) -> bool:
+        return True
+
+    def shutdown(self) -> None:
+        self.stopped = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(kernelpool, "PooledKernel", FakeKernel)
+    pools = list()
+
+    def create(**settings) -> KernelPool:
+        pools.append(KernelPool(Kernels(**settings)))
+        pools[-1].start()
+        return pools[-1]
+
+    yield create
+
+    for created in pools:
+        created.shutdown()
+
+@pytest.fixture
+def kernels():
+    yield Kernels(minSize=1, maxSize=1, maxExecutions=0)
+    shutdownKernelPool()
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_idle_kernel_is_reused(pool):
+    kernels = pool(minSize=1, maxSize=1)
+
+    kernel = kernels.acquire()
+    kernels.release(kernel)
+
+    assert kernels.acquire() is kernel
+
+def test_kernel_is_recycled_after_max_executions(pool):
+    kernels = pool(minSize=1, maxSize=1, maxExecutions=2)
+
+    kernel = kernels.acquire()
+    kernels.release(kernel)
+    assert kernels.acquire() is kernel
+    kernels.release(kernel)
+
+    assert kernel.stopped
+    assert kernels.acquire() is not kernel
+
+def test_failed_execution_recycles_kernel(pool):
+    kernels = pool(minSize=1, maxSize=1)
+
+    kernel = kernels.acquire()
+    kernels.release(kernel, failed=True)
+
+    assert kernel.stopped
+    assert kernels.acquire() is not kernel
+
+def test_dead_kernel_is_dropped_outside_of_lock(pool):
+    kernels = pool(minSize=1, maxSize=1)
+    dead = kernels.acquire()
+    kernels.release(dead)
+    dead.alive = False
+    locked = list()
+
+    # ! another thread must be able to use the pool while the dead kernel shuts down
+    def shutdown():
+        probe = threading.Thread(target=lambda: locked.append(not kernels._cond.acquire(timeout=1) or kernels._cond.release()))
+        probe.start()
+        probe.join()
+        dead.stopped = True
+
+    dead.shutdown = shutdown
+    kernel = kernels.acquire()
+
+    assert kernel is not dead and dead.stopped
+    assert locked == [None]
+
+def test_full_pool_waits_for_release(pool):
+    kernels = pool(minSize=1, maxSize=1)
+    kernel = kernels.acquire()
+    acquired = list()
+
+    waiting = threading.Thread(target=lambda: acquired.append(kernels.acquire()))
+    waiting.start()
+    waiting.join(0.1)
+    assert not acquired
+
+    kernels.release(kernel)
+    waiting.join(5)
+
+    assert acquired == [kernel]
+
+def test_closed_pool_rejects_acquire(pool):
+    kernels = pool(minSize=0, maxSize=1)
+    kernels.shutdown()
+
+    with pytest.raises(RuntimeError):
+        kernels.acquire()
+
+def test_notebook_runs_on_kernel(tmp_path, writeNotebook, kernels):
+    writeNotebook(tmp_path / "nb.ipynb", "import json\nwith open('nb-inputdata.json') as f:\n    data = json.load(f)", "print(data['x'] * 2)")
+
+    assert jpnb_execute(str(tmp_path), "nb", {"x": 21}, "nb", kernels=kernels) == "42\n"
+    assert not (tmp_path / "nb-inputdata.json").exists()
+    assert nbformat.read(str(tmp_path / "nb.ipynb"), 4).cells[1].outputs[0].text == "42\n"
+
+def test_watched_notebook_is_not_written_back(tmp_path, writeNotebook, kernels):
+    path = writeNotebook(tmp_path / "nb.ipynb", "print(1)")
+    before = path.read_bytes()
+
+    assert jpnb_execute(str(tmp_path), "nb", {}, "nb", kernels=kernels, writeBack=False) == "1\n"
+    assert path.read_bytes() == before
+
+def test_hung_cell_exceeds_deadline(tmp_path, writeNotebook, kernels):
+    writeNotebook(tmp_path / "nb.ipynb", "import time\ntime.sleep(60)", "print(1)")
+
+    with pytest.raises(TimeoutError):
+        jpnb_execute(str(tmp_path), "nb", {}, "nb", timeout=1, kernels=kernels)
+
+    # ! the hung kernel has been replaced
+    writeNotebook(tmp_path / "nb.ipynb", "print(2)")
+    assert jpnb_execute(str(tmp_path), "nb", {}, "nb", timeout=30, kernels=kernels) == "2\n"
+
+def test_in_memory_input_and_output(tmp_path, writeNotebook, kernels):
+    path = writeNotebook(tmp_path / "nb.ipynb", "import json\ndata = json.loads(data_input)", "output = data['x'] * 2")
+    before = path.read_bytes()
+
+    assert jpnb_execute_inmemory(str(tmp_path), "nb", {"x": 21}, "nb", kernels=kernels) == "42"
+    assert path.read_bytes() == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["nb.ipynb"]
+
+def test_in_memory_modes(tmp_path, writeNotebook, kernels):
+    writeNotebook(tmp_path / "nb.ipynb", "output = type(data_input).__name__")
+
+    assert jpnb_execute_inmemory(str(tmp_path), "nb", {"x": 1}, "nb", "object", kernels=kernels) == "dict"
+    assert jpnb_execute_inmemory(str(tmp_path), "nb", b"raw", "nb", "raw", kernels=kernels) == "bytes"
+
+def test_in_memory_falls_back_to_last_output(tmp_path, writeNotebook, kernels):
+    writeNotebook(tmp_path / "nb.ipynb", "print('done')")
+
+    assert jpnb_execute_inmemory(str(tmp_path), "nb", {}, "nb", kernels=kernels) == "done\n"
+
+def test_namespace_is_reset_between_executions(tmp_path, writeNotebook, kernels):
+    writeNotebook(tmp_path / "a.ipynb", "leftover = 1\noutput = 1")
+    writeNotebook(tmp_path / "b.ipynb", "output = 'leftover' in globals()")
+
+    jpnb_execute_inmemory(str(tmp_path), "a", {}, "a", kernels=kernels)
+
+    assert jpnb_execute_inmemory(str(tmp_path), "b", {}, "b", kernels=kernels) == "False"
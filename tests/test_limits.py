@@ -0,0 +1,193 @@
+# ---------------------------------------------------------------------------- #
+#                              ADMISSION CONTROL                               #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+
+import pytest
+
+from config import Limits
+from limits import ADAPTER_OVERLOADED, SERVICE_OVERLOADED, AdmissionControl, OverloadedError
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+async def hold(admission, limiter, release: asyncio.Event, queue: bool = True):
+    async with admission.slot(limiter, queue):
+        await release.wait()
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_full_service_queue_is_rejected_with_429():
+    admission = AdmissionControl(Limits(retryAfter=7))
+    limiter = admission.limiter("echo", {"limits": {"max-concurrent": 1, "max-queue": 1}})
+
+    async def run():
+        release = asyncio.Event()
+        running = [asyncio.create_task(hold(admission, limiter, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError) as e:
+            await hold(admission, limiter, release)
+
+        stats = limiter.stats()
+        release.set()
+        await asyncio.gather(*running)
+        return e.value, stats
+
+    error, stats = asyncio.run(run())
+
+    assert (error.status_code, error.retryAfter) == (SERVICE_OVERLOADED, 7)
+    assert stats == {"maxConcurrent": 1, "maxQueue": 1, "active": 1, "waiting": 1, "rejected": 1}
+    assert (limiter.active, limiter.waiting) == (0, 0)
+
+def test_full_global_queue_is_rejected_with_503():
+    admission = AdmissionControl(Limits(maxConcurrent=1, maxQueue=0))
+    echo = admission.limiter("echo", {})
+    other = admission.limiter("other", {})
+
+    async def run():
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(admission, echo, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError) as e:
+            await hold(admission, other, release)
+
+        release.set()
+        await running
+        return e.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == ADAPTER_OVERLOADED
+    assert admission.total.rejected == 1
+    assert (admission.total.active, other.active) == (0, 0)
+
+def test_queued_request_is_admitted():
+    admission = AdmissionControl(Limits(serviceMaxConcurrent=1, serviceMaxQueue=1))
+    limiter = admission.limiter("echo", {})
+    order = list()
+
+    async def request(i, release):
+        async with admission.slot(limiter):
+            order.append(i)
+            await release.wait()
+
+    async def run():
+        release = asyncio.Event()
+        running = [asyncio.create_task(request(i, release)) for i in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(run())
+
+    assert order == [0, 1]
+    assert limiter.rejected == 0
+
+def test_unqueued_request_waits_regardless_of_limit():
+    admission = AdmissionControl(Limits())
+    limiter = admission.limiter("echo", {"limits": {"max-concurrent": 1, "max-queue": 0}})
+
+    async def run():
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(admission, limiter, release))
+        waiting = asyncio.create_task(hold(admission, limiter, release, queue=False))
+        await asyncio.sleep(0)
+        waitingCount = limiter.waiting
+        release.set()
+        await asyncio.gather(running, waiting)
+        return waitingCount
+
+    # ! it isn't counted as queued
+    assert asyncio.run(run()) == 0
+    assert limiter.rejected == 0
+
+def test_unqueued_requests_do_not_fill_the_queue():
+    admission = AdmissionControl(Limits())
+    limiter = admission.limiter("echo", {"limits": {"max-concurrent": 1, "max-queue": 1}})
+
+    async def run():
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(admission, limiter, release))
+        jobs = [asyncio.create_task(hold(admission, limiter, release, queue=False)) for _ in range(3)]
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(admission, limiter, release))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(running, queued, *jobs)
+
+    asyncio.run(run())
+
+    assert limiter.rejected == 0
+
+def test_service_slot_is_not_held_while_waiting_for_global_slot():
+    admission = AdmissionControl(Limits(maxConcurrent=1, serviceMaxConcurrent=1))
+    echo = admission.limiter("echo", {})
+    other = admission.limiter("other", {})
+
+    async def run():
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(admission, other, release))
+        await asyncio.sleep(0)
+        blocked = asyncio.create_task(hold(admission, echo, release))
+        await asyncio.sleep(0)
+        counters = (echo.active, echo.waiting, admission.total.waiting)
+        release.set()
+        await asyncio.gather(running, blocked)
+        return counters
+
+    # ! the blocked request waits in the global queue only
+    assert asyncio.run(run()) == (0, 0, 1)
+    assert (echo.active, other.active, admission.total.active) == (0, 0, 0)
+
+def test_global_slot_is_not_held_while_waiting_for_service_slot():
+    admission = AdmissionControl(Limits(maxConcurrent=2, serviceMaxConcurrent=1))
+    echo = admission.limiter("echo", {})
+    other = admission.limiter("other", {})
+    order = list()
+
+    async def request(limiter, name, release):
+        async with admission.slot(limiter):
+            order.append(name)
+            await release.wait()
+
+    async def run():
+        release, later = asyncio.Event(), asyncio.Event()
+        running = asyncio.create_task(request(echo, "echo", release))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(request(echo, "echo-waiting", later))
+        await asyncio.sleep(0)
+        # ! the second global slot is still free for other services
+        admitted = asyncio.create_task(request(other, "other", later))
+        await asyncio.sleep(0)
+        counters = admission.total.active
+        release.set()
+        later.set()
+        await asyncio.gather(running, waiting, admitted)
+        return counters
+
+    assert asyncio.run(run()) == 2
+    assert order == ["echo", "other", "echo-waiting"]
+
+def test_unlimited_service_is_counted():
+    admission = AdmissionControl(Limits())
+    limiter = admission.limiter("echo", {})
+
+    async def run():
+        async with admission.slot(limiter):
+            return admission.stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["services"]["echo"]["active"] == 1
+    assert stats["global"]["active"] == 1
+    assert limiter.active == 0
+
+    admission.remove("echo")
+    assert admission.stats()["services"] == {}
@@ -0,0 +1,104 @@
+# ---------------------------------------------------------------------------- #
+#                               NOTEBOOK SERVICES                              #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+from watcher import discoverNotebooks
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+def serve(served, nbRoot):
+    serving = served()
+    for nb in discoverNotebooks(str(nbRoot)).values():
+        serving.services.provide(nb)
+    return serving.client()
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_job_is_submitted_and_polled(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "import json\noutput = json.loads(data_input)['x'] * 2", mode="job")
+
+    with serve(served, tmp_path) as client:
+        submitted = client.post("/nb", json={"x": 21})
+        polled = client.get("/nb/job", params={"id": submitted.json()["id"], "wait": 5})
+
+    assert submitted.status_code == 202
+    assert submitted.json()["service"] == "nb"
+    assert polled.json() == {"id": submitted.json()["id"], "service": "nb", "status": "done", "output": 42}
+
+def test_running_job_is_cancelled(tmp_path, writeNotebook, served, config):
+    config.execution.executor = "thread"
+    writeNotebook(tmp_path / "nb.ipynb", "import time\ntime.sleep(2)\noutput = 1", mode="job")
+
+    with serve(served, tmp_path) as client:
+        job = client.post("/nb", json={}).json()
+        cancelled = client.delete("/nb/job", params={"id": job["id"]})
+        polled = client.get("/nb/job", params={"id": job["id"]})
+
+    assert cancelled.json()["status"] == "cancelled"
+    assert polled.json()["status"] == "cancelled"
+
+def test_unknown_job_is_not_found(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1", mode="job")
+
+    with serve(served, tmp_path) as client:
+        assert client.get("/nb/job", params={"id": "unknown"}).status_code == 404
+        assert client.delete("/nb/job", params={"id": "unknown"}).status_code == 404
+
+def test_invalid_wait_is_bad_request(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1", mode="job")
+
+    with serve(served, tmp_path) as client:
+        job = client.post("/nb", json={}).json()
+        assert client.get("/nb/job", params={"id": job["id"], "wait": "soon"}).status_code == 400
+
+def test_cached_output_is_marked(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "import json, random\noutput = [json.loads(data_input), random.random()]", cache=True, output="json")
+
+    with serve(served, tmp_path) as client:
+        first, second, other = (client.post("/nb", json=data) for data in (1, 1, 2))
+
+    assert [first.headers["X-Cache"], second.headers["X-Cache"], other.headers["X-Cache"]] == ["MISS", "HIT", "MISS"]
+    assert second.json() == first.json()
+    assert other.json()[0] == 2
+
+def test_uncached_output_is_not_marked(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+
+    with serve(served, tmp_path) as client:
+        assert "X-Cache" not in client.post("/nb", json={}).headers
+
+def test_raw_input_is_passed_as_bytes(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = data_input.decode().upper()", input="raw")
+
+    with serve(served, tmp_path) as client:
+        assert client.post("/nb", content=b"not json").text == "NOT JSON"
+
+def test_json_output_is_serialized(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "import json\noutput = {'input': json.loads(data_input), 'id': 123456789012345678901234567890}", output="json")
+
+    with serve(served, tmp_path) as client:
+        response = client.post("/nb", json=[1, "a"])
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"input": [1, "a"], "id": 123456789012345678901234567890}
+
+def test_unknown_modes_fall_back_to_defaults(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "import json\noutput = json.loads(data_input)['x']", input="xml", output="yaml")
+
+    with serve(served, tmp_path) as client:
+        assert client.post("/nb", json={"x": 1}).text == "1"
+
+def test_exceeded_deadline_is_gateway_timeout(tmp_path, writeNotebook, served, config):
+    config.execution.executor = "thread"
+    writeNotebook(tmp_path / "nb.ipynb", "import time\ntime.sleep(0.5)\noutput = 1", timeout=0.05)
+
+    with serve(served, tmp_path) as client:
+        response = client.post("/nb", json={})
+
+    assert response.status_code == 504
+    assert "deadline" in response.json()["errorMessage"]
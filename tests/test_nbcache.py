@@ -0,0 +1,108 @@
+# ---------------------------------------------------------------------------- #
+#                                NOTEBOOK CACHE                                #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import os
+
+import nbformat
+import pytest
+
+from nbcache import NotebookCache, prunedCells
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+def run(entry):
+    namespace = dict()
+    for code in entry.code:
+        exec(code, namespace)
+    return namespace["output"]
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_unchanged_notebook_is_served_from_cache(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    cache = NotebookCache()
+
+    assert cache.get(path) is cache.get(path)
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+def test_changed_mtime_invalidates_entry(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    cache = NotebookCache()
+    assert run(cache.get(path)) == 1
+
+    # ! same size, only the modification time tells the edit apart
+    stat = os.stat(path)
+    writeNotebook(path, "output = 2")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert os.stat(path).st_size == stat.st_size
+
+    assert run(cache.get(path)) == 2
+    assert cache.misses == 2
+
+def test_changed_size_invalidates_entry(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    cache = NotebookCache()
+    assert run(cache.get(path)) == 1
+
+    # ! same modification time, only the size tells the edit apart
+    stat = os.stat(path)
+    writeNotebook(path, "output = 1000")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert run(cache.get(path)) == 1000
+    assert cache.misses == 2
+
+def test_parsed_notebook_is_cached_and_invalidated(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "%time output = 1")
+    cache = NotebookCache()
+
+    nb = cache.getNotebook(path)
+    assert cache.getNotebook(path) is nb
+
+    stat = os.stat(path)
+    writeNotebook(path, "%time output = 2")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.getNotebook(path).cells[0].source == "%time output = 2"
+
+    cache.invalidate(path)
+    assert cache.stats()["entries"] == 0
+
+def test_invalidate_drops_entry(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    cache = NotebookCache()
+
+    entry = cache.get(path)
+    cache.invalidate(path)
+
+    assert cache.get(path) is not entry
+    assert cache.misses == 2
+
+def test_supported_magics_are_compiled(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "%matplotlib inline\nx = 2", "%time output = x * 3")
+
+    assert run(NotebookCache().get(path)) == 6
+
+def test_shell_command_is_rejected(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "!ls", "output = 1")
+
+    with pytest.raises(SyntaxError):
+        NotebookCache().get(path)
+
+def test_pruning_is_opt_in(tmp_path, writeNotebook):
+    sources = ("x = 1", "print(x)", "output = x")
+
+    assert prunedCells(nbformat.read(str(writeNotebook(tmp_path / "a.ipynb", *sources)), 4)) == []
+    assert prunedCells(nbformat.read(str(writeNotebook(tmp_path / "b.ipynb", *sources, prune=True)), 4)) == [2]
+
+def test_pruned_cells_are_not_executed(tmp_path, writeNotebook):
+    path = writeNotebook(tmp_path / "nb.ipynb", "x = 1", "y = 1 / 0", "output = x", prune=True)
+    entry = NotebookCache().get(path)
+
+    assert entry.pruned == [2]
+    assert run(entry) == 1
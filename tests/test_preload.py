@@ -0,0 +1,68 @@
+# ---------------------------------------------------------------------------- #
+#                                WORKER TEMPLATE                               #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import gc
+import json
+import sys
+
+import pytest
+
+from engines import cacheStats
+from executor import FORKSERVER, ProcessExecutor
+from preload import PRELOAD_ENV, preload, settings
+
+# ---------------------------------------------------------------------------- #
+#                                   FIXTURES                                   #
+# ---------------------------------------------------------------------------- #
+
+@pytest.fixture
+def frozen():
+    yield
+    gc.unfreeze()
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_settings_round_trip():
+    assert json.loads(settings(["numpy"], "/nb")) == {"modules": ["numpy"], "nbRoot": "/nb"}
+
+def test_preload_imports_compiles_and_freezes(tmp_path, writeNotebook, frozen):
+    sys.modules.pop("colorsys", None)
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    entries = cacheStats()["entries"]
+
+    preload(["colorsys"], str(tmp_path))
+
+    assert "colorsys" in sys.modules
+    assert cacheStats()["entries"] == entries + 1
+    assert gc.get_freeze_count() > 0
+    assert gc.isenabled()
+
+def test_preload_failures_are_logged_only(tmp_path, writeNotebook, frozen):
+    writeNotebook(tmp_path / "broken.ipynb", "output = (")
+
+    preload(["no_such_module"], str(tmp_path))
+
+    assert gc.isenabled()
+
+def test_workers_are_forked_from_template(tmp_path, writeNotebook, monkeypatch):
+    # ! restored after the test, the executor sets it for the template process
+    monkeypatch.setenv(PRELOAD_ENV, "")
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    executor = ProcessExecutor(workers=1, startMethod=FORKSERVER, preload=["colorsys"], nbRoot=str(tmp_path))
+
+    async def run():
+        return await executor.submit(cacheStats), await executor.submit(gc.get_freeze_count)
+
+    try:
+        stats, frozenObjects = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    # ! the notebook has been compiled by the template, not by the worker
+    assert stats["entries"] >= 1 and stats["misses"] >= 1
+    assert frozenObjects > 0
@@ -0,0 +1,95 @@
+# ---------------------------------------------------------------------------- #
+#                               DEAD CELL PRUNING                              #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import ast
+
+from pruning import liveCells
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+def live(*sources):
+    return liveCells([ast.parse(source) for source in sources])
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_unused_cells_are_pruned():
+    assert live("x = 1", "print(x)", "unused = 2", "output = x") == [True, False, False, True]
+
+def test_transitive_uses_are_kept():
+    assert live("a = 1", "b = a + 1", "c = 5", "output = b") == [True, True, False, True]
+
+def test_modified_receiver_is_kept():
+    assert live("data = []", "data.append(1)", "data.sort()", "output = data") == [True, True, True, True]
+
+def test_unused_container_method_is_pruned():
+    assert live("data = {'a': 1}", "data.pop('a')", "name = str('x')", "name.upper()", "output = 1") == [False, False, False, False, True]
+
+def test_database_insert_is_kept():
+    assert live("import pymongo\ndb = pymongo.MongoClient().app", "db.audit.insert({'event': 'call'})", "output = 1") == [True, True, True]
+
+def test_method_of_unknown_receiver_is_kept():
+    assert live("import redis\nr = redis.Redis()", "r.pop('lock')", "output = 1") == [True, True, True]
+    assert live("def connect():\n    return {}", "client = connect()", "client.update({'a': 1})", "output = 1") == [True, True, True, True]
+
+def test_rebound_container_is_not_trusted():
+    assert live("import redis", "r = {}", "r = redis.Redis()", "r.pop('lock')", "output = 1") == [True, True, True, True, True]
+
+def test_method_of_container_item_is_kept():
+    assert live("clients = {}", "clients['db'].insert({'event': 'call'})", "output = 1") == [True, True, True]
+
+def test_shadowed_container_builtin_is_not_trusted():
+    assert live("import redis\ndict = redis.Redis", "r = dict()", "r.pop('lock')", "output = 1") == [True, True, True, True]
+
+def test_pure_calls_are_pruned():
+    assert live("import math", "x = 4", "y = math.sqrt(x)", "output = x") == [False, True, False, True]
+
+def test_request_is_kept():
+    assert live("import requests", "requests.post('http://host/api', json={})", "output = 1") == [True, True, True]
+
+def test_file_removal_is_kept():
+    assert live("import os", "os.remove('tmp.txt')", "output = 1") == [True, True, True]
+    assert live("from os import remove", "remove('tmp.txt')", "output = 1") == [True, True, True]
+
+def test_dataframe_export_is_kept():
+    assert live("import pandas as pd", "df = pd.DataFrame()", "df.to_csv('out.csv')", "output = 1") == [True, True, True, True]
+
+def test_saved_figure_is_kept():
+    assert live("import matplotlib.pyplot as plt", "plt.plot([1, 2])\nplt.savefig('fig.png')", "output = 1") == [True, True, True]
+
+def test_unknown_call_is_kept():
+    assert live("open('log.txt', 'a').write('x')", "output = 1") == [True, True]
+
+def test_effect_of_user_function_is_kept():
+    sources = ("import os", "def save(path):\n    os.remove(path)", "save('tmp.txt')", "output = 1")
+
+    assert live(*sources) == [True, True, True, True]
+
+def test_effect_of_nested_user_function_is_kept():
+    sources = ("def clean():\n    open('x', 'w')", "def run():\n    clean()", "run()", "output = 1")
+
+    assert live(*sources) == [True, True, True, True]
+
+def test_pure_user_function_is_pruned():
+    sources = ("def double(x):\n    return 2 * x", "y = double(2)", "output = double(3)")
+
+    assert live(*sources) == [True, False, True]
+
+def test_user_function_modifying_argument_is_kept():
+    sources = ("def add(items):\n    items.append(1)", "data = []", "add(data)", "output = data")
+
+    assert live(*sources) == [True, True, True, True]
+
+def test_raise_is_kept():
+    assert live("x = 1", "assert x > 0", "output = x") == [True, True, True]
+
+def test_dynamic_notebook_is_not_pruned():
+    assert live("x = 1", "exec('y = 2')", "output = 1") == [True, True, True]
+
+def test_notebook_without_output_is_not_pruned():
+    assert live("x = 1", "print(x)") == [True, True]
@@ -0,0 +1,174 @@
+# ---------------------------------------------------------------------------- #
+#                                 RESULT CACHE                                 #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import os
+
+import pytest
+
+from config import ResultCacheSettings
+from jsoncodec import dumps
+from resultcache import ResultCache, cacheTTL
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+class Counter:
+    """
+    Execution returning its input, it counts the calls
+    """
+
+    def __init__(self, delay: float = 0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self, output):
+        async def execute():
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            return output
+        return execute
+
+@pytest.fixture
+def notebook(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    path.write_text('{"cells": []}')
+    return path
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_ttl_from_options():
+    assert cacheTTL({}, 300) is None
+    assert cacheTTL({"cache": True}, 300) == 300
+    assert cacheTTL({"cache": {"ttl": 5}}, 300) == 5
+
+def test_key_depends_on_input(notebook):
+    cache = ResultCache(ResultCacheSettings())
+
+    assert cache.key(notebook, {"a": 1, "b": 2}) == cache.key(notebook, {"b": 2, "a": 1})
+    assert cache.key(notebook, {"a": 1}) != cache.key(notebook, {"a": 2})
+    assert cache.key(notebook, b"raw") != cache.key(notebook, b"other")
+
+def test_key_depends_on_notebook(notebook):
+    cache = ResultCache(ResultCacheSettings())
+    key = cache.key(notebook, {"a": 1})
+
+    stat = os.stat(notebook)
+    notebook.write_text('{"cells": [1]}')
+    os.utime(notebook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.key(notebook, {"a": 1}) != key
+
+def test_output_is_served_from_cache():
+    cache = ResultCache(ResultCacheSettings())
+    execute = Counter()
+
+    async def run():
+        return await cache.get("k", 60, execute(1)), await cache.get("k", 60, execute(2))
+
+    assert asyncio.run(run()) == ((1, False), (1, True))
+    assert execute.calls == 1
+    assert cache.stats() == {"entries": 1, "bytes": 1, "hits": 1, "misses": 1}
+
+def test_output_expires():
+    cache = ResultCache(ResultCacheSettings())
+    execute = Counter()
+
+    async def run():
+        await cache.get("k", 0.05, execute(1))
+        await asyncio.sleep(0.1)
+        return await cache.get("k", 0.05, execute(2))
+
+    assert asyncio.run(run()) == (2, False)
+    assert execute.calls == 2
+
+def test_zero_ttl_is_not_stored():
+    cache = ResultCache(ResultCacheSettings())
+
+    asyncio.run(cache.get("k", 0, Counter()(1)))
+
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(ResultCacheSettings(maxEntries=2))
+    execute = Counter()
+
+    async def run():
+        await cache.get("a", 60, execute("a"))
+        await cache.get("b", 60, execute("b"))
+        await cache.get("a", 60, execute("a"))
+        await cache.get("c", 60, execute("c"))
+        return [(await cache.get(key, 60, execute(key)))[1] for key in "acb"]
+
+    assert asyncio.run(run()) == [True, True, False]
+
+def test_size_limit():
+    cache = ResultCache(ResultCacheSettings(maxBytes=10))
+    execute = Counter()
+
+    async def run():
+        await cache.get("big", 60, execute("x" * 11))
+        await cache.get("a", 60, execute("x" * 6))
+        await cache.get("b", 60, execute("x" * 6))
+
+    asyncio.run(run())
+
+    # ! JSON strings are quoted
+    assert list(cache._entries) == ["b"]
+    assert cache.stats()["bytes"] == 8
+
+def test_size_is_the_serialized_output():
+    cache = ResultCache(ResultCacheSettings())
+    output = {"values": list(range(1000))}
+
+    asyncio.run(cache.get("k", 60, Counter()(output)))
+
+    assert cache.stats()["bytes"] == len(dumps(output))
+
+def test_concurrent_lookups_execute_once():
+    cache = ResultCache(ResultCacheSettings())
+    execute = Counter(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(cache.get("k", 60, execute(1)) for _ in range(5)))
+
+    assert asyncio.run(run()) == [(1, False)] + [(1, True)] * 4
+    assert execute.calls == 1
+
+def test_failure_is_shared_and_not_cached():
+    cache = ResultCache(ResultCacheSettings())
+    calls = list()
+
+    async def broken():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("broken")
+
+    async def run():
+        results = await asyncio.gather(*(cache.get("k", 60, broken) for _ in range(3)), return_exceptions=True)
+        return results, await cache.get("k", 60, Counter()(1))
+
+    results, output = asyncio.run(run())
+
+    assert all(isinstance(e, ValueError) for e in results)
+    assert len(calls) == 1
+    assert output == (1, False)
+
+def test_abandoned_execution_is_taken_over():
+    cache = ResultCache(ResultCacheSettings())
+    execute = Counter(delay=0.05)
+
+    async def run():
+        first = asyncio.create_task(cache.get("k", 60, execute(1)))
+        second = asyncio.create_task(cache.get("k", 60, execute(2)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == (2, False)
+    assert execute.calls == 2
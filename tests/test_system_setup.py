@@ -0,0 +1,237 @@
+# ---------------------------------------------------------------------------- #
+#                                 SYSTEM SETUP                                 #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import json
+
+import pytest
+
+import system_setup
+
+from arrowhead_client.response import Response
+from arrowhead_client.system import ArrowheadSystem
+
+from system_setup import RegisteredService
+
+# --------------------------------- CONSTANTS -------------------------------- #
+SYSID = 7
+OTHER = 8
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+class FakeClient:
+    """
+    Stands in for the asynchronous sysop client, it serves the management
+    endpoints from memory and records the changes
+    ...
+
+    Attributes
+    ----------
+    services: list
+        service registry entries
+    rules: list
+        authorization rules
+    registered: list
+        names of the registered services
+    removed: list
+        ID-s of the unregistered services
+    authorized: dict
+        service definition ID-s of the stored rules by consumer ID
+    revoked: list
+        ID-s of the removed authorization rules
+    failing: set
+        names of the services whose registration is refused
+    concurrent: int
+        highest number of concurrent requests
+    """
+
+    def __init__(self, services: list, rules: list):
+        self.services = services
+        self.rules = rules
+        self.registered, self.removed, self.authorized, self.revoked = list(), list(), dict(), list()
+        self.failing = set()
+        self.concurrent = 0
+        self._running = 0
+        self._ids = 100
+
+    async def setup(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def consume_service(self, name: str, json: dict = None, rmid: int = None) -> Response:
+        self._running += 1
+        self.concurrent = max(self.concurrent, self._running)
+        try:
+            await asyncio.sleep(0.01)
+            return self._serve(name, json, rmid)
+        finally:
+            self._running -= 1
+
+    def _serve(self, name: str, json: dict, rmid: int) -> Response:
+        if name == "mgmt_get_services":
+            return self._response({"data": self.services})
+        if name == "mgmt_authorization_get":
+            return self._response({"data": self.rules})
+        if name == "mgmt_register_service":
+            if json["serviceDefinition"] in self.failing:
+                return Response(b'{"errorMessage": "refused"}', "JSON", 400)
+            self.registered.append(json["serviceDefinition"])
+            return self._response(serviceEntry(self._id(), self._id(), json["serviceDefinition"], json["serviceUri"], SYSID))
+        if name == "mgmt_remove_service":
+            self.removed.append(rmid)
+            return self._response({})
+        if name == "mgmt_authorization_store":
+            self.authorized[json["consumerId"]] = json["serviceDefinitionIds"]
+            return self._response({"data": [{"id": self._id()} for _ in json["serviceDefinitionIds"]]})
+        if name == "mgmt_authorization_remove":
+            self.revoked.append(rmid)
+            return self._response({})
+        raise KeyError(name)
+
+    def _id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def _response(self, body: dict) -> Response:
+        return Response(json.dumps(body).encode(), "JSON", 200)
+
+def serviceEntry(entryid: int, definitionid: int, sname: str, uri: str, provider: int) -> dict:
+    return {
+        "id": entryid,
+        "serviceDefinition": {"id": definitionid, "serviceDefinition": sname},
+        "serviceUri": uri,
+        "provider": {"id": provider}
+    }
+
+def authRule(authid: int, consumer: int, definitionid: int, provider: int) -> dict:
+    return {
+        "id": authid,
+        "consumerSystem": {"id": consumer},
+        "serviceDefinition": {"id": definitionid},
+        "providerSystem": {"id": provider}
+    }
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(services: list = (), rules: list = ()) -> FakeClient:
+        fake = FakeClient(list(services), list(rules))
+        monkeypatch.setattr(system_setup, "_async_setup_client", fake)
+        return fake
+    return install
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_services_are_registered_concurrently(config, client, monkeypatch):
+    monkeypatch.setattr(system_setup, "_async_limit", 4)
+    fake = client()
+    provider = ArrowheadSystem.make("prototaip", "127.0.0.1", 9556, "")
+    services = {"nb-{}".format(i): "nb/{}".format(i) for i in range(10)}
+
+    registered = asyncio.run(system_setup.registerServices(config, provider, services))
+
+    assert sorted(registered) == sorted(services)
+    assert registered["nb-3"].uri == "nb/3"
+    # ! at most 'concurrency' requests at a time
+    assert fake.concurrent == 4
+
+def test_failed_registration_is_left_out(config, client, monkeypatch):
+    monkeypatch.setattr(system_setup, "_async_limit", 4)
+    fake = client()
+    fake.failing = {"broken"}
+    provider = ArrowheadSystem.make("prototaip", "127.0.0.1", 9556, "")
+
+    registered = asyncio.run(system_setup.registerServices(config, provider, {"echo": "nb/echo", "broken": "nb/broken", "sum": "nb/sum"}))
+
+    assert sorted(registered) == ["echo", "sum"]
+
+def test_failed_request_does_not_stop_the_others(config, client):
+    fake = client()
+
+    async def remove(service_id: int) -> None:
+        if service_id == 2:
+            raise OSError("connection reset")
+        await fake.consume_service("mgmt_remove_service", rmid=service_id)
+
+    done = asyncio.run(system_setup._fanOut([1, 2, 3], remove, "Removal of service"))
+
+    assert [item for item, _ in done] == [1, 3]
+    assert fake.removed == [1, 3]
+
+def test_services_diff(config, client):
+    fake = client(services=[
+        serviceEntry(1, 11, "echo", "nb/echo", SYSID),
+        serviceEntry(2, 12, "sum", "nb/old/sum", SYSID),
+        serviceEntry(3, 13, "gone", "nb/gone", SYSID),
+        serviceEntry(4, 14, "echo", "nb/echo", OTHER)
+    ])
+    provider = ArrowheadSystem.make("prototaip", "127.0.0.1", 9556, "")
+
+    services = asyncio.run(system_setup.reconcileServices(config, provider, SYSID, {"echo": "nb/echo", "sum": "nb/sum", "new": "nb/new"}))
+
+    # ! unchanged services are kept, moved ones are registered again
+    assert sorted(fake.removed) == [2, 3]
+    assert sorted(fake.registered) == ["new", "sum"]
+    assert services["echo"] == RegisteredService(1, 11, "nb/echo")
+    assert services["sum"].uri == "nb/sum"
+    assert sorted(services) == ["echo", "new", "sum"]
+
+def test_services_in_sync(config, client):
+    fake = client(services=[serviceEntry(1, 11, "echo", "nb/echo", SYSID)])
+    provider = ArrowheadSystem.make("prototaip", "127.0.0.1", 9556, "")
+
+    services = asyncio.run(system_setup.reconcileServices(config, provider, SYSID, {"echo": "nb/echo"}))
+
+    assert (fake.removed, fake.registered) == ([], [])
+    assert services == {"echo": RegisteredService(1, 11, "nb/echo")}
+
+def test_auth_rules_diff(config, client):
+    config.autoSetup.consumers = [201, 202]
+    fake = client(rules=[
+        authRule(1, 201, 11, SYSID),
+        authRule(2, 201, 99, SYSID),
+        authRule(3, 203, 11, SYSID),
+        authRule(4, 202, 12, OTHER)
+    ])
+
+    authids = asyncio.run(system_setup.reconcileAuthRules(config, [11, 12], SYSID))
+
+    # ! rules of unknown services or consumers are removed, the missing pairs are stored
+    assert sorted(fake.revoked) == [2, 3]
+    assert fake.authorized == {201: [12], 202: [11, 12]}
+    assert authids[0] == 1
+    assert len(authids) == 4
+
+def test_auth_rules_in_sync(config, client):
+    config.autoSetup.consumers = [201]
+    fake = client(rules=[authRule(1, 201, 11, SYSID)])
+
+    authids = asyncio.run(system_setup.reconcileAuthRules(config, [11], SYSID))
+
+    assert (fake.revoked, fake.authorized) == ([], {})
+    assert authids == [1]
+
+def test_duplicate_entries_are_removed(config, client):
+    fake = client(services=[
+        serviceEntry(1, 11, "echo", "nb/old/echo", SYSID),
+        serviceEntry(2, 11, "echo", "nb/echo", SYSID),
+        serviceEntry(3, 11, "echo", "nb/echo", SYSID),
+        serviceEntry(4, 12, "sum", "nb/old/sum", SYSID),
+        serviceEntry(5, 12, "sum", "nb/older/sum", SYSID)
+    ])
+    provider = ArrowheadSystem.make("prototaip", "127.0.0.1", 9556, "")
+
+    services = asyncio.run(system_setup.reconcileServices(config, provider, SYSID, {"echo": "nb/echo", "sum": "nb/sum"}))
+
+    # ! one entry with the current URI is kept, the others are removed
+    assert sorted(fake.removed) == [1, 3, 4, 5]
+    assert fake.registered == ["sum"]
+    assert services["echo"] == RegisteredService(2, 11, "nb/echo")
+    assert services["sum"].uri == "nb/sum"
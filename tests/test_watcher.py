@@ -0,0 +1,138 @@
+# ---------------------------------------------------------------------------- #
+#                               NOTEBOOK WATCHER                               #
+# ---------------------------------------------------------------------------- #
+
+# ---------------------------------- IMPORTS --------------------------------- #
+import asyncio
+import os
+
+from watcher import NotebookWatcher, discoverNotebooks
+
+# ---------------------------------------------------------------------------- #
+#                                    HELPERS                                   #
+# ---------------------------------------------------------------------------- #
+
+def watch(nbRoot: str, calls: list, failing: str = None) -> NotebookWatcher:
+    def record(event: str):
+        async def callback(nb):
+            calls.append((event, nb.spath))
+            if event == failing:
+                raise RuntimeError(event)
+        return callback
+
+    return NotebookWatcher(nbRoot, 1, discoverNotebooks(nbRoot), record("added"), record("changed"), record("removed"))
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+# ---------------------------------------------------------------------------- #
+#                                     TESTS                                    #
+# ---------------------------------------------------------------------------- #
+
+def test_notebooks_are_discovered(tmp_path, writeNotebook):
+    (tmp_path / "sub").mkdir()
+    writeNotebook(tmp_path / "my nb.ipynb", "output = 1")
+    writeNotebook(tmp_path / "sub" / "other_nb.ipynb", "output = 1")
+    (tmp_path / "notes.txt").write_text("skipped")
+
+    notebooks = discoverNotebooks(str(tmp_path))
+
+    assert sorted(notebooks) == ["my-nb", "sub/other-nb"]
+    assert notebooks["sub/other-nb"].sname == "other-nb"
+
+def test_differences_are_reported(tmp_path, writeNotebook):
+    writeNotebook(tmp_path / "kept.ipynb", "output = 1")
+    writeNotebook(tmp_path / "changed.ipynb", "output = 1")
+    writeNotebook(tmp_path / "removed.ipynb", "output = 1")
+    calls = list()
+    watcher = watch(str(tmp_path), calls)
+
+    touch(tmp_path / "changed.ipynb")
+    (tmp_path / "removed.ipynb").unlink()
+    writeNotebook(tmp_path / "added.ipynb", "output = 1")
+    asyncio.run(watcher.poll())
+
+    assert calls == [("removed", "removed"), ("added", "added"), ("changed", "changed")]
+
+    # ! the differences are reported once
+    calls.clear()
+    asyncio.run(watcher.poll())
+    assert calls == []
+
+def test_failing_callback_does_not_stop_polling(tmp_path, writeNotebook):
+    calls = list()
+    watcher = watch(str(tmp_path), calls, failing="added")
+
+    writeNotebook(tmp_path / "a.ipynb", "output = 1")
+    writeNotebook(tmp_path / "b.ipynb", "output = 1")
+    asyncio.run(watcher.poll())
+
+    assert sorted(calls) == [("added", "a"), ("added", "b")]
+    assert sorted(watcher.notebooks) == ["a", "b"]
+
+def test_changed_notebook_is_redefined(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    nb = discoverNotebooks(str(tmp_path))["nb"]
+    serving = served()
+    serving.services.provide(nb)
+    client = serving.client()
+    routes = len(serving.provider.provider.routes)
+
+    writeNotebook(tmp_path / "nb.ipynb", "output = 2")
+    asyncio.run(serving.services.onChanged(discoverNotebooks(str(tmp_path))["nb"]))
+
+    assert client.post("/nb", json={}).text == "2"
+    assert len(serving.provider.provider.routes) == routes
+    assert serving.registry == [("unregister", []), ("register", {})]
+
+def test_broken_change_keeps_previous_version(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    serving = served()
+    serving.services.provide(discoverNotebooks(str(tmp_path))["nb"])
+    client = serving.client()
+
+    writeNotebook(tmp_path / "nb.ipynb", "output = 2", timeout="soon")
+    asyncio.run(serving.services.onChanged(discoverNotebooks(str(tmp_path))["nb"]))
+
+    # ! the service is still served with its previous options
+    assert client.post("/nb", json={}).status_code == 200
+    assert serving.services.provided == {"nb": {"nb": "nb"}}
+    assert serving.registry == []
+
+def test_mode_change_swaps_job_endpoints(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1", mode="job")
+    serving = served()
+    serving.services.provide(discoverNotebooks(str(tmp_path))["nb"])
+    client = serving.client()
+    assert client.post("/nb", json={}).status_code == 202
+
+    writeNotebook(tmp_path / "nb.ipynb", "output = 2")
+    asyncio.run(serving.services.onChanged(discoverNotebooks(str(tmp_path))["nb"]))
+
+    assert client.post("/nb", json={}).text == "2"
+    assert client.get("/nb/job", params={"id": "x"}).status_code == 404
+    assert serving.services.provided == {"nb": {"nb": "nb"}}
+    assert serving.registry == [("unregister", ["nb-job", "nb-job-cancel"]), ("register", {})]
+
+def test_removed_notebook_is_unregistered(tmp_path, writeNotebook, served):
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    nb = discoverNotebooks(str(tmp_path))["nb"]
+    serving = served()
+    serving.services.provide(nb)
+    client = serving.client()
+
+    asyncio.run(serving.services.onRemoved(nb))
+
+    assert client.post("/nb", json={}).status_code == 404
+    assert serving.registry == [("unregister", ["nb"])]
+
+def test_added_notebook_is_registered(tmp_path, writeNotebook, served):
+    serving = served()
+    client = serving.client()
+
+    writeNotebook(tmp_path / "nb.ipynb", "output = 1")
+    asyncio.run(serving.services.onAdded(discoverNotebooks(str(tmp_path))["nb"]))
+
+    assert client.post("/nb", json={}).text == "1"
+    assert serving.registry == [("register", {"nb": "nb"})]